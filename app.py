@@ -1,18 +1,33 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, g
 import os
 import sys
-import json
+import uuid
+import atexit
+import functools
 
 # 将src目录添加到Python路径中
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from src.config_manager import ConfigManager
-from src.character import Player, Enemy
+from src.character import Player
 from src.battle import Battle
+from src.battle_events import create_event_sink
+from src.battle_policy import get_policy
+from src.battle_replay import battle_outcome, record_battle, replay_battle
+from src.party_battle import PartyBattle
 from src.quest import Quest
+from src.save_codec import (
+    CODEC_VERSION, encode_player, decode_player, encode_quests, decode_quests, save_version
+)
+from src.session_store import SessionStore
+from src.state_backend import create_state_backend
+from src.config_cache import shared_config_cache
+from src.story_registry import StoryRegistry
+from src.save_writer import shared_save_writer
+from src.save_queue import SaveQueue, PENDING, WRITING, DURABLE
+from src.save_storage import create_save_storage
 
 app = Flask(__name__)
 app.secret_key = 'text_adventure_secret_key'
@@ -30,10 +45,38 @@ class GameManager:
         self.completed_quests = set()  # 存储已完成的任务ID
         self.config_path = config_path  # 配置文件路径
         self.sync_mode = "manual"  # 同步模式：auto 或 manual
+        self.game_id = None  # 所属游戏ID，会话被淘汰时用于定位存档目录
+        self.save_name = None  # 当前存档槽位名称
+        self.battle_history = []  # 最近结束的战斗记录，可以重放
+        self._finished_battle_id = None  # 最后一场已结算的战斗，避免重复结算
+        # 上次保存或加载的存档槽位及存储引擎返回的槽位状态，用于跳过未变化的写入
+        self._saved_slot = None
+        self._slot_state = None
+        # 交给存档队列的最后一次写入 (进程ID, 票据, 槽位)，写完后在之后的请求中取回槽位状态
+        self._queued_save = None
+        
+    def finish_battle(self, battle):
+        """
+        战斗结束后的结算：保存战斗记录，只保留最近的BATTLE_HISTORY_SIZE场
+        
+        战斗结束后客户端可能再次提交行动，同一场战斗只结算一次。
+        
+        Args:
+            battle (Battle): 已结束的战斗
+            
+        Returns:
+            bool: 本次调用是否进行了结算，调用方据此更新任务进度
+        """
+        if self._finished_battle_id == battle.battle_id:
+            return False
+        self._finished_battle_id = battle.battle_id
+        if battle.seed is not None:
+            self.battle_history = (self.battle_history + [record_battle(battle)])[-BATTLE_HISTORY_SIZE:]
+        return True
         
     def save_game(self, save_name="save"):
         """
-        保存游戏状态到文件
+        保存游戏状态到存档，写入完成后返回
         
         Args:
             save_name (str): 保存文件名
@@ -42,39 +85,105 @@ class GameManager:
             bool: 保存是否成功
         """
         try:
-            import json
-            import os
-            
-            # 创建保存目录，基于游戏名称，与config同级
-            game_id = session.get('game_id', 'default')
-            save_dir = os.path.join("story-list", game_id, "saves", save_name)
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
-            
-            # 准备保存数据
-            save_data = {
-                "player": self._serialize_player(),
-                "current_chapter": self.current_chapter,
-                "difficulty": self.difficulty,
-                "game_state": self.game_state,
-                "quests": self._serialize_quests(),
-                "completed_quests": list(self.completed_quests),
-                "sync_mode": self.sync_mode
-            }
-            
-            # 保存到文件
-            save_path = os.path.join(save_dir, "save.json")
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
-            
+            game_id, save_data = self.snapshot_save()
+        except Exception as e:
+            print(f"保存游戏失败: {e}")
+            return False
+        # 先等待该槽位排队中的写入，保证写入顺序
+        save_queue.wait(save_storage.slot_key(game_id, save_name))
+        self.apply_queued_save()
+        try:
+            self._slot_state = save_storage.write(
+                game_id, save_name, save_data, self.slot_state_for(game_id, save_name)
+            )
+            self._saved_slot = (game_id, save_name)
             return True
         except Exception as e:
             print(f"保存游戏失败: {e}")
             return False
+        
+    def queue_save(self, save_name="save"):
+        """
+        在当前线程取得游戏状态的快照，交给后写式存档队列写入
+        
+        Args:
+            save_name (str): 保存文件名
+            
+        Returns:
+            int: 存档票据，用于查询写入状态
+        """
+        game_id, save_data = self.snapshot_save()
+        self.apply_queued_save()
+        # 写入任务只使用提交时的数据，不引用游戏管理器：SQLite会话后端下本对象在
+        # 请求结束时已被序列化，后台线程对它的修改不会保存下来
+        ticket = save_queue.submit(
+            save_storage.slot_key(game_id, save_name),
+            functools.partial(
+                save_storage.write, game_id, save_name, save_data, self.slot_state_for(game_id, save_name)
+            )
+        )
+        self._queued_save = (os.getpid(), ticket, (game_id, save_name))
+        return ticket
+        
+    def snapshot_save(self):
+        """
+        构造存档数据
+        
+        Returns:
+            tuple: (游戏ID, 存档数据)
+        """
+        # 会话淘汰时可能不在当前会话的请求上下文中，优先使用记录的游戏ID
+        game_id = self.game_id or session.get('game_id', 'default')
+        
+        # 准备保存数据
+        save_data = {
+            "version": CODEC_VERSION,
+            "player": encode_player(self.player),
+            "current_chapter": self.current_chapter,
+            "difficulty": self.difficulty,
+            "game_state": self.game_state,
+            "quests": encode_quests(self.quests),
+            "completed_quests": sorted(self.completed_quests),
+            "sync_mode": self.sync_mode,
+            # 战斗记录创建后不再修改，复制列表即可与之后的游戏状态隔离
+            "battle_history": list(self.battle_history)
+        }
+        return game_id, save_data
+        
+    def slot_state_for(self, game_id, save_name):
+        """
+        获取上次写入或读取该槽位时的槽位状态，存储引擎据此跳过未变化的写入
+        
+        Returns:
+            object: 槽位状态，上次使用的不是该槽位时返回None
+        """
+        return self._slot_state if self._saved_slot == (game_id, save_name) else None
+        
+    def apply_queued_save(self):
+        """
+        取回存档队列已完成写入的槽位状态，在请求线程中调用
+        
+        写入仍在进行或票据属于其他工作进程时保留原来的槽位状态，存储引擎发现磁盘上的
+        槽位与之不符时会写入完整快照。
+        """
+        queued = getattr(self, '_queued_save', None)
+        if queued is None:
+            return
+        pid, ticket, slot = queued
+        if pid != os.getpid():
+            self._queued_save = None
+            return
+        state, slot_state = save_queue.result(ticket)
+        if state in (PENDING, WRITING):
+            return
+        self._queued_save = None
+        if state == DURABLE:
+            self._saved_slot = slot
+            self._slot_state = slot_state
 
     def load_game(self, save_name="save"):
         """
-        从文件加载游戏状态
+        从存档加载游戏状态
         
         Args:
             save_name (str): 保存文件名
@@ -83,160 +192,163 @@ class GameManager:
             bool: 加载是否成功
         """
         try:
-            import json
-            import os
-            
-            # 检查保存文件是否存在
-            game_id = session.get('game_id', 'default')
-            save_path = os.path.join("story-list", game_id, "saves", save_name, "save.json")
-            if not os.path.exists(save_path):
+            game_id = self.game_id or session.get('game_id', 'default')
+            # 等待该槽位排队中的写入完成，避免读到旧的存档
+            save_queue.wait(save_storage.slot_key(game_id, save_name))
+            self._queued_save = None
+            save_data, slot_state = save_storage.read(game_id, save_name)
+            if save_data is None:
                 return False
             
-            # 从文件加载数据
-            with open(save_path, 'r', encoding='utf-8') as f:
-                save_data = json.load(f)
-            
             # 恢复游戏状态
-            self._deserialize_player(save_data["player"])
+            config_manager = get_config_manager()  # 使用会话特定的配置管理器
+            self.player = decode_player(save_data["player"], config_manager)
             self.current_chapter = save_data["current_chapter"]
             self.difficulty = save_data["difficulty"]
             self.game_state = save_data["game_state"]
-            self._deserialize_quests(save_data["quests"])
+            self.quests = decode_quests(save_data["quests"], config_manager, save_version(save_data))
             self.completed_quests = set(save_data["completed_quests"])
             self.sync_mode = save_data.get("sync_mode", "manual")
+            self.battle_history = save_data.get("battle_history", [])
+            
+            self._saved_slot = (game_id, save_name)
+            self._slot_state = slot_state
             
             return True
         except Exception as e:
             print(f"加载游戏失败: {e}")
             return False
 
-    def _serialize_player(self):
-        """序列化玩家数据"""
-        if not self.player:
-            return None
-            
-        return {
-            "name": self.player.name,
-            "class_name": self.player.class_name,
-            "level": self.player.level,
-            "exp": self.player.exp,
-            "exp_to_next_level": getattr(self.player, 'exp_to_next_level', 100),
-            "hp": self.player.hp,
-            "max_hp": self.player.max_hp,
-            "mp": self.player.mp,
-            "max_mp": self.player.max_mp,
-            "atk": self.player.atk,
-            "matk": self.player.matk,
-            "defense": self.player.defense,
-            "mdef": self.player.mdef,
-            "agi": self.player.agi,
-            "gold": self.player.gold,
-            "skills": self.player.skills,
-            "items": self.player.items,
-            "stat_points": getattr(self.player, 'stat_points', 0),
-            "equipped_items": getattr(self.player, 'equipped_items', {})
-        }
+# 会话存储容量与空闲过期时间（秒），可通过环境变量调整
+SESSION_STORE_MAX_SIZE = int(os.environ.get('SESSION_STORE_MAX_SIZE', 1000))
+SESSION_IDLE_TTL = float(os.environ.get('SESSION_IDLE_TTL', 1800))
 
-    def _deserialize_player(self, player_data):
-        """反序列化玩家数据"""
-        if not player_data:
-            self.player = None
-            return
-            
-        # 获取职业配置
-        config_manager = get_config_manager()  # 使用会话特定的配置管理器
-        char_class = config_manager.get_class(player_data["class_name"])
-        if not char_class:
-            # 如果职业不存在，创建一个基础角色
-            self.player = Player(player_data["name"], {
-                "name": player_data["class_name"],
-                "base_stats": {
-                    "hp": player_data["max_hp"],
-                    "mp": player_data["max_mp"],
-                    "atk": player_data["atk"],
-                    "matk": player_data["matk"],
-                    "def": player_data["defense"],
-                    "mdef": player_data["mdef"],
-                    "agi": player_data["agi"]
-                },
-                "skills": player_data["skills"]
-            })
-        else:
-            self.player = Player(player_data["name"], char_class)
-            
-        # 恢复玩家状态
-        self.player.level = player_data["level"]
-        self.player.exp = player_data["exp"]
-        self.player.exp_to_next_level = player_data.get("exp_to_next_level", 100)
-        self.player.hp = player_data["hp"]
-        self.player.max_hp = player_data["max_hp"]
-        self.player.mp = player_data["mp"]
-        self.player.max_mp = player_data["max_mp"]
-        self.player.atk = player_data["atk"]
-        self.player.matk = player_data["matk"]
-        self.player.defense = player_data["defense"]
-        self.player.mdef = player_data["mdef"]
-        self.player.agi = player_data["agi"]
-        self.player.gold = player_data["gold"]
-        self.player.skills = player_data["skills"]
-        self.player.items = player_data["items"]
-        self.player.stat_points = player_data.get("stat_points", 0)
-        self.player.equipped_items = player_data.get("equipped_items", {})
-
-    def _serialize_quests(self):
-        """序列化任务数据"""
-        serialized_quests = {}
-        for quest_id, quest in self.quests.items():
-            serialized_quests[quest_id] = {
-                "id": quest.id,
-                "name": quest.name,
-                "description": quest.description,
-                "target_enemy": getattr(quest, 'target_enemy', ''),
-                "required_count": getattr(quest, 'required_count', 0),
-                "current_count": getattr(quest, 'current_count', 0),
-                "reward": getattr(quest, 'reward', {}),
-                "completed": getattr(quest, 'completed', False)
-            }
-        return serialized_quests
-
-    def _deserialize_quests(self, quests_data):
-        """反序列化任务数据"""
-        self.quests = {}
-        for quest_id, quest_data in quests_data.items():
-            quest = Quest({
-                "id": quest_data["id"],
-                "name": quest_data["name"],
-                "description": quest_data["description"],
-                "target": quest_data["target_enemy"],
-                "required_count": quest_data["required_count"],
-                "reward": quest_data["reward"]
-            })
-            quest.current_count = quest_data["current_count"]
-            quest.completed = quest_data["completed"]
-            self.quests[quest_id] = quest
+def _evict_game_manager(session_id, game_manager, reason):
+    """会话被淘汰前将游戏状态写回其存档槽位"""
+    if game_manager.player and game_manager.save_name:
+        game_manager.queue_save(game_manager.save_name)
+
+# 后写式存档队列，存档请求不再等待磁盘写入
+SAVE_QUEUE_MAX_PENDING = int(os.environ.get('SAVE_QUEUE_MAX_PENDING', 256))
+# 同时写入的槽位数，同一批写入由存档写入器合并刷盘
+SAVE_QUEUE_WORKERS = int(os.environ.get('SAVE_QUEUE_WORKERS', 8))
+save_queue = SaveQueue(max_pending=SAVE_QUEUE_MAX_PENDING, workers=SAVE_QUEUE_WORKERS)
+# 退出处理按注册的相反顺序执行，会话写回的存档也会在这里等待写完
+atexit.register(save_queue.flush)
+
+# 会话状态后端：memory 为单进程内存存储，sqlite 为多个工作进程共享的数据库文件
+STATE_BACKEND = os.environ.get('STATE_BACKEND', 'memory')
+STATE_DB_PATH = os.environ.get('STATE_DB_PATH', os.path.join('story-list', 'state.db'))
+
+# 为每个会话创建独立的游戏管理器，按LRU和空闲时间淘汰
+state_backend = create_state_backend(
+    STATE_BACKEND,
+    session_store=SessionStore(
+        max_size=SESSION_STORE_MAX_SIZE,
+        idle_ttl=SESSION_IDLE_TTL,
+        on_evict=_evict_game_manager
+    ),
+    db_path=STATE_DB_PATH,
+    idle_ttl=SESSION_IDLE_TTL,
+    on_evict=_evict_game_manager
+)
+# 进程退出前写回所有仍在内存中的会话
+atexit.register(state_backend.flush)
+
+# 使用进程内共享的配置缓存，配置文件修改后在后台重新加载
+CONFIG_CHECK_INTERVAL = float(os.environ.get('CONFIG_CHECK_INTERVAL', 1.0))
+config_managers = shared_config_cache
+config_managers.check_interval = CONFIG_CHECK_INTERVAL
+
+# 存档写入器，并发的存档共享刷盘操作
+save_writer = shared_save_writer
+# 存档存储引擎：json 为每个槽位一个目录，sqlite 为共享的SQLite数据库
+SAVE_STORAGE = os.environ.get('SAVE_STORAGE', 'json')
+SAVE_DB_PATH = os.environ.get('SAVE_DB_PATH', os.path.join('story-list', 'saves.db'))
+# json存储的存档日志积累多少条后重新写入完整快照
+JOURNAL_COMPACT_EVERY = int(os.environ.get('JOURNAL_COMPACT_EVERY', 20))
+save_storage = create_save_storage(
+    SAVE_STORAGE,
+    writer=save_writer,
+    db_path=SAVE_DB_PATH,
+    compact_every=JOURNAL_COMPACT_EVERY
+)
+
+# 战斗事件输出端：file 由后台线程写入日志文件，null、memory 不产生输出，console 打印到控制台（会阻塞请求）
+BATTLE_EVENT_SINK = os.environ.get('BATTLE_EVENT_SINK', 'file')
+BATTLE_EVENT_LOG = os.environ.get('BATTLE_EVENT_LOG', os.path.join('story-list', 'battle_events.log'))
+BATTLE_EVENT_LEVEL = os.environ.get('BATTLE_EVENT_LEVEL', 'info')
+# 战斗事件日志超过该大小（字节）时轮换，保留 BATTLE_EVENT_LOG_BACKUPS 个旧文件
+BATTLE_EVENT_LOG_MAX_BYTES = int(os.environ.get('BATTLE_EVENT_LOG_MAX_BYTES', 10 * 1024 * 1024))
+BATTLE_EVENT_LOG_BACKUPS = int(os.environ.get('BATTLE_EVENT_LOG_BACKUPS', 3))
+battle_event_sink = create_event_sink(
+    BATTLE_EVENT_SINK,
+    path=BATTLE_EVENT_LOG,
+    level=BATTLE_EVENT_LEVEL,
+    max_bytes=BATTLE_EVENT_LOG_MAX_BYTES,
+    backup_count=BATTLE_EVENT_LOG_BACKUPS
+)
+atexit.register(battle_event_sink.flush, 5)
+
+# 每个会话保存的最近战斗记录数
+BATTLE_HISTORY_SIZE = int(os.environ.get('BATTLE_HISTORY_SIZE', 10))
+
+# 自动战斗每次请求最多进行的战斗场数和回合数
+AUTO_BATTLE_MAX_FIGHTS = int(os.environ.get('AUTO_BATTLE_MAX_FIGHTS', 20))
+AUTO_BATTLE_MAX_TURNS = int(os.environ.get('AUTO_BATTLE_MAX_TURNS', 500))
 
-# 为每个会话创建独立的游戏管理器
-game_managers = {}
+# 多人战斗最多的敌人数量，以及每次请求最多进行的行动次数（包括敌人的行动）
+PARTY_BATTLE_MAX_ENEMIES = int(os.environ.get('PARTY_BATTLE_MAX_ENEMIES', 10))
+PARTY_BATTLE_MAX_TURNS = int(os.environ.get('PARTY_BATTLE_MAX_TURNS', 2000))
 
-# 创建一个全局的配置管理器字典，为每个故事ID维护一个配置管理器
-config_managers = {}
+# 游戏列表注册表，story-list.json修改后自动重新读取
+story_registry = StoryRegistry('story-list.json', check_interval=CONFIG_CHECK_INTERVAL)
 
 def get_game_manager():
     """获取当前会话的游戏管理器"""
-    session_id = session.get('id', 'default')
-    if session_id not in game_managers:
-        config_path = session.get('config_path', 'config')
-        game_managers[session_id] = GameManager(config_path)
-    return game_managers[session_id]
+    if 'id' not in session:
+        session['id'] = uuid.uuid4().hex
+    session_id = session['id']
+    # 同一请求内多次调用复用同一个对象，请求结束后统一写回状态后端
+    game_manager = g.get('game_manager')
+    if game_manager is None:
+        game_manager = state_backend.load(session_id)
+        if game_manager is None:
+            config_path = session.get('config_path', 'config')
+            game_manager = GameManager(config_path)
+            game_manager.game_id = session.get('game_id', 'default')
+            # 会话可能已被淘汰并写回存档，从存档槽位恢复
+            save_name = session.get('save_name')
+            if save_name:
+                game_manager.load_game(save_name)
+        elif game_manager.battle:
+            # 战斗状态从其他进程恢复时不携带配置管理器
+            game_manager.battle.config_manager = get_config_manager()
+            game_manager.battle.event_sink = battle_event_sink
+        g.game_manager = game_manager
+        g.session_id = session_id
+    game_manager.game_id = session.get('game_id', 'default')
+    game_manager.save_name = session.get('save_name')
+    return game_manager
+
+@app.after_request
+def store_game_manager(response):
+    """请求结束后将会话状态写回状态后端"""
+    game_manager = g.pop('game_manager', None)
+    if game_manager is not None:
+        state_backend.store(g.session_id, game_manager)
+    return response
 
 def get_config_manager():
     """获取当前会话的配置管理器"""
-    game_id = session.get('game_id', 'default')
-    if game_id not in config_managers:
+    # 同一请求内固定使用同一份配置，避免请求处理中途被重新加载替换
+    config_manager = g.get('config_manager')
+    if config_manager is None:
+        game_id = session.get('game_id', 'default')
         config_path = session.get('config_path', os.path.join('story-list', game_id, 'config'))
-        config_managers[game_id] = ConfigManager(config_path)
-        config_managers[game_id].load_all_configs()
-    return config_managers[game_id]
+        config_manager = config_managers.get(config_path)
+        g.config_manager = config_manager
+    return config_manager
 
 @app.route('/')
 def index():
@@ -246,11 +358,14 @@ def index():
 def get_story_list():
     """获取游戏列表"""
     try:
-        with open('story-list.json', 'r', encoding='utf-8') as f:
-            story_list = json.load(f)
-        return jsonify({'status': 'success', 'story_list': story_list})
+        stories = story_registry.snapshot()
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'获取游戏列表失败: {e}'})
+    # 列表未变化时浏览器凭If-None-Match得到304，不再传输列表内容
+    response = jsonify({'status': 'success', 'story_list': stories.stories})
+    response.set_etag(stories.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/api/select_story', methods=['POST'])
 def select_story():
@@ -259,14 +374,7 @@ def select_story():
     game_id = data.get('game_id')
     
     try:
-        with open('story-list.json', 'r', encoding='utf-8') as f:
-            story_list = json.load(f)
-            
-        selected_game = None
-        for game in story_list:
-            if game.get('id') == game_id:
-                selected_game = game
-                break
+        selected_game = story_registry.get(game_id)
                 
         if not selected_game:
             return jsonify({'status': 'error', 'message': '游戏不存在'})
@@ -293,37 +401,53 @@ def select_story():
 
 @app.route('/api/get_save_list', methods=['POST'])
 def get_save_list():
-    """获取存档列表"""
+    """
+    获取存档列表
+    
+    可选参数 sort（modified_time、name、level、chapter）、order（asc或desc）、
+    page与page_size用于排序和分页，不指定page_size时返回全部存档；
+    player_name只列出该玩家的存档。
+    """
+    data = request.get_json(silent=True) or {}
     game_id = session.get('game_id', 'default')
-    save_dir = os.path.join("story-list", game_id, "saves")
+    sort = data.get('sort', 'modified_time')
+    descending = data.get('order', 'desc') != 'asc'
     
     try:
-        if not os.path.exists(save_dir):
-            return jsonify({'status': 'success', 'saves': []})
-            
-        # 获取所有子目录（存档）
-        saves = []
-        for item in os.listdir(save_dir):
-            item_path = os.path.join(save_dir, item)
-            if os.path.isdir(item_path):
-                # 获取存档中save.json文件的修改时间
-                save_file_path = os.path.join(item_path, 'save.json')
-                if os.path.exists(save_file_path):
-                    mtime = os.path.getmtime(save_file_path)
-                else:
-                    # 如果save.json不存在，则使用文件夹的修改时间
-                    mtime = os.path.getmtime(item_path)
-                saves.append({
-                    'name': item,
-                    'modified_time': mtime
-                })
-                
-        # 按修改时间排序
-        saves.sort(key=lambda x: x['modified_time'], reverse=True)
-        return jsonify({'status': 'success', 'saves': saves})
+        page = max(1, int(data.get('page', 1)))
+        page_size = data.get('page_size')
+        page_size = max(1, int(page_size)) if page_size is not None else None
+        offset = (page - 1) * page_size if page_size else 0
+        saves, total = save_storage.list(
+            game_id, sort, descending, offset, page_size, player_name=data.get('player_name')
+        )
+        return jsonify({
+            'status': 'success',
+            'saves': saves,
+            'total': total,
+            'page': page,
+            'page_size': page_size
+        })
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'获取存档列表失败: {e}'})
 
+@app.route('/api/delete_save', methods=['POST'])
+def delete_save():
+    """删除存档"""
+    data = request.get_json()
+    save_name = data.get('save_name')
+    if not save_name or save_name != os.path.basename(save_name) or save_name.startswith('.'):
+        return jsonify({'status': 'error', 'message': '存档名称无效'})
+    
+    game_id = session.get('game_id', 'default')
+    try:
+        # 等待排队中的写入完成，避免删除后又被写回
+        save_queue.wait(save_storage.slot_key(game_id, save_name))
+        save_storage.delete(game_id, save_name)
+        return jsonify({'status': 'success', 'message': f'已删除存档: {save_name}'})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'删除存档失败: {e}'})
+
 @app.route('/api/start_game', methods=['POST'])
 def start_game():
     data = request.get_json()
@@ -345,6 +469,7 @@ def start_game():
     # 设置玩家名称
     session['player_name'] = name
     session['save_name'] = save_name
+    game_manager.save_name = save_name
     return jsonify({'status': 'success', 'message': '游戏开始', 'sync_mode': sync_mode})
 
 @app.route('/api/select_class', methods=['POST'])
@@ -417,9 +542,89 @@ def get_story_intro():
     intro = config_manager.story.get('intro', {})
     return jsonify({
         'title': intro.get('title', '冒险开始'),
-        'text': intro.get('text', '')
+        'text': str(intro.get('text', ''))
     })
 
+def battle_log_delta(battle, since=None):
+    """
+    获取客户端尚未收到的战斗日志
+    
+    Args:
+        battle (Battle): 战斗实例
+        since (int): 客户端收到的最后一个日志序号，None表示返回全部
+        
+    Returns:
+        dict: log为新日志，log_cursor为下次请求使用的序号，log_reset为True时客户端需先清空日志
+    """
+    if not isinstance(since, int) or isinstance(since, bool):
+        since = None
+    messages, cursor, reset = battle.battle_log.since(since)
+    return {'log': messages, 'log_cursor': cursor, 'log_reset': reset}
+
+def new_battle(game_manager, config_manager, enemy_name="goblin"):
+    """
+    创建并开始一场新战斗
+    
+    Args:
+        game_manager (GameManager): 当前会话的游戏管理器
+        config_manager (ConfigManager): 当前会话的配置管理器
+        enemy_name (str): 敌人ID
+        
+    Returns:
+        Battle: 已开始的战斗，敌人配置不存在时返回None
+    """
+    # 从原型池复制一个按当前难度调整好的敌人
+    enemy = config_manager.spawn_enemy(enemy_name, game_manager.difficulty)
+    if enemy is None:
+        return None
+    
+    # 传递难度参数
+    game_manager.battle = Battle(
+        game_manager.player, enemy, config_manager, game_manager.difficulty, event_sink=battle_event_sink
+    )
+    game_manager.battle.start_battle()
+    return game_manager.battle
+
+def parse_battle_policy(data):
+    """
+    按请求参数获取自动战斗策略
+    
+    Args:
+        data (dict): 请求参数，policy为策略名称（默认cautious），heal_below为cautious策略的治疗阈值
+        
+    Returns:
+        callable: 策略函数
+        
+    Raises:
+        ValueError: 策略名称未知或治疗阈值不在0到100之间
+        TypeError: 治疗阈值不是数字
+    """
+    options = {}
+    if data.get('policy', 'cautious') == 'cautious' and data.get('heal_below') is not None:
+        heal_below = int(data.get('heal_below'))
+        if not 0 <= heal_below <= 100:
+            raise ValueError('heal_below必须在0到100之间')
+        options['heal_below'] = heal_below
+    return get_policy(data.get('policy', 'cautious'), **options)
+
+def battle_over(battle):
+    """判断战斗是否已经结束"""
+    return not battle.is_active or not battle.player.is_alive() or not battle.enemy.is_alive()
+
+def settle_battle(game_manager, battle):
+    """
+    结算已结束的战斗，敌人被击败时更新任务进度
+    
+    Returns:
+        list: 因此完成的任务ID
+    """
+    if not game_manager.finish_battle(battle) or battle.enemy.is_alive():
+        return []
+    completed_before = set(game_manager.completed_quests)
+    # 任务目标使用敌人在配置中的ID
+    update_quest_progress(battle.enemy.key or battle.enemy.name)
+    return sorted(game_manager.completed_quests - completed_before)
+
 @app.route('/api/start_battle', methods=['POST'])
 def start_battle():
     # 获取当前会话的游戏管理器
@@ -430,18 +635,10 @@ def start_battle():
     if not game_manager.player:
         return jsonify({'status': 'error', 'message': '请先创建角色'})
     
-    # 创建一个哥布林敌人作为示例
-    goblin_config = config_manager.get_enemy("goblin")
-    if not goblin_config:
+    # 以哥布林作为示例
+    if new_battle(game_manager, config_manager) is None:
         return jsonify({'status': 'error', 'message': '敌人配置错误'})
     
-    enemy = Enemy(goblin_config)
-    # 传递难度参数
-    game_manager.battle = Battle(game_manager.player, enemy, config_manager, game_manager.difficulty)
-    
-    # 初始化战斗
-    result = game_manager.battle.start_battle()
-    
     # 返回战斗状态
     battle_state = {
         'player': {
@@ -459,9 +656,9 @@ def start_battle():
             'hp': game_manager.battle.enemy.hp,
             'max_hp': game_manager.battle.enemy.max_hp
         },
-        'log': game_manager.battle.battle_log,
         'is_active': game_manager.battle.is_active
     }
+    battle_state.update(battle_log_delta(game_manager.battle))
     
     return jsonify({
         'status': 'success',
@@ -483,20 +680,18 @@ def battle_action():
     data = request.get_json()
     action = data.get('action')
     skill_name = data.get('skill_name')
+    item_name = data.get('item_name')
     
-    # 执行玩家行动
-    game_manager.battle.player_action(action, skill_name)
-    
-    # 检查战斗是否结束
-    battle_ended = not game_manager.battle.is_active or \
-                   not game_manager.battle.player.is_alive() or \
-                   not game_manager.battle.enemy.is_alive()
+    # 战斗已经结束时（重复或迟到的请求）不再行动，否则会再次结算奖励，直接返回结算后的状态
+    battle_ended = battle_over(game_manager.battle)
+    if not battle_ended:
+        # 执行玩家行动
+        game_manager.battle.player_action(action, skill_name, item_name)
+        battle_ended = battle_over(game_manager.battle)
     
-    # 如果敌人被击败，更新任务进度
-    enemy_name = None
-    if not game_manager.battle.enemy.is_alive():
-        enemy_name = game_manager.battle.enemy.name
-        update_quest_progress(enemy_name)
+    # 战斗结束时结算一次（敌人被击败时更新任务进度）
+    if battle_ended:
+        settle_battle(game_manager, game_manager.battle)
     
     # 返回战斗状态
     battle_state = {
@@ -515,18 +710,169 @@ def battle_action():
             'hp': game_manager.battle.enemy.hp,
             'max_hp': game_manager.battle.enemy.max_hp
         },
-        'log': game_manager.battle.battle_log,
         'is_active': game_manager.battle.is_active,
         'battle_ended': battle_ended,
         'player_won': game_manager.battle.enemy.hp <= 0 if game_manager.battle else False,
         'player_dead': not game_manager.player.is_alive()
     }
+    battle_state.update(battle_log_delta(game_manager.battle, data.get('since')))
     
     return jsonify({
         'status': 'success',
         'battle_state': battle_state
     })
 
+@app.route('/api/auto_battle', methods=['POST'])
+def auto_battle():
+    """
+    自动战斗：按服务器端策略连续进行行动，一次请求内结算整场战斗或若干回合
+    
+    请求参数：
+        policy (str): 战斗策略，attack、strongest_skill 或 cautious
+        heal_below (int): cautious策略的治疗阈值（生命值百分比）
+        enemy (str): 新战斗的敌人ID，默认哥布林
+        fights (int): 最多进行的战斗场数，有进行中的战斗时先继续该战斗
+        turns (int): 最多进行的回合数，用完时战斗保持进行中
+    """
+    game_manager = get_game_manager()
+    config_manager = get_config_manager()  # 使用会话特定的配置管理器
+    
+    if not game_manager.player:
+        return jsonify({'status': 'error', 'message': '请先创建角色'})
+    
+    data = request.get_json() or {}
+    try:
+        policy = parse_battle_policy(data)
+        fights = min(max(int(data.get('fights', 1)), 1), AUTO_BATTLE_MAX_FIGHTS)
+        turns = min(max(int(data.get('turns') or AUTO_BATTLE_MAX_TURNS), 1), AUTO_BATTLE_MAX_TURNS)
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'自动战斗参数错误: {e}'}), 400
+    
+    results = []
+    completed = []
+    for _ in range(fights):
+        battle = game_manager.battle
+        if battle is None or battle_over(battle):
+            if not game_manager.player.is_alive():
+                break
+            battle = new_battle(game_manager, config_manager, data.get('enemy', 'goblin'))
+            if battle is None:
+                return jsonify({'status': 'error', 'message': '敌人配置错误'})
+        start_turn = len(battle.actions)
+        while turns > 0 and not battle_over(battle):
+            battle.player_action(*policy(battle))
+            turns -= 1
+        result = {
+            'enemy': battle.enemy.name,
+            'outcome': battle_outcome(battle),
+            'turns': len(battle.actions) - start_turn
+        }
+        if battle_over(battle):
+            won = not battle.enemy.is_alive()
+            result['exp'] = battle.enemy.exp_reward if won else 0
+            result['gold'] = battle.enemy.gold_reward if won else 0
+            completed.extend(settle_battle(game_manager, battle))
+        results.append(result)
+        if turns <= 0 or not game_manager.player.is_alive():
+            break
+    
+    player = game_manager.player
+    battle = game_manager.battle
+    return jsonify({
+        'status': 'success',
+        'fights': results,
+        'turns': sum(result['turns'] for result in results),
+        'battle_active': battle is not None and not battle_over(battle),
+        'enemy': {'name': battle.enemy.name, 'hp': battle.enemy.hp, 'max_hp': battle.enemy.max_hp}
+                 if battle is not None and not battle_over(battle) else None,
+        'player': {
+            'hp': player.hp,
+            'max_hp': player.max_hp,
+            'mp': player.mp,
+            'max_mp': player.max_mp,
+            'level': player.level,
+            'exp': player.exp,
+            'gold': player.gold
+        },
+        'completed_quests': completed,
+        'player_dead': not player.is_alive()
+    })
+
+@app.route('/api/party_battle', methods=['POST'])
+def party_battle():
+    """
+    多人战斗：当前玩家对战一组敌人，行动顺序按敏捷度决定，在一次请求内按服务器端策略自动结算。
+    战斗失败、逃跑或达到行动次数上限时，已击败的敌人不计入任务进度
+    
+    请求参数：
+        enemies (list): 敌人ID列表，可以重复，例如 ["goblin", "goblin", "goblin_shaman"]
+        policy (str): 战斗策略，attack、strongest_skill 或 cautious
+        heal_below (int): cautious策略的治疗阈值（生命值百分比）
+        turns (int): 最多进行的行动次数（包括敌人的行动），用完时战斗中止
+    """
+    game_manager = get_game_manager()
+    config_manager = get_config_manager()  # 使用会话特定的配置管理器
+    
+    if not game_manager.player:
+        return jsonify({'status': 'error', 'message': '请先创建角色'})
+    if not game_manager.player.is_alive():
+        return jsonify({'status': 'error', 'message': '角色已被击败'})
+    if game_manager.battle is not None and not battle_over(game_manager.battle):
+        return jsonify({'status': 'error', 'message': '请先结束进行中的战斗'})
+    
+    data = request.get_json() or {}
+    enemy_names = data.get('enemies') or ['goblin']
+    try:
+        policy = parse_battle_policy(data)
+        turns = min(max(int(data.get('turns') or PARTY_BATTLE_MAX_TURNS), 1), PARTY_BATTLE_MAX_TURNS)
+        if not isinstance(enemy_names, list) or not all(isinstance(name, str) for name in enemy_names):
+            raise ValueError('enemies必须是敌人ID列表')
+        if len(enemy_names) > PARTY_BATTLE_MAX_ENEMIES:
+            raise ValueError(f'敌人数量不能超过{PARTY_BATTLE_MAX_ENEMIES}')
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'多人战斗参数错误: {e}'}), 400
+    
+    enemies = [config_manager.spawn_enemy(name, game_manager.difficulty) for name in enemy_names]
+    if any(enemy is None for enemy in enemies):
+        return jsonify({'status': 'error', 'message': '敌人配置错误'})
+    
+    battle = PartyBattle(
+        [game_manager.player], enemies, config_manager, game_manager.difficulty, event_sink=battle_event_sink
+    )
+    battle.start_battle()
+    actions = battle.run(policy, max_turns=turns)
+    outcome = battle.outcome()
+    
+    # 与一对一战斗一致，只有获胜时被击败的敌人才计入任务进度
+    completed_before = set(game_manager.completed_quests)
+    if outcome == 'win':
+        for enemy in battle.defeated:
+            update_quest_progress(enemy.key or enemy.name)
+    completed = sorted(game_manager.completed_quests - completed_before)
+    
+    player = game_manager.player
+    return jsonify({
+        'status': 'success',
+        'outcome': 'timeout' if outcome == 'active' else outcome,
+        'actions': actions,
+        'log': list(battle.battle_log),
+        'enemies': [
+            {'name': battle.labels[enemy], 'hp': enemy.hp, 'max_hp': enemy.max_hp}
+            for enemy in battle.enemies
+        ],
+        'player': {
+            'hp': player.hp,
+            'max_hp': player.max_hp,
+            'mp': player.mp,
+            'max_mp': player.max_mp,
+            'level': player.level,
+            'exp': player.exp,
+            'gold': player.gold
+        },
+        'completed_quests': completed,
+        'player_dead': not player.is_alive()
+    })
+
 def update_quest_progress(enemy_name):
     """
     更新任务进度
@@ -599,14 +945,14 @@ def accept_quest():
         return jsonify({'status': 'error', 'message': '章节数据错误'})
         
     # 查找任务数据
-    for quest_data in chapter.get("quests", []):
-        if quest_data.get("id") == quest_id:
-            # 创建任务实例
-            quest = Quest(quest_data)
-            game_manager.quests[quest_id] = quest
-            return jsonify({'status': 'success', 'message': f'已接受任务: {quest.name}'})
-            
-    return jsonify({'status': 'error', 'message': '任务未找到'})
+    quest_data = config_manager.get_quest(game_manager.current_chapter, quest_id)
+    if not quest_data:
+        return jsonify({'status': 'error', 'message': '任务未找到'})
+        
+    # 创建任务实例
+    quest = Quest(quest_data)
+    game_manager.quests[quest_id] = quest
+    return jsonify({'status': 'success', 'message': f'已接受任务: {quest.name}'})
 
 @app.route('/api/get_quests', methods=['GET'])
 def get_quests():
@@ -659,10 +1005,67 @@ def save_game():
     data = request.get_json()
     save_name = data.get('save_name', session.get('save_name', 'save'))
     
-    if game_manager.save_game(save_name):
-        return jsonify({'status': 'success', 'message': '游戏保存成功'})
-    else:
+    try:
+        ticket = game_manager.queue_save(save_name)
+    except Exception as e:
+        print(f"保存游戏失败: {e}")
         return jsonify({'status': 'error', 'message': '游戏保存失败'})
+    session['save_name'] = save_name
+    game_manager.save_name = save_name
+    return jsonify({'status': 'success', 'message': '游戏保存成功', 'ticket': ticket})
+
+@app.route('/api/battle_history', methods=['GET'])
+def battle_history():
+    """
+    列出最近结束的战斗
+    """
+    game_manager = get_game_manager()
+    battles = [
+        {
+            'index': index,
+            'seed': record['seed'],
+            'enemy': record['enemy'],
+            'difficulty': record['difficulty'],
+            'actions': len(record['actions']),
+            'outcome': record['outcome']
+        }
+        for index, record in enumerate(game_manager.battle_history)
+    ]
+    return jsonify({'status': 'success', 'battles': battles})
+
+@app.route('/api/replay_battle', methods=['POST'])
+def replay_battle_route():
+    """
+    根据战斗记录重放战斗，返回重建的战斗日志
+    """
+    game_manager = get_game_manager()
+    data = request.get_json() or {}
+    index = data.get('index', -1)
+    try:
+        record = game_manager.battle_history[index]
+    except (IndexError, TypeError):
+        return jsonify({'status': 'error', 'message': '战斗记录不存在'})
+    try:
+        battle = replay_battle(record, get_config_manager())
+    except (KeyError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': f'重放战斗失败: {e}'})
+    outcome = record_battle(battle)['outcome']
+    return jsonify({
+        'status': 'success',
+        'log': list(battle.battle_log),
+        'outcome': outcome,
+        'matches': outcome == record['outcome']
+    })
+
+@app.route('/api/save_status', methods=['GET'])
+def save_status():
+    """
+    查询存档票据的写入状态，不带票据时返回存档队列的统计信息
+    """
+    ticket = request.args.get('ticket', type=int)
+    if ticket is None:
+        return jsonify({'status': 'success', 'queue': save_queue.stats()})
+    return jsonify({'status': 'success', 'ticket': ticket, 'state': save_queue.status(ticket)})
 
 @app.route('/api/load_game', methods=['POST'])
 def load_game():
@@ -676,6 +1079,9 @@ def load_game():
     save_name = data.get('save_name', 'save')
     
     if game_manager.load_game(save_name):
+        session['save_name'] = save_name
+        game_manager.save_name = save_name
+        
         # 返回加载后的游戏状态
         player_info = None
         if game_manager.player:
@@ -760,11 +1166,11 @@ def use_item():
     # 使用物品
     if game_manager.player.use_item(item_name, config_manager):
         # 从背包中移除消耗品
-        item = config_manager.get_item(item_name)
-        if item.get("type") == "consumable":
+        item = config_manager.get_item_record(item_name)
+        if item.type == "consumable":
             if item_name in game_manager.player.items:
                 game_manager.player.items.remove(item_name)
-        return jsonify({'status': 'success', 'message': f'你使用了{item.get("name", item_name)}!'})
+        return jsonify({'status': 'success', 'message': f'你使用了{item.name}!'})
     else:
         return jsonify({'status': 'error', 'message': '无法使用该物品'})
 
@@ -790,8 +1196,8 @@ def equip_item():
         return jsonify({'status': 'error', 'message': '你没有这个物品'})
     
     # 装备物品
-    item = config_manager.get_item(item_name)
-    item_type = item.get("type")
+    item = config_manager.get_item_record(item_name)
+    item_type = item.type if item else None
     
     if item_type not in ["weapon", "armor"]:
         return jsonify({'status': 'error', 'message': '该物品无法装备'})
@@ -808,15 +1214,16 @@ def equip_item():
             
         result = {
             'status': 'success', 
-            'message': f'你装备了{item.get("name", item_name)}!',
+            'message': f'你装备了{item.name}!',
             'equipped_items': game_manager.player.equipped_items
         }
         
         # 如果替换了旧装备，将其放回背包
         if old_item:
             game_manager.player.items.append(old_item)
-            old_item_data = config_manager.get_item(old_item)
-            result['message'] += f' {old_item_data.get("name", old_item)}已放回背包。'
+            old_item_data = config_manager.get_item_record(old_item)
+            old_item_name = old_item_data.name if old_item_data else old_item
+            result['message'] += f' {old_item_name}已放回背包。'
             
         return jsonify(result)
     else:
@@ -834,29 +1241,19 @@ def get_inventory():
     if not game_manager.player:
         return jsonify({'status': 'error', 'message': '请先创建角色'})
     
-    inventory = []
-    for item_name in game_manager.player.items:
-        item = config_manager.get_item(item_name)
-        if item:
-            inventory.append({
-                'name': item_name,
-                'display_name': item.get('name', item_name),
-                'type': item.get('type', ''),
-                'description': item.get('description', ''),
-                'stat_bonus': item.get('stat_bonus', {})
-            })
+    # 背包条目在配置加载时已预先构建
+    item_records = config_manager.item_records
+    inventory = [
+        item_records[item_name].inventory_entry
+        for item_name in game_manager.player.items
+        if item_name in item_records
+    ]
     
-    equipped_items = {}
-    for item_type, item_name in game_manager.player.equipped_items.items():
-        item = config_manager.get_item(item_name)
-        if item:
-            equipped_items[item_type] = {
-                'name': item_name,
-                'display_name': item.get('name', item_name),
-                'type': item.get('type', ''),
-                'description': item.get('description', ''),
-                'stat_bonus': item.get('stat_bonus', {})
-            }
+    equipped_items = {
+        item_type: item_records[item_name].inventory_entry
+        for item_type, item_name in game_manager.player.equipped_items.items()
+        if item_name in item_records
+    }
     
     return jsonify({
         'status': 'success',
@@ -906,30 +1303,14 @@ def get_shop():
     data = request.get_json()
     shop_name = data.get('shop_name', 'village_shop')
     
-    shop = config_manager.get_shop(shop_name)
-    if not shop:
+    # 商品目录在配置加载时已预先构建
+    catalog = config_manager.get_shop_catalog(shop_name)
+    if not catalog:
         return jsonify({'status': 'error', 'message': '商店不存在'})
     
-    # 获取商品信息
-    items = []
-    for item_name in shop.get('items', []):
-        item = config_manager.get_item(item_name)
-        if item:
-            items.append({
-                'name': item_name,
-                'display_name': item.get('name', item_name),
-                'price': item.get('price', 0),
-                'description': item.get('description', ''),
-                'type': item.get('type', '')
-            })
-    
     return jsonify({
         'status': 'success',
-        'shop': {
-            'name': shop.get('name', shop_name),
-            'description': shop.get('description', ''),
-            'items': items
-        },
+        'shop': catalog.payload,
         'player_gold': game_manager.player.gold
     })
 
@@ -953,16 +1334,16 @@ def buy_item():
         return jsonify({'status': 'error', 'message': '未指定物品'})
     
     # 检查商店是否有该物品
-    shop = config_manager.get_shop(shop_name)
-    if not shop or item_name not in shop.get('items', []):
+    catalog = config_manager.get_shop_catalog(shop_name)
+    if not catalog or item_name not in catalog.item_keys:
         return jsonify({'status': 'error', 'message': '商店没有该物品'})
     
     # 获取物品信息
-    item = config_manager.get_item(item_name)
+    item = config_manager.get_item_record(item_name)
     if not item:
         return jsonify({'status': 'error', 'message': '物品不存在'})
     
-    price = item.get('price', 0)
+    price = item.price
     
     # 检查金币是否足够
     if game_manager.player.gold < price:
@@ -974,7 +1355,7 @@ def buy_item():
     
     return jsonify({
         'status': 'success',
-        'message': f'你购买了{item.get("name", item_name)}!',
+        'message': f'你购买了{item.name}!',
         'player_gold': game_manager.player.gold
     })
 
@@ -1033,13 +1414,38 @@ def get_player_stats():
         'player_stats': stats
     })
 
+@app.route('/api/session_stats', methods=['GET'])
+def session_stats():
+    """
+    获取会话状态后端的命中、未命中与淘汰统计
+    """
+    return jsonify({'status': 'success', 'sessions': state_backend.stats()})
+
+@app.route('/api/config_stats', methods=['GET'])
+def config_stats():
+    """
+    获取配置热重载的次数与耗时统计
+    """
+    return jsonify({'status': 'success', 'configs': config_managers.stats()})
+
+@app.route('/api/save_stats', methods=['GET'])
+def save_stats():
+    """
+    获取存档写入的批量大小与耗时分位数，以及战斗事件输出统计
+    """
+    return jsonify({
+        'status': 'success',
+        'saves': save_writer.stats(),
+        'battle_events': battle_event_sink.stats()
+    })
+
 @app.route('/api/get_current_scene', methods=['GET'])
 def get_current_scene():
     # 获取当前会话的游戏管理器
     game_manager = get_game_manager()
     
     # 获取配置管理器
-    config_manager = game_manager.config_manager
+    config_manager = get_config_manager()  # 使用会话特定的配置管理器
     
     # 获取当前章节
     current_chapter_id = game_manager.current_chapter
@@ -1059,7 +1465,7 @@ def get_current_scene():
     # 构造场景信息
     scene_info = {
         'location': chapter.get('title', f'第{current_chapter_id}章'),
-        'description': chapter.get('description', '你在一个神秘的地方。'),
+        'description': str(chapter.get('description', '你在一个神秘的地方。')),
         'actions': [
             {'id': 'view-status', 'text': '查看角色状态'},
             {'id': 'view-quests', 'text': '查看任务列表'},
@@ -1070,7 +1476,8 @@ def get_current_scene():
     # 添加特定章节的操作
     if current_chapter_id == 1:
         scene_info['actions'].insert(0, {'id': 'enter-forest', 'text': '移动到黑暗森林'})
-        scene_info['actions'].insert(1, {'id': 'talk-to-elder', 'text': '与村长交谈'})
+        scene_info['actions'].insert(1, {'id': 'auto-battle', 'text': '在森林中自动战斗'})
+        scene_info['actions'].insert(2, {'id': 'talk-to-elder', 'text': '与村长交谈'})
     
     return jsonify(scene_info)
 
@@ -1093,12 +1500,7 @@ def talk_to_npc():
         return jsonify({'status': 'error', 'message': '无法获取章节信息'})
     
     # 查找NPC
-    npcs = chapter.get('npcs', [])
-    target_npc = None
-    for npc in npcs:
-        if npc.get('id') == npc_id:
-            target_npc = npc
-            break
+    target_npc = config_manager.get_npc(current_chapter_id, npc_id)
     
     if not target_npc:
         return jsonify({'status': 'error', 'message': '无法找到该NPC'})
@@ -1107,7 +1509,7 @@ def talk_to_npc():
     return jsonify({
         'status': 'success',
         'npc_name': target_npc.get('name', '未知NPC'),
-        'dialogue': target_npc.get('dialogue', '...'),
+        'dialogue': str(target_npc.get('dialogue', '...')),
         'quests': target_npc.get('quests_available', [])
     })
 
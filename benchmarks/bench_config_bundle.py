@@ -0,0 +1,123 @@
+"""
+配置包冷启动基准测试：对不同规模的合成剧情，比较ConfigCache首次加载一个配置目录并加载
+全部配置段的耗时，分别在没有配置包（读取并解析JSON）和有配置包时测量
+
+每次测量都使用新的ConfigCache，相当于进程启动后第一次访问该故事；文件内容已在操作系统
+的页缓存中，测得的是读取、哈希与解析的开销，不含磁盘读取。有配置包时ConfigCache只检查
+文件签名并读取配置包头，不再读取和哈希JSON源文件。
+
+在项目根目录下运行：
+    python benchmarks/bench_config_bundle.py --chapters 100 1000 10000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.config_cache import ConfigCache  # noqa: E402
+from src.story_bundle import build_bundle, bundle_path  # noqa: E402
+
+
+def make_story(chapters, quests_per_chapter=3, npcs_per_chapter=3):
+    """
+    生成合成剧情，文本长度与默认故事相近
+
+    Args:
+        chapters (int): 章节数
+        quests_per_chapter (int): 每章任务数
+        npcs_per_chapter (int): 每章NPC数
+
+    Returns:
+        dict: 与story.json结构相同的剧情数据
+    """
+    return {
+        "chapters": [
+            {
+                "id": chapter_id,
+                "title": f"第{chapter_id}章",
+                "description": f"第{chapter_id}章：你的家乡正受到哥布林的袭击，需要保护村民并击退入侵者。",
+                "quests": [
+                    {
+                        "id": f"q{chapter_id}_{i}",
+                        "name": f"任务{chapter_id}-{i}",
+                        "description": "击败5只哥布林",
+                        "objective": {"type": "defeat_enemies", "enemy": "goblin", "count": 5},
+                        "reward": {"exp": 50, "gold": 20, "items": ["health_potion"]}
+                    }
+                    for i in range(quests_per_chapter)
+                ],
+                "npcs": [
+                    {
+                        "id": f"npc{chapter_id}_{i}",
+                        "name": f"NPC{chapter_id}-{i}",
+                        "dialogue": "年轻人，村庄需要你的帮助！哥布林正在袭击我们的家园，请你保护村民！",
+                        "quests_available": [f"q{chapter_id}_{i}"]
+                    }
+                    for i in range(npcs_per_chapter)
+                ]
+            }
+            for chapter_id in range(1, chapters + 1)
+        ]
+    }
+
+
+def make_config_dir(base_dir, chapters):
+    """
+    复制默认故事的配置，把story.json替换为合成剧情
+
+    Returns:
+        str: 配置目录路径
+    """
+    config_dir = os.path.join(base_dir, f"chapters{chapters}")
+    shutil.copytree(os.path.join(ROOT, "story-list", "default", "config"), config_dir)
+    with open(os.path.join(config_dir, "story.json"), "w", encoding="utf-8") as f:
+        json.dump(make_story(chapters), f, ensure_ascii=False, indent=2)
+    return config_dir
+
+
+def cold_start(config_dir, repeat):
+    """
+    Returns:
+        float: 最快一次的耗时（毫秒）
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cache = ConfigCache(background=False, prefetch=False)
+        cache.get(config_dir).load_all_configs()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_config_bundle.py")
+    parser.add_argument("--chapters", type=int, nargs="+", default=[100, 1000, 10000], help="合成剧情的章节数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复测量次数，取最快的一次")
+    args = parser.parse_args(argv)
+
+    base_dir = tempfile.mkdtemp(prefix="bench-config-bundle-")
+    try:
+        print(f"{'章节数':>8}{'JSON(MB)':>10}{'JSON(ms)':>12}{'配置包(ms)':>12}{'加速':>8}")
+        for chapters in args.chapters:
+            config_dir = make_config_dir(base_dir, chapters)
+            json_mb = os.path.getsize(os.path.join(config_dir, "story.json")) / 1024 / 1024
+            json_ms = cold_start(config_dir, args.repeat)
+            build_bundle(config_dir)
+            bundle_ms = cold_start(config_dir, args.repeat)
+            os.remove(bundle_path(config_dir))
+            print(f"{chapters:>8}{json_mb:>10.1f}{json_ms:>12.1f}{bundle_ms:>12.1f}{json_ms / bundle_ms:>7.1f}x")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,99 @@
+"""
+玩家内存基准测试：创建大量Player对象，比较使用__slots__前后tracemalloc记录的内存峰值
+
+"使用前"的类由当前的src/character.py去掉所有__slots__声明后重新执行得到，方法和初始化
+逻辑完全相同，对象的属性改为保存在__dict__中，与加入__slots__之前的实现一致。
+
+在项目根目录下运行：
+    python benchmarks/bench_player_memory.py --players 100000
+"""
+
+import argparse
+import ast
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src import character  # noqa: E402
+from src.config_manager import ConfigManager  # noqa: E402
+
+
+def load_character_without_slots():
+    """
+    重新执行character模块的源码，去掉其中所有类的__slots__声明
+
+    Returns:
+        module: 与src.character接口相同、对象带有__dict__的模块
+    """
+    with open(character.__file__, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), character.__file__)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            node.body = [
+                statement for statement in node.body
+                if not (isinstance(statement, ast.Assign)
+                        and any(isinstance(target, ast.Name) and target.id == "__slots__"
+                                for target in statement.targets))
+            ]
+    module = types.ModuleType("character_without_slots")
+    module.__file__ = character.__file__
+    module.__package__ = "src"
+    exec(compile(tree, character.__file__, "exec"), module.__dict__)
+    return module
+
+
+def measure(player_class, char_class, count):
+    """
+    创建count个玩家并全部保留，测量内存峰值与创建耗时
+
+    Returns:
+        tuple: (内存峰值字节数, 创建耗时秒数)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    players = [player_class(f"玩家{i}", char_class) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del players
+    return peak, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_player_memory.py")
+    parser.add_argument("--players", type=int, default=100000, help="创建的玩家数量")
+    parser.add_argument("--class-name", default="warrior", help="玩家职业")
+    args = parser.parse_args(argv)
+
+    config_manager = ConfigManager(os.path.join(ROOT, "config"), use_bundle=False, use_string_table=False)
+    char_class = config_manager.get_class(args.class_name)
+    without_slots = load_character_without_slots()
+
+    sample = without_slots.Player("样本", char_class)
+    if not hasattr(sample, "__dict__") or hasattr(character.Player("样本", char_class), "__dict__"):
+        raise AssertionError("去掉__slots__后的Player应当带有__dict__，当前的Player不应当带有")
+    if {name: getattr(sample, name) for name in vars(sample)} != {
+        name: getattr(character.Player("样本", char_class), name) for name in vars(sample)
+    }:
+        raise AssertionError("两种Player初始化后的属性不一致")
+
+    print(f"创建 {args.players} 个 {args.class_name} 玩家并全部保留")
+    print(f"{'实现':<14}{'内存峰值(MB)':>14}{'每个对象(B)':>14}{'创建耗时(s)':>14}")
+    results = []
+    for name, player_class in (("__dict__", without_slots.Player), ("__slots__", character.Player)):
+        peak, elapsed = measure(player_class, char_class, args.players)
+        results.append(peak)
+        print(f"{name:<14}{peak / 1024 / 1024:>14.1f}{peak / args.players:>14.0f}{elapsed:>14.3f}")
+    print(f"__slots__ 使内存峰值减少 {(1 - results[1] / results[0]) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
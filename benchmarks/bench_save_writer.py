@@ -0,0 +1,134 @@
+"""
+存档写入器基准测试：大量线程同时调用SaveWriter.write_json，统计吞吐量、批量大小与耗时分位数
+
+每个线程写入自己的存档文件，所有线程通过屏障同时开始。--dirs 指定这些文件分布在多少个
+目录中，默认每个线程一个目录（与每个存档槽位一个目录相同），目录越少，一次目录fsync能
+覆盖的写入越多。加上 --baseline 时再用同样的负载测量不分组提交的写法（每次写入各自fsync
+临时文件和目录），用于对比组提交的效果。
+
+在项目根目录下运行：
+    python benchmarks/bench_save_writer.py --threads 1000 --writes 5 --baseline
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.save_writer import SaveWriter  # noqa: E402
+
+
+def write_json_ungrouped(path, data):
+    """
+    不分组提交的写入：写临时文件、fsync、替换后fsync目录，与组提交前每次写入的刷盘次数相同
+    """
+    save_dir = os.path.dirname(path)
+    os.makedirs(save_dir, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fd = os.open(save_dir, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def make_save(thread_index, write_index, payload_size):
+    # 与真实存档大小相近的数据
+    return {
+        "version": 2,
+        "player": {"name": f"玩家{thread_index}", "level": write_index, "items": ["health_potion"] * 5},
+        "padding": "x" * payload_size
+    }
+
+
+def run(write, threads, writes, base_dir, payload_size, dirs):
+    """
+    启动threads个线程，每个线程调用write写入writes次
+
+    Returns:
+        tuple: (总耗时秒数, 每次写入的耗时列表)
+    """
+    barrier = threading.Barrier(threads + 1)
+    latencies = [[] for _ in range(threads)]
+    errors = []
+
+    def worker(index):
+        path = os.path.join(base_dir, f"dir{index % dirs}", f"save{index}.json")
+        barrier.wait()
+        try:
+            for j in range(writes):
+                start = time.perf_counter()
+                write(path, make_save(index, j, payload_size))
+                latencies[index].append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise errors[0]
+    return elapsed, sorted(latency for thread_latencies in latencies for latency in thread_latencies)
+
+
+def percentile(values, q):
+    return values[int(q * (len(values) - 1))] if values else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_save_writer.py")
+    parser.add_argument("--threads", type=int, default=1000, help="并发写入的线程数")
+    parser.add_argument("--writes", type=int, default=5, help="每个线程的写入次数")
+    parser.add_argument("--dirs", type=int, help="存档文件分布的目录数，默认与线程数相同")
+    parser.add_argument("--payload", type=int, default=2000, help="每个存档的填充字节数")
+    parser.add_argument("--dir", help="存档目录所在位置，默认使用系统临时目录，应与实际存档在同一种文件系统上")
+    parser.add_argument("--no-durable", action="store_true", help="不调用fsync")
+    parser.add_argument("--baseline", action="store_true", help="同时测量不分组提交的写法")
+    args = parser.parse_args(argv)
+
+    total = args.threads * args.writes
+    dirs = args.dirs or args.threads
+    base_dir = tempfile.mkdtemp(prefix="bench-save-writer-", dir=args.dir)
+    try:
+        writer = SaveWriter(durable=not args.no_durable, latency_window=total)
+        elapsed, _ = run(writer.write_json, args.threads, args.writes,
+                         os.path.join(base_dir, "grouped"), args.payload, dirs)
+        stats = writer.stats()
+        print(f"SaveWriter: {args.threads}个线程 x {args.writes}次写入，{dirs}个目录，durable={writer.durable}")
+        print(f"  吞吐量    {total / elapsed:.0f} 次/秒（用时 {elapsed:.2f} 秒）")
+        print(f"  批次      {stats['batches']}，平均每批 {stats['avg_batch']:.1f}，最大 {stats['max_batch']}")
+        print(f"  耗时      p50 {stats['p50_ms']:.1f} ms，p90 {stats['p90_ms']:.1f} ms，"
+              f"p99 {stats['p99_ms']:.1f} ms，max {stats['max_ms']:.1f} ms")
+        print(f"  stats()   {stats}")
+
+        if args.baseline:
+            elapsed, latencies = run(write_json_ungrouped, args.threads, args.writes,
+                                     os.path.join(base_dir, "ungrouped"), args.payload, dirs)
+            print("不分组提交（每次写入各自fsync）:")
+            print(f"  吞吐量    {total / elapsed:.0f} 次/秒（用时 {elapsed:.2f} 秒）")
+            print(f"  耗时      p50 {percentile(latencies, 0.5) * 1000:.1f} ms，"
+                  f"p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,147 @@
+"""
+剧情索引基准测试：生成一个包含大量章节的合成剧情，比较按ID线性查找与索引查找的耗时
+
+线性查找与建立索引之前的ConfigManager实现相同，ID重复时以先出现的为准。
+
+在项目根目录下运行：
+    python benchmarks/bench_story_index.py --chapters 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.config_manager import ConfigManager  # noqa: E402
+
+
+def make_story(chapters, quests_per_chapter=3, npcs_per_chapter=3):
+    """
+    生成合成剧情
+
+    Args:
+        chapters (int): 章节数
+        quests_per_chapter (int): 每章任务数
+        npcs_per_chapter (int): 每章NPC数
+
+    Returns:
+        dict: 与story.json结构相同的剧情数据
+    """
+    return {
+        "chapters": [
+            {
+                "id": chapter_id,
+                "title": f"第{chapter_id}章",
+                "description": f"第{chapter_id}章的描述",
+                "quests": [
+                    {
+                        "id": f"q{chapter_id}_{i}",
+                        "name": f"任务{chapter_id}-{i}",
+                        "objective": {"type": "defeat_enemies", "enemy": "goblin", "count": 1}
+                    }
+                    for i in range(quests_per_chapter)
+                ],
+                "npcs": [
+                    {"id": f"npc{chapter_id}_{i}", "name": f"NPC{chapter_id}-{i}", "dialogue": "你好"}
+                    for i in range(npcs_per_chapter)
+                ]
+            }
+            for chapter_id in range(1, chapters + 1)
+        ]
+    }
+
+
+def linear_get_chapter(story, chapter_id):
+    for chapter in story.get("chapters", []):
+        if chapter.get("id") == chapter_id:
+            return chapter
+    return {}
+
+
+def linear_get_quest(story, chapter_id, quest_id):
+    chapter = linear_get_chapter(story, chapter_id)
+    for quest in chapter.get("quests", []):
+        if quest.get("id") == quest_id:
+            return quest
+    return {}
+
+
+def linear_get_quest_by_id(story, quest_id):
+    for chapter in story.get("chapters", []):
+        for quest in chapter.get("quests", []):
+            if quest.get("id") == quest_id:
+                return quest
+    return {}
+
+
+def linear_get_npc(story, chapter_id, npc_id):
+    chapter = linear_get_chapter(story, chapter_id)
+    for npc in chapter.get("npcs", []):
+        if npc.get("id") == npc_id:
+            return npc
+    return {}
+
+
+def time_per_call(func, args_list, repeat):
+    """
+    测量每次调用的平均耗时
+
+    Returns:
+        float: 平均耗时（微秒），取repeat轮中最快的一轮
+    """
+    def run():
+        for args in args_list:
+            func(*args)
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    return best / len(args_list) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_story_index.py")
+    parser.add_argument("--chapters", type=int, default=10000, help="合成剧情的章节数")
+    parser.add_argument("--lookups", type=int, default=200, help="每种查找的随机查询次数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复测量次数，取最快的一次")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    story = make_story(args.chapters)
+    config_manager = ConfigManager(use_bundle=False, use_string_table=False)
+    config_manager.story = story
+    start = time.perf_counter()
+    config_manager.build_story_indexes()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    rng = random.Random(args.seed)
+    chapter_ids = [rng.randint(1, args.chapters) for _ in range(args.lookups)]
+    chapter_args = [(chapter_id,) for chapter_id in chapter_ids]
+    quest_args = [(chapter_id, f"q{chapter_id}_2") for chapter_id in chapter_ids]
+    quest_id_args = [(f"q{chapter_id}_2",) for chapter_id in chapter_ids]
+    npc_args = [(chapter_id, f"npc{chapter_id}_2") for chapter_id in chapter_ids]
+
+    cases = [
+        ("get_chapter", linear_get_chapter, config_manager.get_chapter, chapter_args),
+        ("get_quest", linear_get_quest, config_manager.get_quest, quest_args),
+        ("get_quest_by_id", linear_get_quest_by_id, config_manager.get_quest_by_id, quest_id_args),
+        ("get_npc", linear_get_npc, config_manager.get_npc, npc_args),
+    ]
+
+    print(f"{args.chapters}个章节，建立索引用时 {build_ms:.1f} 毫秒，每种查找随机查询 {args.lookups} 次")
+    print(f"{'查找':<18}{'线性查找(us)':>14}{'索引(us)':>12}{'加速':>10}")
+    for name, linear, indexed, args_list in cases:
+        # 两种实现的结果必须一致
+        for lookup_args in args_list:
+            if linear(story, *lookup_args) is not indexed(*lookup_args):
+                raise AssertionError(f"{name}{lookup_args} 的结果不一致")
+        linear_us = time_per_call(lambda *a: linear(story, *a), args_list, args.repeat)
+        indexed_us = time_per_call(indexed, args_list, args.repeat)
+        print(f"{name:<18}{linear_us:>14.2f}{indexed_us:>12.3f}{linear_us / indexed_us:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,149 @@
+"""
+回合调度基准测试：比较TurnScheduler的最小堆与每次遍历所有参战者找最早行动者的耗时，
+并测量PartyBattle在不同队伍规模下每次行动的耗时
+
+遍历实现与TurnScheduler使用相同的 [行动时间, 排入序号, 参战者] 条目和相同的平局规则，
+测量前先确认两者给出的行动顺序完全一致。
+
+在项目根目录下运行：
+    python benchmarks/bench_turn_scheduler.py --turns 2000
+"""
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.character import Player  # noqa: E402
+from src.config_manager import ConfigManager  # noqa: E402
+from src.party_battle import PartyBattle  # noqa: E402
+from src.turn_scheduler import TURN_GAUGE, TurnScheduler  # noqa: E402
+
+
+class Combatant:
+    """
+    只有调度需要的属性的参战者
+    """
+    __slots__ = ("name", "agi")
+
+    def __init__(self, name, agi):
+        self.name = name
+        self.agi = agi
+
+
+class RescanScheduler:
+    """
+    每次取出行动者都遍历全部参战者的调度器，O(n)
+    """
+    def __init__(self, gauge=TURN_GAUGE):
+        self.gauge = gauge
+        self.time = 0
+        self._entries = []
+        self._counter = itertools.count()
+
+    def add(self, combatant):
+        self._entries.append([self.time + self.gauge // max(1, combatant.agi), next(self._counter), combatant])
+
+    def next(self):
+        if not self._entries:
+            return None
+        entry = min(self._entries)
+        self.time = entry[0]
+        entry[0] += self.gauge // max(1, entry[2].agi)
+        entry[1] = next(self._counter)
+        return entry[2]
+
+
+def make_scheduler(scheduler_class, combatants):
+    scheduler = scheduler_class()
+    for combatant in combatants:
+        scheduler.add(combatant)
+    return scheduler
+
+
+def time_scheduler(scheduler_class, combatants, turns):
+    """
+    Returns:
+        float: 每次取出行动者的平均耗时（微秒）
+    """
+    scheduler = make_scheduler(scheduler_class, combatants)
+    start = time.perf_counter()
+    for _ in range(turns):
+        scheduler.next()
+    return (time.perf_counter() - start) / turns * 1e6
+
+
+def bench_scheduler(sizes, turns, rng):
+    print(f"TurnScheduler：每种规模取出 {turns} 次行动者")
+    print(f"{'参战者':>8}{'遍历(us)':>12}{'最小堆(us)':>12}{'加速':>10}")
+    for size in sizes:
+        combatants = [Combatant(f"c{i}", rng.randint(1, 30)) for i in range(size)]
+        heap = make_scheduler(TurnScheduler, combatants)
+        rescan = make_scheduler(RescanScheduler, combatants)
+        for _ in range(min(turns, 1000)):
+            if heap.next() is not rescan.next():
+                raise AssertionError(f"{size}个参战者时两种调度器的行动顺序不一致")
+        rescan_us = time_scheduler(RescanScheduler, combatants, turns)
+        heap_us = time_scheduler(TurnScheduler, combatants, turns)
+        print(f"{size:>8}{rescan_us:>12.2f}{heap_us:>12.2f}{rescan_us / heap_us:>9.1f}x")
+
+
+def bench_party_battle(config_manager, sizes, turns, class_name, enemy_name, seed):
+    """
+    每种规模反复进行战斗直到累计turns次行动，只计行动耗时，不计创建参战者的时间
+    """
+    char_class = config_manager.get_class(class_name)
+    print(f"PartyBattle：{class_name} 对 {enemy_name}，每种规模累计 {turns} 次行动")
+    print(f"{'规模':>12}{'战斗场数':>10}{'每次行动(us)':>14}")
+    rng = random.Random(seed)
+    for party_size, enemy_count in sizes:
+        actions = 0
+        battles = 0
+        elapsed = 0.0
+        while actions < turns:
+            players = [Player(f"玩家{i + 1}", char_class) for i in range(party_size)]
+            enemies = [config_manager.spawn_enemy(enemy_name) for _ in range(enemy_count)]
+            battle = PartyBattle(players, enemies, config_manager, rng=rng)
+            battle.start_battle()
+            start = time.perf_counter()
+            done = battle.run(max_turns=turns - actions)
+            elapsed += time.perf_counter() - start
+            actions += done
+            battles += 1
+            if done == 0:
+                break
+        label = f"{party_size}v{enemy_count}"
+        print(f"{label:>12}{battles:>10}{elapsed / max(1, actions) * 1e6:>14.1f}")
+
+
+def parse_matchup(text):
+    party_size, enemy_count = text.lower().split("v")
+    return int(party_size), int(enemy_count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/bench_turn_scheduler.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 100, 1000, 10000], help="调度器的参战者数量")
+    parser.add_argument("--matchups", type=parse_matchup, nargs="+",
+                        default=[(1, 2), (10, 20), (100, 200), (500, 1000)],
+                        help="多人战斗的规模，格式为 玩家数v敌人数")
+    parser.add_argument("--turns", type=int, default=2000, help="每种规模测量的行动次数")
+    parser.add_argument("--class-name", default="warrior", help="玩家职业")
+    parser.add_argument("--enemy", default="goblin", help="敌人名称")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    bench_scheduler(args.sizes, args.turns, random.Random(args.seed))
+    print()
+    config_manager = ConfigManager(os.path.join(ROOT, "config"), use_bundle=False, use_string_table=False)
+    bench_party_battle(config_manager, args.matchups, args.turns, args.class_name, args.enemy, args.seed)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,11 +1,17 @@
 import random
+import uuid
 from .character import Player, Enemy
+from .battle_log import BattleLog
+from .battle_events import INFO
+from .damage import roll_damage
+from .save_codec import encode_player
 
 class Battle:
     """
     战斗系统类，处理玩家与敌人之间的战斗逻辑
     """
-    def __init__(self, player, enemy, config_manager, difficulty="normal"):
+    def __init__(self, player, enemy, config_manager, difficulty="normal", event_sink=None, rng=None,
+                 seed=None):
         """
         初始化战斗系统
         
@@ -14,12 +20,28 @@ class Battle:
             enemy (Enemy): 敌人角色
             config_manager (ConfigManager): 配置管理器
             difficulty (str): 游戏难度
+            event_sink (EventSink): 战斗事件输出端，None表示不输出
+            rng (random.Random): 外部随机数生成器，例如模拟器中多场战斗共用的生成器。
+                传入时战斗不能重放
+            seed (int): 战斗随机数种子，不传入rng时使用，None表示随机生成
         """
         self.player = player
         self.enemy = enemy
         self.config_manager = config_manager
         self.difficulty = difficulty
-        self.battle_log = []
+        self.battle_id = uuid.uuid4().hex
+        self.battle_log = BattleLog()
+        self.event_sink = event_sink
+        if rng is None:
+            # 每场战斗使用独立的随机数序列，记录种子、开始时的玩家状态和玩家行动即可重放
+            self.seed = seed if seed is not None else random.getrandbits(53)
+            self.rng = random.Random(self.seed)
+            self.initial_player = encode_player(player)
+        else:
+            self.seed = None
+            self.rng = rng
+            self.initial_player = None
+        self.actions = []  # 玩家行动 (行动, 技能名称[, 道具名称])
         self.is_active = True
         self.player_buffs = {}  # 玩家增益效果
         self.enemy_buffs = {}    # 敌人增益效果
@@ -27,17 +49,44 @@ class Battle:
         # 根据难度调整敌人属性
         self.apply_difficulty_modifiers()
         
+    def __getstate__(self):
+        """
+        序列化战斗状态，配置管理器和事件输出端不随战斗保存，恢复后由调用方重新绑定
+        """
+        state = self.__dict__.copy()
+        state["config_manager"] = None
+        state["event_sink"] = None
+        if state["rng"] is random:
+            # 模块不能序列化，恢复后重新使用全局生成器
+            state["rng"] = None
+        return state
+        
+    def __setstate__(self, state):
+        """
+        恢复战斗状态，旧版本保存的列表形式日志转换为BattleLog
+        """
+        if isinstance(state.get("battle_log"), list):
+            state["battle_log"] = BattleLog(messages=state["battle_log"])
+        state.setdefault("battle_id", uuid.uuid4().hex)
+        state.setdefault("event_sink", None)
+        state.setdefault("seed", None)
+        state.setdefault("initial_player", None)
+        state.setdefault("actions", [])
+        if state.get("rng") is None:
+            state["rng"] = random
+        self.__dict__.update(state)
+        
     def apply_difficulty_modifiers(self):
         """
         根据难度调整敌人属性
         """
+        # 从原型池取得的敌人已按难度调整过
+        if self.enemy.scaled_for is not None:
+            return
         difficulty_config = self.config_manager.get_difficulty(self.difficulty)
         if difficulty_config:
             multiplier = difficulty_config.get("enemy_strength_multiplier", 1.0)
-            self.enemy.hp = int(self.enemy.hp * multiplier)
-            self.enemy.max_hp = self.enemy.hp
-            self.enemy.atk = int(self.enemy.atk * multiplier)
-            self.enemy.defense = int(self.enemy.defense * multiplier)
+            self.enemy.apply_strength_multiplier(multiplier, self.difficulty)
             
     def start_battle(self):
         """
@@ -59,23 +108,26 @@ class Battle:
             "is_active": self.is_active,
             "player_alive": self.player.is_alive(),
             "enemy_alive": self.enemy.is_alive(),
-            "log": self.battle_log
+            "log": list(self.battle_log)
         }
         
-    def player_action(self, action, skill_name=None):
+    def player_action(self, action, skill_name=None, item_name=None):
         """
         处理玩家行动
         
         Args:
             action (str): 行动类型 (attack, skill, item, defend, escape)
             skill_name (str): 技能名称（如果使用技能）
+            item_name (str): 道具名称（如果使用道具），None表示使用第一个道具
         """
+        # 大多数行动不使用道具，记录中省略道具名称
+        self.actions.append((action, skill_name) if item_name is None else (action, skill_name, item_name))
         if action == "attack":
             self.player_attack()
         elif action == "skill" and skill_name:
             self.player_use_skill(skill_name)
         elif action == "item":
-            self.player_use_item()
+            self.player_use_item(item_name)
         elif action == "defend":
             self.player_defend()
         elif action == "escape":
@@ -93,16 +145,9 @@ class Battle:
         """
         玩家普通攻击
         """
-        # 计算暴击
-        is_critical = random.randint(1, 100) <= 10  # 10%暴击率
-        
-        # 计算伤害
-        damage = max(1, self.player.atk - self.enemy.defense // 2)
-        damage = random.randint(int(damage * 0.8), int(damage * 1.2))  # 添加随机性
-        
-        # 暴击伤害翻倍
+        # 计算伤害，10%暴击率
+        damage, is_critical = roll_damage(self.rng, self.player.atk, self.enemy.defense, 10)
         if is_critical:
-            damage *= 2
             self.add_to_log("暴击!")
             
         # 造成伤害
@@ -116,45 +161,34 @@ class Battle:
         Args:
             skill_name (str): 技能名称
         """
-        skill = self.config_manager.get_skill(skill_name)
+        skill = self.config_manager.get_skill_record(skill_name)
         if not skill:
             self.add_to_log(f"未知技能: {skill_name}")
             return
             
         # 检查魔法值是否足够
-        mp_cost = skill.get("mp_cost", 0)
-        if not self.player.use_mp(mp_cost):
+        if not self.player.use_mp(skill.mp_cost):
             self.add_to_log("魔法值不足!")
             return
             
-        skill_type = skill.get("type", "physical")
-        power = skill.get("power", 0)
+        skill_type = skill.type
+        power = skill.power
         
-        self.add_to_log(f"你使用了{skill.get('name', skill_name)}!")
+        self.add_to_log(f"你使用了{skill.name}!")
         
         if skill_type == "physical":
-            # 物理技能
-            is_critical = random.randint(1, 100) <= 15  # 15%暴击率
-            damage = max(1, (self.player.atk + power) - self.enemy.defense // 2)
-            damage = random.randint(int(damage * 0.8), int(damage * 1.2))
-            
-            # 暴击伤害翻倍
+            # 物理技能，15%暴击率
+            damage, is_critical = roll_damage(self.rng, self.player.atk + power, self.enemy.defense, 15)
             if is_critical:
-                damage *= 2
                 self.add_to_log("暴击!")
                 
             actual_damage = self.enemy.take_damage(damage)
             self.add_to_log(f"对{self.enemy.name}造成了{actual_damage}点伤害!")
             
         elif skill_type == "magical":
-            # 魔法技能
-            is_critical = random.randint(1, 100) <= 15  # 15%暴击率
-            damage = max(1, (self.player.matk + power) - self.enemy.mdef // 2)
-            damage = random.randint(int(damage * 0.8), int(damage * 1.2))
-            
-            # 暴击伤害翻倍
+            # 魔法技能，15%暴击率
+            damage, is_critical = roll_damage(self.rng, self.player.matk + power, self.enemy.mdef, 15)
             if is_critical:
-                damage *= 2
                 self.add_to_log("暴击!")
                 
             actual_damage = self.enemy.take_damage(damage)
@@ -163,36 +197,41 @@ class Battle:
         elif skill_type == "support":
             # 辅助技能
             if skill_name == "heal":
-                heal_amount = skill.get("power", 0)
-                actual_heal = self.player.heal(heal_amount)
+                actual_heal = self.player.heal(power)
                 self.add_to_log(f"你恢复了{actual_heal}点生命值!")
                 
         elif skill_type == "buff":
             # 增益技能
-            self.add_to_log(f"你获得了{skill.get('name', skill_name)}的效果!")
+            self.add_to_log(f"你获得了{skill.name}的效果!")
             # 这里可以添加增益效果的实现
             
-    def player_use_item(self):
+    def player_use_item(self, item_name=None):
         """
         玩家使用道具
+        
+        Args:
+            item_name (str): 道具名称，None表示使用第一个道具
         """
         # 检查玩家是否有道具
         if not self.player.items:
             self.add_to_log("你没有任何道具!")
             return
             
-        # 这里应该有一个界面让用户选择道具
-        # 简单实现：使用第一个道具
-        item_name = self.player.items[0]
-        item = self.config_manager.get_item(item_name)
+        if item_name is None:
+            item_name = self.player.items[0]
+        elif item_name not in self.player.items:
+            self.add_to_log(f"你没有{item_name}!")
+            return
+        item = self.config_manager.get_item_record(item_name)
+        display_name = item.name if item else item_name
         
         if self.player.use_item(item_name, self.config_manager):
             # 从背包中移除已使用的道具
-            if item.get("type") == "consumable":
+            if item.type == "consumable":
                 self.player.items.remove(item_name)
-            self.add_to_log(f"你使用了{item.get('name', item_name)}!")
+            self.add_to_log(f"你使用了{display_name}!")
         else:
-            self.add_to_log(f"无法使用{item.get('name', item_name)}!")
+            self.add_to_log(f"无法使用{display_name}!")
             
     def player_defend(self):
         """
@@ -216,7 +255,7 @@ class Battle:
             elif self.difficulty == "hard":
                 escape_chance = 50
                 
-        if random.randint(1, 100) <= escape_chance:
+        if self.rng.randint(1, 100) <= escape_chance:
             self.add_to_log("你成功逃跑了!")
             self.is_active = False
         else:
@@ -228,9 +267,9 @@ class Battle:
         """
         # 简单的AI，随机选择技能或普通攻击
         available_skills = self.enemy.skills
-        if available_skills and random.randint(1, 100) <= 30:  # 30%概率使用技能
+        if available_skills and self.rng.randint(1, 100) <= 30:  # 30%概率使用技能
             # 随机选择一个技能
-            skill_name = random.choice(available_skills)
+            skill_name = self.rng.choice(available_skills)
             self.enemy_use_skill(skill_name)
         else:
             # 普通攻击
@@ -240,16 +279,9 @@ class Battle:
         """
         敌人普通攻击
         """
-        # 计算暴击
-        is_critical = random.randint(1, 100) <= 5  # 敌人5%暴击率
-        
-        # 计算伤害
-        damage = max(1, self.enemy.atk - self.player.defense // 2)
-        damage = random.randint(int(damage * 0.8), int(damage * 1.2))  # 添加随机性
-        
-        # 暴击伤害翻倍
+        # 计算伤害，敌人5%暴击率
+        damage, is_critical = roll_damage(self.rng, self.enemy.atk, self.player.defense, 5)
         if is_critical:
-            damage *= 2
             self.add_to_log(f"{self.enemy.name}的攻击暴击了!")
             
         # 造成伤害
@@ -263,40 +295,30 @@ class Battle:
         Args:
             skill_name (str): 技能名称
         """
-        skill = self.config_manager.get_skill(skill_name)
+        skill = self.config_manager.get_skill_record(skill_name)
         if not skill:
             # 如果技能不存在，则执行普通攻击
             self.enemy_attack()
             return
             
-        skill_type = skill.get("type", "physical")
-        power = skill.get("power", 0)
+        skill_type = skill.type
+        power = skill.power
         
-        self.add_to_log(f"{self.enemy.name}使用了{skill.get('name', skill_name)}!")
+        self.add_to_log(f"{self.enemy.name}使用了{skill.name}!")
         
         if skill_type == "physical":
-            # 物理技能
-            is_critical = random.randint(1, 100) <= 10  # 10%暴击率
-            damage = max(1, (self.enemy.atk + power) - self.player.defense // 2)
-            damage = random.randint(int(damage * 0.8), int(damage * 1.2))
-            
-            # 暴击伤害翻倍
+            # 物理技能，10%暴击率
+            damage, is_critical = roll_damage(self.rng, self.enemy.atk + power, self.player.defense, 10)
             if is_critical:
-                damage *= 2
                 self.add_to_log(f"{self.enemy.name}的技能暴击了!")
                 
             actual_damage = self.player.take_damage(damage)
             self.add_to_log(f"对你造成了{actual_damage}点伤害!")
             
         elif skill_type == "magical":
-            # 魔法技能
-            is_critical = random.randint(1, 100) <= 10  # 10%暴击率
-            damage = max(1, (self.enemy.matk + power) - self.player.mdef // 2)
-            damage = random.randint(int(damage * 0.8), int(damage * 1.2))
-            
-            # 暴击伤害翻倍
+            # 魔法技能，10%暴击率
+            damage, is_critical = roll_damage(self.rng, self.enemy.matk + power, self.player.mdef, 10)
             if is_critical:
-                damage *= 2
                 self.add_to_log(f"{self.enemy.name}的技能暴击了!")
                 
             actual_damage = self.player.take_damage(damage)
@@ -305,19 +327,20 @@ class Battle:
         elif skill_type == "support":
             # 辅助技能
             if skill_name == "heal":
-                heal_amount = skill.get("power", 0)
-                actual_heal = self.enemy.heal(heal_amount)
+                actual_heal = self.enemy.heal(power)
                 self.add_to_log(f"{self.enemy.name}恢复了{actual_heal}点生命值!")
                 
-    def add_to_log(self, message):
+    def add_to_log(self, message, level=INFO):
         """
         添加战斗日志
         
         Args:
             message (str): 日志消息
+            level (int): 事件级别
         """
         self.battle_log.append(message)
-        print(f"> {message}")  # 同时打印到控制台
+        if self.event_sink is not None:
+            self.event_sink.emit(level, self.battle_id, message)
         
     def end_battle(self):
         """
@@ -336,5 +359,5 @@ class Battle:
             # 添加掉落物品
             for item_name in self.enemy.drop_items:
                 self.player.items.append(item_name)
-                item = self.config_manager.get_item(item_name)
-                self.add_to_log(f"获得了{item.get('name', item_name)}!")
\ No newline at end of file
+                item = self.config_manager.get_item_record(item_name)
+                self.add_to_log(f"获得了{item.name if item else item_name}!")
\ No newline at end of file
@@ -0,0 +1,296 @@
+"""
+战斗事件输出：战斗日志除了保存在BattleLog中，还会作为结构化事件交给事件输出端
+
+输出端按级别过滤事件，可选：
+    null     丢弃所有事件
+    memory   保存在内存中最近的若干条事件
+    file     放入队列，由后台线程以JSON行写入文件，调用方不等待磁盘，
+             文件超过大小上限时轮换为 .1、.2 ...，只保留若干个旧文件
+    console  直接打印到控制台，命令行游戏使用
+"""
+
+import abc
+import collections
+import json
+import os
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING}
+
+# file输出端的默认大小上限与保留的旧文件数
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+BattleEvent = collections.namedtuple("BattleEvent", ("time", "level", "battle_id", "message"))
+
+
+def parse_level(level):
+    """
+    解析事件级别
+
+    Args:
+        level (int | str): 级别数值或名称（debug、info、warning）
+
+    Returns:
+        int: 级别数值
+    """
+    if isinstance(level, int):
+        return level
+    try:
+        return LEVELS[str(level).lower()]
+    except KeyError:
+        raise ValueError(f"未知的事件级别: {level}")
+
+
+class EventSink(abc.ABC):
+    """
+    事件输出端基类，低于设定级别的事件在创建事件对象之前就被丢弃
+    """
+    def __init__(self, level=INFO):
+        """
+        初始化事件输出端
+
+        Args:
+            level (int | str): 最低输出级别
+        """
+        self.level = parse_level(level)
+        self.emitted = 0
+
+    def emit(self, level, battle_id, message):
+        """
+        输出一条战斗事件
+
+        Args:
+            level (int): 事件级别
+            battle_id (str): 战斗ID
+            message (str): 日志消息
+        """
+        if level < self.level:
+            return
+        self.emitted += 1
+        self.write(BattleEvent(time.time(), level, battle_id, message))
+
+    @abc.abstractmethod
+    def write(self, event):
+        """
+        写出一条已通过级别过滤的事件
+
+        Args:
+            event (BattleEvent): 战斗事件
+        """
+
+    def flush(self, timeout=None):
+        """
+        等待已输出的事件写完，进程退出前调用
+
+        Args:
+            timeout (float): 最长等待时间（秒），None表示一直等待
+        """
+
+    def stats(self):
+        """
+        获取输出统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        return {"sink": type(self).__name__, "level": self.level, "emitted": self.emitted}
+
+
+class NullSink(EventSink):
+    """
+    丢弃所有事件
+    """
+    def emit(self, level, battle_id, message):
+        pass
+
+    def write(self, event):
+        pass
+
+
+class MemorySink(EventSink):
+    """
+    在内存中保留最近的事件，用于调试
+    """
+    def __init__(self, max_events=1000, level=INFO):
+        """
+        初始化内存输出端
+
+        Args:
+            max_events (int): 最多保留的事件数
+            level (int | str): 最低输出级别
+        """
+        super().__init__(level)
+        self.events = collections.deque(maxlen=max_events)
+
+    def write(self, event):
+        self.events.append(event)
+
+
+class ConsoleSink(EventSink):
+    """
+    直接打印到控制台，与原先add_to_log的输出格式一致
+    """
+    def write(self, event):
+        print(f"> {event.message}")
+
+
+class QueueFileSink(EventSink):
+    """
+    将事件放入队列，由后台线程批量写入文件，每行一个JSON对象
+
+    队列已满时丢弃新事件并计数，请求线程永远不会因为写日志而等待。
+    文件将超过max_bytes时先轮换：path.1 改名为 path.2，path 改名为 path.1，
+    超出backup_count的旧文件被删除，日志占用的磁盘空间不会无限增长。
+    """
+    def __init__(self, path, max_pending=10000, level=INFO, max_bytes=DEFAULT_MAX_BYTES,
+                 backup_count=DEFAULT_BACKUP_COUNT):
+        """
+        初始化文件输出端
+
+        Args:
+            path (str): 日志文件路径
+            max_pending (int): 队列中最多等待写入的事件数
+            level (int | str): 最低输出级别
+            max_bytes (int): 单个日志文件的大小上限（字节），0表示不轮换
+            backup_count (int): 保留的旧日志文件数，0表示轮换时直接删除旧内容
+        """
+        super().__init__(level)
+        self.path = path
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        # deque的append与popleft是原子操作，提交事件时不需要加锁
+        self._pending = collections.deque()
+        self._wakeup = threading.Event()
+        self._busy = False
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self.dropped = 0
+        self.written = 0
+        self.rotations = 0
+
+    def emit(self, level, battle_id, message):
+        if level < self.level:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self.emitted += 1
+        # 只保存原始字段，事件对象和JSON在后台线程中生成
+        self._pending.append((time.time(), level, battle_id, message))
+        if not self._wakeup.is_set():
+            if self._worker is None:
+                self._ensure_worker()
+            self._wakeup.set()
+
+    def write(self, event):
+        self.emit(event.level, event.battle_id, event.message)
+
+    def _ensure_worker(self):
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="battle-events", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # 先清除再取出事件，取出之后提交的事件会重新唤醒
+            self._wakeup.clear()
+            self._busy = True
+            events = []
+            try:
+                while True:
+                    events.append(BattleEvent(*self._pending.popleft()))
+            except IndexError:
+                pass
+            try:
+                if events:
+                    self._write_events(events)
+            except OSError as e:
+                print(f"写入战斗事件 {self.path} 失败: {e}")
+            finally:
+                self._busy = False
+
+    def _write_events(self, events):
+        lines = "".join(
+            json.dumps(event._asdict(), ensure_ascii=False, separators=(",", ":")) + "\n"
+            for event in events
+        )
+        data = lines.encode("utf-8")
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 以追加模式打开，其他进程同时写入同一个文件时各自的行不会互相覆盖
+        with open(self.path, "ab") as f:
+            if self.max_bytes and f.tell() and f.tell() + len(data) > self.max_bytes:
+                f.close()
+                self._rotate()
+                f = open(self.path, "ab")
+            with f:
+                f.write(data)
+        self.written += len(events)
+
+    def _rotate(self):
+        # 其他进程可能已经轮换过，不存在的文件直接跳过
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        try:
+            if self.backup_count > 0:
+                os.replace(self.path, f"{self.path}.1")
+            else:
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.rotations += 1
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._worker is not None and (self._pending or self._busy or self._wakeup.is_set()):
+            if deadline is not None and time.monotonic() >= deadline:
+                return
+            time.sleep(0.01)
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({
+            "path": self.path,
+            "pending": len(self._pending),
+            "written": self.written,
+            "dropped": self.dropped,
+            "rotations": self.rotations
+        })
+        return stats
+
+
+def create_event_sink(kind, path=None, level=INFO, max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+    """
+    根据名称创建事件输出端
+
+    Args:
+        kind (str): 输出端类型，null、memory、file 或 console
+        path (str): file输出端的日志文件路径
+        level (int | str): 最低输出级别
+        max_bytes (int): file输出端单个日志文件的大小上限（字节），0表示不轮换
+        backup_count (int): file输出端保留的旧日志文件数
+
+    Returns:
+        EventSink: 事件输出端
+    """
+    if kind == "null":
+        return NullSink(level)
+    if kind == "memory":
+        return MemorySink(level=level)
+    if kind == "file":
+        return QueueFileSink(path, level=level, max_bytes=max_bytes, backup_count=backup_count)
+    if kind == "console":
+        return ConsoleSink(level)
+    raise ValueError(f"未知的战斗事件输出端: {kind}")
@@ -0,0 +1,88 @@
+import collections
+import itertools
+
+# 每场战斗保留的日志条数
+DEFAULT_MAX_ENTRIES = 200
+
+
+class BattleLog:
+    """
+    定长的战斗日志，每条日志带有单调递增的序号
+
+    日志超过容量后丢弃最早的条目。客户端记住收到的最后一个序号，下次只取之后的新条目，
+    响应大小与战斗进行了多少回合无关。
+    """
+    __slots__ = ("_entries", "_next_seq")
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, messages=()):
+        """
+        初始化战斗日志
+
+        Args:
+            max_entries (int): 最多保留的日志条数
+            messages (iterable): 初始日志消息
+        """
+        self._entries = collections.deque(maxlen=max(1, int(max_entries)))  # (序号, 消息)
+        self._next_seq = 1
+        for message in messages:
+            self.append(message)
+
+    def append(self, message):
+        """
+        追加一条日志
+
+        Args:
+            message (str): 日志消息
+
+        Returns:
+            int: 日志序号
+        """
+        seq = self._next_seq
+        self._next_seq += 1
+        self._entries.append((seq, message))
+        return seq
+
+    @property
+    def last_seq(self):
+        """
+        最后一条日志的序号，还没有日志时为0
+        """
+        return self._next_seq - 1
+
+    def since(self, cursor=None):
+        """
+        获取某个序号之后的日志
+
+        Args:
+            cursor (int): 客户端收到的最后一个序号，None表示获取全部
+
+        Returns:
+            tuple: (消息列表, 最后一个序号, 是否需要重置)。游标无效或对应的日志已被丢弃时
+            返回缓冲区中的全部日志并要求客户端先清空已有内容
+        """
+        last_seq = self.last_seq
+        first_seq = self._entries[0][0] if self._entries else self._next_seq
+        if cursor is None or cursor > last_seq or cursor < first_seq - 1:
+            return [message for _, message in self._entries], last_seq, True
+        start = cursor - first_seq + 1
+        entries = itertools.islice(self._entries, start, None)
+        return [message for _, message in entries], last_seq, False
+
+    def tail(self, count):
+        """
+        获取最近的若干条日志
+
+        Args:
+            count (int): 条数
+
+        Returns:
+            list: 消息列表
+        """
+        start = max(0, len(self._entries) - count)
+        return [message for _, message in itertools.islice(self._entries, start, None)]
+
+    def __iter__(self):
+        return (message for _, message in self._entries)
+
+    def __len__(self):
+        return len(self._entries)
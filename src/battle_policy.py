@@ -0,0 +1,78 @@
+"""
+战斗策略：根据当前战斗状态为玩家选择行动，用于模拟器和自动战斗
+
+策略是一个函数，参数为战斗和行动的玩家角色（默认为battle.player），返回传给
+Battle.player_action的参数元组 (行动, 技能名称[, 道具名称])。行动为attack、skill、
+item、defend、escape；不使用技能时技能名称为None。
+"""
+
+import functools
+
+
+def _usable_skills(battle, player, skill_types):
+    # 魔法值足够且类型符合的技能记录
+    for skill_name in player.skills:
+        skill = battle.config_manager.get_skill_record(skill_name)
+        if skill and skill.type in skill_types and skill.mp_cost <= player.mp:
+            yield skill_name, skill
+
+
+def attack_only(battle, player=None):
+    """
+    只使用普通攻击
+    """
+    return "attack", None
+
+
+def strongest_skill(battle, player=None):
+    """
+    使用威力最大的可用攻击技能，魔法值不足时普通攻击
+    """
+    best = max(_usable_skills(battle, player or battle.player, ("physical", "magical")),
+               key=lambda entry: entry[1].power, default=None)
+    if best is None:
+        return "attack", None
+    return "skill", best[0]
+
+
+def cautious(battle, player=None, heal_below=30):
+    """
+    生命值低于heal_below%时优先使用治疗技能，没有治疗技能时使用恢复生命值的道具，
+    其余情况与strongest_skill相同
+    """
+    player = player or battle.player
+    if player.hp * 100 < player.max_hp * heal_below:
+        for skill_name, skill in _usable_skills(battle, player, ("support",)):
+            if skill_name == "heal":
+                return "skill", skill_name
+        for item_name in player.items:
+            item = battle.config_manager.get_item_record(item_name)
+            if item and item.type == "consumable" and item.effect == "restore_hp":
+                return "item", None, item_name
+    return strongest_skill(battle, player)
+
+
+# 策略名称 -> 策略函数，跨进程传递策略时使用名称
+POLICIES = {
+    "attack": attack_only,
+    "strongest_skill": strongest_skill,
+    "cautious": cautious
+}
+
+
+def get_policy(name, **options):
+    """
+    按名称获取策略
+
+    Args:
+        name (str): 策略名称，见POLICIES
+        **options: 策略参数，例如cautious的heal_below
+
+    Returns:
+        callable: 策略函数
+    """
+    try:
+        policy = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"未知的战斗策略: {name}")
+    return functools.partial(policy, **options) if options else policy
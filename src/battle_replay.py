@@ -0,0 +1,84 @@
+"""
+战斗记录与重放
+
+战斗记录只保存重建战斗所需的最少数据：随机数种子、难度、敌人ID、开始时的玩家状态
+和玩家的行动序列 [行动, 技能名称(, 道具名称)]，不保存战斗日志文本。重放时用相同的
+种子创建战斗并依次执行行动，得到与原战斗完全相同的过程和日志。
+"""
+
+import copy
+
+from .battle import Battle
+from .save_codec import decode_player
+
+# 战斗结果
+WIN = "win"
+LOSS = "loss"
+ESCAPE = "escape"
+ACTIVE = "active"
+
+
+def battle_outcome(battle):
+    """
+    获取战斗结果
+
+    Args:
+        battle (Battle): 战斗实例
+
+    Returns:
+        str: win、loss、escape 或 active（战斗尚未结束）
+    """
+    if not battle.enemy.is_alive():
+        return WIN
+    if not battle.player.is_alive():
+        return LOSS
+    if not battle.is_active:
+        return ESCAPE
+    return ACTIVE
+
+
+def record_battle(battle):
+    """
+    生成战斗记录
+
+    Args:
+        battle (Battle): 使用自身种子的战斗实例
+
+    Returns:
+        dict: 可以直接保存为JSON的战斗记录
+    """
+    if battle.seed is None or battle.initial_player is None:
+        raise ValueError("使用外部随机数生成器的战斗不能重放")
+    return {
+        "seed": battle.seed,
+        "difficulty": battle.difficulty,
+        "enemy": battle.enemy.key,
+        "player": battle.initial_player,
+        "actions": [list(action) for action in battle.actions],
+        "outcome": battle_outcome(battle)
+    }
+
+
+def replay_battle(record, config_manager, event_sink=None):
+    """
+    根据战斗记录重建战斗
+
+    Args:
+        record (dict): 战斗记录
+        config_manager (ConfigManager): 配置管理器，应与原战斗使用相同的配置
+        event_sink (EventSink): 重放时的战斗事件输出端
+
+    Returns:
+        Battle: 执行完所有行动后的战斗实例
+    """
+    # 重放会改变玩家的道具等状态，使用副本，战斗记录本身保持不变
+    player = decode_player(copy.deepcopy(record["player"]), config_manager)
+    enemy = config_manager.spawn_enemy(record["enemy"], record["difficulty"])
+    if enemy is None:
+        raise ValueError(f"敌人配置不存在: {record['enemy']}")
+    battle = Battle(player, enemy, config_manager, record["difficulty"],
+                    event_sink=event_sink, seed=record["seed"])
+    battle.start_battle()
+    for action in record["actions"]:
+        battle.player_action(*action)
+    return battle
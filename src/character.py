@@ -1,7 +1,32 @@
+# 配置中的属性名与角色属性的对应关系，只列出名称不同的属性
+STAT_ATTRS = {"def": "defense"}
+# 物品加成与属性点可以修改的角色属性
+STAT_FIELDS = ("hp", "max_hp", "mp", "max_mp", "atk", "matk", "defense", "mdef", "agi")
+
+
 class Character:
     """
     角色基类，包含玩家和敌人的共同属性和方法
+
+    属性保存在__slots__中，对象没有__dict__，占用的内存更少，属性访问也更快。
     """
+    __slots__ = (
+        "name",
+        "level",
+        "exp",
+        "hp",
+        "max_hp",
+        "mp",
+        "max_mp",
+        "atk",
+        "matk",
+        "defense",
+        "mdef",
+        "agi",
+        "skills",
+        "items"
+    )
+
     def __init__(self, name, char_class=None, config=None):
         """
         初始化角色
@@ -53,7 +78,8 @@ class Character:
         self.mdef = base_stats.get("mdef", 5)
         self.agi = base_stats.get("agi", 5)
         self.skills = char_class.get("skills", [])
-        self.items = char_class.get("starting_items", [])
+        # 复制物品列表，角色获得或消耗物品时不会修改职业配置
+        self.items = list(char_class.get("starting_items", []))
         
     def init_from_config(self, config):
         """
@@ -71,10 +97,8 @@ class Character:
         self.defense = config.get("def", 5)
         self.mdef = config.get("mdef", 5)
         self.agi = config.get("agi", 5)
-        self.exp_reward = config.get("exp_reward", 0)
-        self.gold_reward = config.get("gold_reward", 0)
         self.skills = config.get("skills", [])
-        self.drop_items = config.get("drop_items", [])
+        self.items = []
         
     def is_alive(self):
         """
@@ -151,6 +175,19 @@ class Character:
         """
         self.exp += exp
         
+    def apply_stat_bonus(self, stat_bonus, sign=1):
+        """
+        应用或移除属性加成
+        
+        Args:
+            stat_bonus (tuple): ((属性名, 加成), ...)，属性名使用配置中的名称
+            sign (int): 1为应用，-1为移除
+        """
+        for stat, bonus in stat_bonus:
+            attr = STAT_ATTRS.get(stat, stat)
+            if attr in STAT_FIELDS:
+                setattr(self, attr, getattr(self, attr) + sign * bonus)
+        
     def get_stats(self):
         """
         获取角色状态信息
@@ -177,6 +214,15 @@ class Player(Character):
     """
     玩家角色类
     """
+    __slots__ = (
+        "gold",
+        "class_name",
+        "equipped_items",
+        "is_dead",
+        "stat_points",
+        "exp_to_next_level"
+    )
+
     def __init__(self, name, char_class):
         """
         初始化玩家角色
@@ -263,14 +309,13 @@ class Player(Character):
         Returns:
             bool: 使用成功返回True，否则返回False
         """
-        item = config_manager.get_item(item_name)
+        item = config_manager.get_item_record(item_name)
         if not item:
             return False
             
-        item_type = item.get("type")
-        if item_type == "consumable":
-            effect = item.get("effect")
-            value = item.get("value", 0)
+        if item.type == "consumable":
+            effect = item.effect
+            value = item.value
             
             if effect == "restore_hp":
                 healed = self.heal(value)
@@ -280,10 +325,7 @@ class Player(Character):
                 return True
             elif effect == "permanent_bonus":
                 # 永久属性加成
-                stat_bonus = item.get("stat_bonus", {})
-                for stat, bonus in stat_bonus.items():
-                    if hasattr(self, stat):
-                        setattr(self, stat, getattr(self, stat) + bonus)
+                self.apply_stat_bonus(item.stat_bonus)
                 return True
                 
         return False
@@ -299,11 +341,11 @@ class Player(Character):
         Returns:
             bool: 装备成功返回True，否则返回False
         """
-        item = config_manager.get_item(item_name)
+        item = config_manager.get_item_record(item_name)
         if not item:
             return False
             
-        item_type = item.get("type")
+        item_type = item.type
         if item_type not in ["weapon", "armor"]:
             return False
             
@@ -315,10 +357,7 @@ class Player(Character):
         self.equipped_items[item_type] = item_name
         
         # 应用属性加成
-        stat_bonus = item.get("stat_bonus", {})
-        for stat, bonus in stat_bonus.items():
-            if hasattr(self, stat):
-                setattr(self, stat, getattr(self, stat) + bonus)
+        self.apply_stat_bonus(item.stat_bonus)
                 
         return True
         
@@ -337,15 +376,12 @@ class Player(Character):
             return False
             
         item_name = self.equipped_items[item_type]
-        item = config_manager.get_item(item_name)
+        item = config_manager.get_item_record(item_name)
         if not item:
             return False
             
         # 移除属性加成
-        stat_bonus = item.get("stat_bonus", {})
-        for stat, bonus in stat_bonus.items():
-            if hasattr(self, stat):
-                setattr(self, stat, getattr(self, stat) - bonus)
+        self.apply_stat_bonus(item.stat_bonus, sign=-1)
                 
         # 移除装备记录
         del self.equipped_items[item_type]
@@ -386,7 +422,8 @@ class Player(Character):
                 self.max_mp += points * 3
                 self.mp += points * 3
             else:
-                setattr(self, stat, getattr(self, stat) + points)
+                attr = STAT_ATTRS.get(stat, stat)
+                setattr(self, attr, getattr(self, attr) + points)
                 
             self.stat_points -= points
             return True
@@ -397,12 +434,71 @@ class Player(Character):
 class Enemy(Character):
     """
     敌人角色类
+
+    技能和掉落物品列表不会在战斗中修改，由同一种敌人的所有实例共享。
     """
-    def __init__(self, config):
+    __slots__ = (
+        "key",
+        "exp_reward",
+        "gold_reward",
+        "drop_items",
+        "scaled_for"
+    )
+
+    def __init__(self, config, key=None):
         """
         初始化敌人角色
         
         Args:
             config (dict): 敌人配置数据
+            key (str): 敌人在配置中的ID
         """
-        super().__init__(config.get("name", "未知敌人"), config=config)
\ No newline at end of file
+        super().__init__(config.get("name", "未知敌人"), config=config)
+        self.key = key
+        self.exp_reward = config.get("exp_reward", 0)
+        self.gold_reward = config.get("gold_reward", 0)
+        self.drop_items = tuple(config.get("drop_items", ()))
+        self.scaled_for = None  # 已按哪个难度调整过属性，None表示未调整
+        
+    def apply_strength_multiplier(self, multiplier, difficulty):
+        """
+        按难度的敌人强度倍率调整属性
+        
+        Args:
+            multiplier (float): 敌人强度倍率
+            difficulty (str): 难度名称
+        """
+        self.hp = int(self.hp * multiplier)
+        self.max_hp = self.hp
+        self.atk = int(self.atk * multiplier)
+        self.defense = int(self.defense * multiplier)
+        self.scaled_for = difficulty
+        
+    def clone(self):
+        """
+        复制敌人，用于从原型生成参战的实例
+        
+        Returns:
+            Enemy: 新的敌人对象，与原型共享技能和掉落物品
+        """
+        enemy = Enemy.__new__(Enemy)
+        enemy.name = self.name
+        enemy.level = self.level
+        enemy.exp = self.exp
+        enemy.hp = self.hp
+        enemy.max_hp = self.max_hp
+        enemy.mp = self.mp
+        enemy.max_mp = self.max_mp
+        enemy.atk = self.atk
+        enemy.matk = self.matk
+        enemy.defense = self.defense
+        enemy.mdef = self.mdef
+        enemy.agi = self.agi
+        enemy.skills = self.skills
+        enemy.items = []
+        enemy.key = self.key
+        enemy.exp_reward = self.exp_reward
+        enemy.gold_reward = self.gold_reward
+        enemy.drop_items = self.drop_items
+        enemy.scaled_for = self.scaled_for
+        return enemy
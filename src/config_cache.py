@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from .config_files import config_signature, read_config_snapshot
+from .config_manager import ConfigManager
+from .story_bundle import bundle_source_hash
+
+class _CacheEntry:
+    """
+    单个配置目录的缓存项
+    """
+    def __init__(self, config_dir, manager, signature, content_hash, now):
+        self.config_dir = config_dir
+        self.manager = manager
+        self.signature = signature
+        self.content_hash = content_hash
+        self.checked_at = now
+        self.loaded_at = time.time()
+        self.reloading = False
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_reload_seconds = 0.0
+        self.total_reload_seconds = 0.0
+
+
+class ConfigCache:
+    """
+    配置管理器缓存，按文件修改时间检测配置变化并在后台重新加载
+
+    新的ConfigManager完整加载后才替换旧对象，正在处理的请求继续使用旧对象，
+    不会看到只加载了一半的配置。已解析的配置按内容哈希共享，内容相同的多个目录
+    只解析一次。每个ConfigManager都从计算哈希时读到的内容快照解析，延迟加载的
+    配置段不会读到之后被修改的文件，共享的配置始终与哈希一致。
+
+    首次加载目录时，如果配置包的文件签名与当前文件一致，直接使用配置包头中的源文件
+    哈希，不再读取和哈希JSON源文件，各配置段从配置包读取。
+    """
+    def __init__(self, check_interval=1.0, background=True, prefetch=True, clock=time.monotonic):
+        """
+        初始化配置缓存
+
+        Args:
+            check_interval (float): 两次检查文件修改时间的最小间隔（秒）
+            background (bool): 是否在后台线程中重新加载
+            prefetch (bool): 首次加载时是否在后台预热其余配置段
+            clock (callable): 时间函数，默认使用time.monotonic
+        """
+        self.check_interval = check_interval
+        self.background = background
+        self.prefetch = prefetch
+        self.clock = clock
+        self._entries = {}  # 规范化目录路径 -> _CacheEntry
+        self._by_hash = {}  # 内容哈希 -> ConfigManager
+        self._lock = threading.Lock()
+        self.shared_hits = 0
+
+    def get(self, config_dir):
+        """
+        获取配置管理器，必要时触发重新加载
+
+        Args:
+            config_dir (str): 配置文件目录路径
+
+        Returns:
+            ConfigManager: 当前生效的配置管理器
+        """
+        key = os.path.abspath(config_dir)
+        entry = self._entries.get(key)
+        if entry is None:
+            return self._load_initial(key, config_dir)
+
+        now = self.clock()
+        if now - entry.checked_at < self.check_interval:
+            return entry.manager
+
+        with self._lock:
+            if entry.reloading or now - entry.checked_at < self.check_interval:
+                return entry.manager
+            entry.checked_at = now
+            signature = config_signature(entry.config_dir)
+            if signature == entry.signature:
+                return entry.manager
+            entry.reloading = True
+
+        if self.background:
+            threading.Thread(target=self._reload, args=(entry, signature), daemon=True).start()
+        else:
+            self._reload(entry, signature)
+        return entry.manager
+
+    def _load_initial(self, key, config_dir):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                return entry.manager
+            # 先取签名再加载，加载期间发生的修改会在下一次检查时被发现
+            signature = config_signature(config_dir)
+            # 配置包与当前文件一致时只读取它的文件头，配置段从配置包读取
+            content_hash = bundle_source_hash(config_dir, signature)
+            snapshot = None
+            if content_hash is None:
+                snapshot = read_config_snapshot(config_dir)
+                content_hash = snapshot.content_hash
+            manager = self._by_hash.get(content_hash)
+            if manager is None:
+                # 首次加载只创建管理器，各配置段在首次访问时从快照或配置包解析，其余部分在后台预热
+                manager = ConfigManager(config_dir, snapshot=snapshot)
+                if self.prefetch:
+                    manager.prefetch()
+                self._by_hash[content_hash] = manager
+            else:
+                self.shared_hits += 1
+            self._entries[key] = _CacheEntry(config_dir, manager, signature, content_hash, self.clock())
+            return manager
+
+    def _reload(self, entry, signature):
+        # 无论重新加载是否成功都要清除标记，否则该目录的热重载会一直停止
+        try:
+            self._reload_entry(entry, signature)
+        finally:
+            with self._lock:
+                entry.reloading = False
+
+    def _reload_entry(self, entry, signature):
+        start = time.perf_counter()
+        snapshot = read_config_snapshot(entry.config_dir)
+        content_hash = snapshot.content_hash
+        if content_hash == entry.content_hash:
+            # 只是修改时间变化，内容未变
+            with self._lock:
+                entry.signature = signature
+            return
+
+        with self._lock:
+            manager = self._by_hash.get(content_hash)
+        shared = manager is not None
+        try:
+            # 重新加载时完整加载后再替换，保证请求看到的配置是完整的；
+            # 共享的配置可能还有延迟加载的配置段，从它自己的快照补齐
+            if shared:
+                manager.prefetch(background=False)
+            else:
+                manager = ConfigManager(entry.config_dir, snapshot=snapshot)
+                manager.load_all_configs()
+        except Exception as e:
+            print(f"重新加载配置 {entry.config_dir} 失败: {e}")
+            manager = None
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            # 记录已处理过的签名，文件再次修改后才会重试
+            entry.signature = signature
+            # 编辑过程中文件可能暂时不完整，修改过的文件加载失败时保留旧配置。
+            # 只比较文件内容，不让旧配置从已经修改的文件加载剩余的配置段
+            if manager is None or self._new_errors(entry.manager, manager):
+                entry.failed_reloads += 1
+                return
+            old_hash = entry.content_hash
+            entry.manager = manager
+            entry.content_hash = content_hash
+            entry.loaded_at = time.time()
+            entry.reloads += 1
+            entry.last_reload_seconds = elapsed
+            entry.total_reload_seconds += elapsed
+            if shared:
+                self.shared_hits += 1
+            else:
+                self._by_hash.setdefault(content_hash, manager)
+            self._release_hash(old_hash)
+
+    @staticmethod
+    def _new_errors(old_manager, new_manager):
+        # 新配置中加载失败、且内容与旧配置不同的文件；内容未变的文件在旧配置中同样失败
+        old_files = old_manager.snapshot.files if old_manager.snapshot is not None else {}
+        new_files = new_manager.snapshot.files
+        return [
+            filename for filename in new_manager.load_errors
+            if new_files.get(filename) != old_files.get(filename)
+        ]
+
+    def _release_hash(self, content_hash):
+        # 没有目录再引用该内容时释放对应的配置
+        if all(entry.content_hash != content_hash for entry in self._entries.values()):
+            self._by_hash.pop(content_hash, None)
+
+    def invalidate(self, config_dir):
+        """
+        移除缓存项，下次访问时重新加载
+
+        Args:
+            config_dir (str): 配置文件目录路径
+        """
+        with self._lock:
+            entry = self._entries.pop(os.path.abspath(config_dir), None)
+            if entry is not None:
+                self._release_hash(entry.content_hash)
+
+    def stats(self):
+        """
+        获取重新加载次数与耗时统计
+
+        Returns:
+            dict: 各配置目录的统计信息及共享情况
+        """
+        with self._lock:
+            return {
+                "entries": {
+                    entry.config_dir: {
+                        "content_hash": entry.content_hash,
+                        "loaded_at": entry.loaded_at,
+                        "reloading": entry.reloading,
+                        "reloads": entry.reloads,
+                        "failed_reloads": entry.failed_reloads,
+                        "last_reload_seconds": entry.last_reload_seconds,
+                        "total_reload_seconds": entry.total_reload_seconds
+                    }
+                    for entry in self._entries.values()
+                },
+                "unique_configs": len(self._by_hash),
+                "shared_hits": self.shared_hits
+            }
+
+
+# 进程内共享的配置缓存，命令行游戏与Web应用都从这里获取配置
+shared_config_cache = ConfigCache()
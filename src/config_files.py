@@ -0,0 +1,85 @@
+import collections
+import hashlib
+import os
+
+# 每个故事配置目录包含的配置文件
+CONFIG_FILES = (
+    "classes.json",
+    "story.json",
+    "difficulty.json",
+    "enemies.json",
+    "skills.json",
+    "items.json",
+    "shops.json"
+)
+
+# 配置目录的内容快照
+ConfigSnapshot = collections.namedtuple("ConfigSnapshot", ("files", "content_hash"))
+
+def config_signature(config_dir):
+    """
+    计算配置目录的文件签名，用于廉价地判断配置文件是否被修改
+
+    Args:
+        config_dir (str): 配置文件目录路径
+
+    Returns:
+        tuple: 每个配置文件的(文件名, 修改时间, 大小)，文件不存在时后两项为None
+    """
+    signature = []
+    for filename in CONFIG_FILES:
+        try:
+            st = os.stat(os.path.join(config_dir, filename))
+            signature.append((filename, st.st_mtime_ns, st.st_size))
+        except OSError:
+            signature.append((filename, None, None))
+    return tuple(signature)
+
+
+def read_config_snapshot(config_dir):
+    """
+    读取配置目录中所有配置文件的内容快照，并按读到的内容计算哈希
+
+    配置管理器从快照解析各配置段时，解析的正是计算哈希时的内容，不会因为文件
+    之后被修改而与哈希不符。
+
+    Args:
+        config_dir (str): 配置文件目录路径
+
+    Returns:
+        ConfigSnapshot: (文件名 -> 文件内容，文件不存在时为None, 十六进制哈希值)
+    """
+    files = {}
+    for filename in CONFIG_FILES:
+        try:
+            with open(os.path.join(config_dir, filename), "rb") as f:
+                files[filename] = f.read()
+        except OSError:
+            files[filename] = None
+    return ConfigSnapshot(files, _hash_files(files))
+
+
+def _hash_files(files):
+    digest = hashlib.sha1()
+    for filename in CONFIG_FILES:
+        digest.update(filename.encode("utf-8"))
+        data = files.get(filename)
+        if data is None:
+            digest.update(b"\x00missing")
+            continue
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def config_content_hash(config_dir):
+    """
+    计算配置目录的内容哈希，内容相同的目录得到相同的哈希
+
+    Args:
+        config_dir (str): 配置文件目录路径
+
+    Returns:
+        str: 十六进制哈希值
+    """
+    return read_config_snapshot(config_dir).content_hash
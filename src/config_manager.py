@@ -1,25 +1,97 @@
 import json
+import marshal
 import os
+import threading
+from .character import Enemy
+from .config_records import compile_item, compile_skill, compile_shop
+from .story_bundle import load_bundle
+from .string_table import externalize_story_text, table_dir_for
+
+class _LazySection:
+    """
+    配置段的延迟加载描述符，首次访问时调用对应的加载方法
+
+    加载方法把结果写入实例字典，之后的访问直接命中实例属性，不再经过描述符。
+    """
+    def __init__(self, loader):
+        self.loader = loader
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        with instance._load_locks[self.loader]:
+            if self.name not in instance.__dict__:
+                getattr(instance, self.loader)()
+        return instance.__dict__[self.name]
+
 
 class ConfigManager:
     """
     配置管理器，用于加载和管理游戏的所有JSON配置文件
+
+    各配置段在首次访问时才读取对应的文件，也可以调用load_all_configs一次性加载，
+    或调用prefetch在后台预热尚未加载的部分。配置目录中存在与源文件一致的配置包
+    (config.bundle)时优先从配置包读取，否则解析JSON文件。
+
+    剧情中的长文本保存在内存映射的字符串表中，配置里对应字段为TextRef，
+    使用时通过str()取得文本。
+
+    传入配置快照时只从快照解析各配置段，不再读取磁盘，延迟加载的配置段与创建时
+    的内容一致，即使配置文件之后被修改或正在编辑。
     """
-    def __init__(self, config_dir="config"):
+    # 配置段及其派生数据，首次访问时由对应的加载方法填充
+    classes = _LazySection("load_classes")
+    story = _LazySection("load_story")
+    chapters_by_id = _LazySection("load_story")
+    quests_by_chapter = _LazySection("load_story")  # (章节ID, 任务ID) -> 任务配置
+    quests_by_id = _LazySection("load_story")
+    npcs_by_chapter = _LazySection("load_story")  # (章节ID, NPC ID) -> NPC配置
+    difficulty = _LazySection("load_difficulty")
+    enemies = _LazySection("load_enemies")
+    skills = _LazySection("load_skills")
+    skill_records = _LazySection("load_skills")
+    items = _LazySection("load_items")
+    item_records = _LazySection("load_items")
+    shops = _LazySection("load_shops")
+    shop_catalogs = _LazySection("load_shops")
+    enemy_prototypes = _LazySection("build_enemy_prototypes")  # (敌人ID, 难度) -> Enemy
+
+    # 加载方法及其写入的配置段属性，按预热顺序排列
+    LOADERS = (
+        ("load_classes", "classes"),
+        ("load_story", "story"),
+        ("load_difficulty", "difficulty"),
+        ("load_enemies", "enemies"),
+        ("load_skills", "skills"),
+        ("load_items", "items"),
+        ("load_shops", "shops"),
+        ("build_enemy_prototypes", "enemy_prototypes")
+    )
+
+    def __init__(self, config_dir="config", use_bundle=True, use_string_table=True, snapshot=None):
         """
         初始化配置管理器
         
         Args:
             config_dir (str): 配置文件目录路径
+            use_bundle (bool): 是否优先从预编译的配置包读取
+            use_string_table (bool): 是否将剧情长文本移入内存映射的字符串表
+            snapshot (ConfigSnapshot): 配置文件内容快照，None表示从磁盘读取
         """
         self.config_dir = config_dir
-        self.classes = {}
-        self.story = {}
-        self.difficulty = {}
-        self.enemies = {}
-        self.skills = {}
-        self.items = {}
-        self.shops = {}
+        self.snapshot = snapshot
+        self.use_bundle = use_bundle
+        self.use_string_table = use_string_table
+        self.string_table = None
+        self.load_errors = []  # 加载失败的配置文件
+        self._bundle = None  # 配置包内容，None表示尚未检查
+        self._bundle_lock = threading.Lock()
+        # 每个配置段一把锁，互不相关的配置段可以并行加载
+        self._load_locks = {loader: threading.RLock() for loader, _ in self.LOADERS}
+        self._prefetch_thread = None
         
     def load_all_configs(self):
         """
@@ -32,6 +104,36 @@ class ConfigManager:
         self.load_skills()
         self.load_items()
         self.load_shops()
+        self.build_enemy_prototypes()
+        
+    def is_loaded(self, section):
+        """
+        检查配置段是否已加载
+        
+        Args:
+            section (str): 配置段名称，如 classes、story
+            
+        Returns:
+            bool: 已加载返回True
+        """
+        return section in self.__dict__
+        
+    def prefetch(self, background=True):
+        """
+        加载所有尚未加载的配置段
+        
+        Args:
+            background (bool): 是否在后台线程中加载
+        """
+        if not background:
+            for loader, section in self.LOADERS:
+                getattr(self, section)
+            return
+        if self._prefetch_thread is None:
+            self._prefetch_thread = threading.Thread(
+                target=self.prefetch, kwargs={"background": False}, daemon=True
+            )
+            self._prefetch_thread.start()
         
     def load_config_file(self, filename):
         """
@@ -43,17 +145,44 @@ class ConfigManager:
         Returns:
             dict: 配置数据
         """
+        bundle = self._get_bundle()
+        if bundle and bundle.get(filename) is not None:
+            # 每次都解码出新的数据，加载结果可以直接修改
+            return marshal.loads(bundle[filename])
+            
         file_path = os.path.join(self.config_dir, filename)
         try:
+            if self.snapshot is not None:
+                data = self.snapshot.files.get(filename)
+                if data is None:
+                    raise FileNotFoundError(file_path)
+                return json.loads(data.decode("utf-8"))
             with open(file_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
             print(f"配置文件 {file_path} 未找到")
+            self.load_errors.append(filename)
             return {}
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, UnicodeDecodeError):
             print(f"配置文件 {file_path} 格式错误")
+            self.load_errors.append(filename)
             return {}
     
+    def _get_bundle(self):
+        """
+        读取并缓存配置包，整个配置包只在首次读取配置文件时检查一次
+        
+        Returns:
+            dict: 文件名 -> 解析后数据的marshal字节串，配置包不可用时返回空字典
+        """
+        if self._bundle is None:
+            with self._bundle_lock:
+                if self._bundle is None:
+                    source_hash = self.snapshot.content_hash if self.snapshot is not None else None
+                    bundle = load_bundle(self.config_dir, source_hash) if self.use_bundle else None
+                    self._bundle = bundle or {}
+        return self._bundle
+        
     def load_classes(self):
         """
         加载职业配置
@@ -64,37 +193,112 @@ class ConfigManager:
         """
         加载剧情配置
         """
-        self.story = self.load_config_file("story.json")
+        story = self.load_config_file("story.json")
+        if self.use_string_table:
+            try:
+                self.string_table = externalize_story_text(story, table_dir_for(self.config_dir))
+            except OSError as e:
+                # 无法写入或映射字符串表时继续使用普通字符串
+                print(f"创建剧情字符串表失败: {e}")
+        self.story = story
+        self.build_story_indexes()
+        
+    def build_story_indexes(self):
+        """
+        构建章节、任务和NPC的索引，使按ID查找不再需要遍历章节列表
+        """
+        chapters_by_id = {}
+        quests_by_chapter = {}
+        quests_by_id = {}
+        npcs_by_chapter = {}
+        # 与原先的线性查找保持一致：ID重复时以先出现的为准
+        for chapter in self.story.get("chapters", []):
+            chapter_id = chapter.get("id")
+            chapters_by_id.setdefault(chapter_id, chapter)
+            if chapters_by_id[chapter_id] is not chapter:
+                continue
+            for quest in chapter.get("quests", []):
+                quest_id = quest.get("id")
+                quests_by_chapter.setdefault((chapter_id, quest_id), quest)
+                quests_by_id.setdefault(quest_id, quest)
+            for npc in chapter.get("npcs", []):
+                npcs_by_chapter.setdefault((chapter_id, npc.get("id")), npc)
+        self.chapters_by_id = chapters_by_id
+        self.quests_by_chapter = quests_by_chapter
+        self.quests_by_id = quests_by_id
+        self.npcs_by_chapter = npcs_by_chapter
         
     def load_difficulty(self):
         """
         加载难度配置
         """
         self.difficulty = self.load_config_file("difficulty.json")
+        # 敌人原型按难度预先调整，难度配置变化时需要重新生成
+        if self.is_loaded("enemy_prototypes"):
+            self.build_enemy_prototypes()
         
     def load_enemies(self):
         """
         加载敌人配置
         """
         self.enemies = self.load_config_file("enemies.json")
+        if self.is_loaded("enemy_prototypes"):
+            self.build_enemy_prototypes()
+        
+    def build_enemy_prototypes(self):
+        """
+        为每种敌人和每个难度生成按难度调整好属性的原型，战斗时复制原型即可
+        """
+        prototypes = {}
+        for enemy_name, config in self.enemies.items():
+            base = Enemy(config, key=enemy_name)
+            prototypes[(enemy_name, None)] = base
+            for difficulty_name, difficulty_config in self.difficulty.items():
+                prototype = base.clone()
+                prototype.apply_strength_multiplier(
+                    difficulty_config.get("enemy_strength_multiplier", 1.0), difficulty_name
+                )
+                prototypes[(enemy_name, difficulty_name)] = prototype
+        self.enemy_prototypes = prototypes
         
     def load_skills(self):
         """
         加载技能配置
         """
         self.skills = self.load_config_file("skills.json")
+        self.skill_records = {
+            skill_name: compile_skill(skill_name, skill)
+            for skill_name, skill in self.skills.items()
+        }
         
     def load_items(self):
         """
         加载物品配置
         """
         self.items = self.load_config_file("items.json")
+        self.item_records = {
+            item_name: compile_item(item_name, item)
+            for item_name, item in self.items.items()
+        }
+        # 商店目录引用物品记录，商店已加载时需要重新编译
+        if self.is_loaded("shops"):
+            self.compile_shops()
         
     def load_shops(self):
         """
         加载商店配置
         """
         self.shops = self.load_config_file("shops.json")
+        self.compile_shops()
+        
+    def compile_shops(self):
+        """
+        编译商店目录，预先构建带价格的商品列表
+        """
+        self.shop_catalogs = {
+            shop_name: compile_shop(shop_name, shop, self.item_records)
+            for shop_name, shop in self.shops.items()
+        }
         
     def get_class(self, class_name):
         """
@@ -120,6 +324,21 @@ class ConfigManager:
         """
         return self.enemies.get(enemy_name, {})
         
+    def spawn_enemy(self, enemy_name, difficulty=None):
+        """
+        从原型池复制一个参战的敌人
+        
+        Args:
+            enemy_name (str): 敌人名称
+            difficulty (str): 游戏难度，未知难度或None时返回未调整属性的敌人
+            
+        Returns:
+            Enemy: 敌人对象，敌人不存在时返回None
+        """
+        prototypes = self.enemy_prototypes
+        prototype = prototypes.get((enemy_name, difficulty)) or prototypes.get((enemy_name, None))
+        return prototype.clone() if prototype else None
+        
     def get_skill(self, skill_name):
         """
         获取技能配置
@@ -144,6 +363,42 @@ class ConfigManager:
         """
         return self.items.get(item_name, {})
         
+    def get_item_record(self, item_name):
+        """
+        获取编译后的物品记录
+        
+        Args:
+            item_name (str): 物品名称
+            
+        Returns:
+            ItemRecord: 物品记录，不存在时返回None
+        """
+        return self.item_records.get(item_name)
+        
+    def get_skill_record(self, skill_name):
+        """
+        获取编译后的技能记录
+        
+        Args:
+            skill_name (str): 技能名称
+            
+        Returns:
+            SkillRecord: 技能记录，不存在时返回None
+        """
+        return self.skill_records.get(skill_name)
+        
+    def get_shop_catalog(self, shop_name):
+        """
+        获取编译后的商店目录
+        
+        Args:
+            shop_name (str): 商店名称
+            
+        Returns:
+            ShopCatalog: 商店目录，不存在时返回None
+        """
+        return self.shop_catalogs.get(shop_name)
+        
     def get_difficulty(self, difficulty_name):
         """
         获取难度配置
@@ -166,10 +421,7 @@ class ConfigManager:
         Returns:
             dict: 章节配置数据
         """
-        for chapter in self.story.get("chapters", []):
-            if chapter.get("id") == chapter_id:
-                return chapter
-        return {}
+        return self.chapters_by_id.get(chapter_id, {})
         
     def get_quest(self, chapter_id, quest_id):
         """
@@ -182,12 +434,32 @@ class ConfigManager:
         Returns:
             dict: 任务配置数据
         """
-        chapter = self.get_chapter(chapter_id)
-        if chapter:
-            for quest in chapter.get("quests", []):
-                if quest.get("id") == quest_id:
-                    return quest
-        return {}
+        return self.quests_by_chapter.get((chapter_id, quest_id), {})
+        
+    def get_quest_by_id(self, quest_id):
+        """
+        按任务ID获取任务配置，不限定章节
+        
+        Args:
+            quest_id (str): 任务ID
+            
+        Returns:
+            dict: 任务配置数据
+        """
+        return self.quests_by_id.get(quest_id, {})
+        
+    def get_npc(self, chapter_id, npc_id):
+        """
+        获取特定章节中的NPC配置
+        
+        Args:
+            chapter_id (int): 章节ID
+            npc_id (str): NPC ID
+            
+        Returns:
+            dict: NPC配置数据
+        """
+        return self.npcs_by_chapter.get((chapter_id, npc_id), {})
         
     def get_shop(self, shop_name):
         """
@@ -0,0 +1,154 @@
+class FrozenRecord:
+    """
+    只读配置记录基类，字段保存在__slots__中，创建后不可修改
+    """
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} 是只读记录")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} 是只读记录")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.key!r})"
+
+
+class ItemRecord(FrozenRecord):
+    """
+    编译后的物品配置
+
+    inventory_entry 与 shop_entry 是预先构建好的响应数据，多个请求共享，使用方不得修改。
+    """
+    __slots__ = (
+        "key",
+        "name",
+        "type",
+        "effect",
+        "value",
+        "price",
+        "description",
+        "stat_bonus",  # ((属性名, 加成), ...)
+        "inventory_entry",
+        "shop_entry"
+    )
+
+
+class SkillRecord(FrozenRecord):
+    """
+    编译后的技能配置
+    """
+    __slots__ = (
+        "key",
+        "name",
+        "type",
+        "power",
+        "mp_cost"
+    )
+
+
+class ShopCatalog(FrozenRecord):
+    """
+    编译后的商店目录，payload 可直接作为响应返回，使用方不得修改
+    """
+    __slots__ = (
+        "key",
+        "name",
+        "description",
+        "item_keys",  # frozenset，商店出售的物品名称
+        "payload"
+    )
+
+
+def compile_item(item_name, item):
+    """
+    将物品配置编译为只读记录
+
+    Args:
+        item_name (str): 物品名称
+        item (dict): 物品配置数据
+
+    Returns:
+        ItemRecord: 物品记录
+    """
+    display_name = item.get("name", item_name)
+    item_type = item.get("type", "")
+    description = item.get("description", "")
+    stat_bonus = item.get("stat_bonus", {})
+    price = item.get("price", 0)
+    return ItemRecord(
+        key=item_name,
+        name=display_name,
+        type=item_type,
+        effect=item.get("effect"),
+        value=item.get("value", 0),
+        price=price,
+        description=description,
+        stat_bonus=tuple(stat_bonus.items()),
+        inventory_entry={
+            "name": item_name,
+            "display_name": display_name,
+            "type": item_type,
+            "description": description,
+            "stat_bonus": stat_bonus
+        },
+        shop_entry={
+            "name": item_name,
+            "display_name": display_name,
+            "price": price,
+            "description": description,
+            "type": item_type
+        }
+    )
+
+
+def compile_skill(skill_name, skill):
+    """
+    将技能配置编译为只读记录
+
+    Args:
+        skill_name (str): 技能名称
+        skill (dict): 技能配置数据
+
+    Returns:
+        SkillRecord: 技能记录
+    """
+    return SkillRecord(
+        key=skill_name,
+        name=skill.get("name", skill_name),
+        type=skill.get("type", "physical"),
+        power=skill.get("power", 0),
+        mp_cost=skill.get("mp_cost", 0)
+    )
+
+
+def compile_shop(shop_name, shop, item_records):
+    """
+    将商店配置编译为商品目录，商品列表中跳过不存在的物品
+
+    Args:
+        shop_name (str): 商店名称
+        shop (dict): 商店配置数据
+        item_records (dict): 物品名称 -> ItemRecord
+
+    Returns:
+        ShopCatalog: 商店目录
+    """
+    item_keys = shop.get("items", [])
+    name = shop.get("name", shop_name)
+    description = shop.get("description", "")
+    return ShopCatalog(
+        key=shop_name,
+        name=name,
+        description=description,
+        item_keys=frozenset(item_keys),
+        payload={
+            "name": name,
+            "description": description,
+            "items": [item_records[key].shop_entry for key in item_keys if key in item_records]
+        }
+    )
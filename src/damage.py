@@ -0,0 +1,64 @@
+"""
+伤害结算规则：max(1, 攻击 - 防御//2)，在80%~120%之间随机浮动，暴击时伤害翻倍
+
+roll_damage 结算一次攻击，供Battle使用；roll_damage_batch 用NumPy一次结算一组攻击，
+供模拟器的向量化模式使用。两者的随机数来源不同，逐次结果不同，但分布一致。
+NumPy是可选依赖，未安装时HAS_NUMPY为False，只能使用单次结算。
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAS_NUMPY = np is not None
+
+
+def roll_damage(rng, attack, defense, crit_chance):
+    """
+    结算一次攻击的伤害
+
+    Args:
+        rng (random.Random): 随机数生成器
+        attack (int): 攻击力，技能攻击时已加上技能威力
+        defense (int): 目标的防御力
+        crit_chance (int): 暴击率（百分比）
+
+    Returns:
+        tuple: (伤害, 是否暴击)
+    """
+    # 随机数的使用顺序与原先的战斗代码一致：先判定暴击，再计算浮动
+    is_critical = rng.randint(1, 100) <= crit_chance
+    damage = max(1, attack - defense // 2)
+    damage = rng.randint(int(damage * 0.8), int(damage * 1.2))
+    if is_critical:
+        damage *= 2
+    return damage, is_critical
+
+
+def roll_damage_batch(rng, attack, defense, crit_chance):
+    """
+    一次结算一组攻击的伤害
+
+    Args:
+        rng (numpy.random.Generator): NumPy随机数生成器
+        attack (numpy.ndarray | int): 每次攻击的攻击力
+        defense (numpy.ndarray | int): 每次攻击目标的防御力
+        crit_chance (numpy.ndarray | int): 每次攻击的暴击率（百分比）
+
+    Returns:
+        tuple: (伤害数组, 是否暴击数组)
+    """
+    if np is None:
+        raise RuntimeError("向量化伤害结算需要安装NumPy")
+    attack, defense = np.broadcast_arrays(np.asarray(attack, dtype=np.int64),
+                                          np.asarray(defense, dtype=np.int64))
+    size = attack.shape
+    is_critical = rng.integers(1, 101, size=size) <= crit_chance
+    damage = np.maximum(1, attack - defense // 2)
+    # 与int()一致向零取整，伤害总是正数
+    low = (damage * 0.8).astype(np.int64)
+    high = (damage * 1.2).astype(np.int64)
+    damage = rng.integers(low, high, endpoint=True)
+    damage = np.where(is_critical, damage * 2, damage)
+    return damage, is_critical
@@ -1,10 +1,15 @@
 import os
 import sys
 import json
-from .config_manager import ConfigManager
-from .character import Player, Enemy
+from .config_cache import shared_config_cache
+from .save_writer import shared_save_writer
+from .character import Player
 from .battle import Battle
+from .battle_events import ConsoleSink
 from .quest import Quest
+from .save_codec import (
+    CODEC_VERSION, encode_player, decode_player, encode_quests, decode_quests, save_version
+)
 
 class Game:
     """
@@ -17,14 +22,15 @@ class Game:
         Args:
             config_dir (str): 配置文件目录路径
         """
-        self.config_manager = ConfigManager(config_dir)
-        self.config_manager.load_all_configs()
+        # 与Web应用共用进程内的配置缓存，相同内容的配置只解析一次
+        self.config_manager = shared_config_cache.get(config_dir)
         self.player = None
         self.current_chapter = 1
         self.difficulty = "normal"
         self.game_state = "menu"  # menu, playing, battle, game_over
         self.quests = {}  # 存储激活的任务
         self.completed_quests = set()  # 存储已完成的任务ID
+        self.battle_events = ConsoleSink()  # 命令行游戏将战斗事件打印到控制台
         
     def start(self):
         """
@@ -200,14 +206,14 @@ class Game:
             return False
             
         # 查找任务数据
-        for quest_data in chapter.get("quests", []):
-            if quest_data.get("id") == quest_id:
-                # 创建任务实例
-                quest = Quest(quest_data)
-                self.quests[quest_id] = quest
-                return True
-                
-        return False
+        quest_data = self.config_manager.get_quest(self.current_chapter, quest_id)
+        if not quest_data:
+            return False
+            
+        # 创建任务实例
+        quest = Quest(quest_data)
+        self.quests[quest_id] = quest
+        return True
         
     def update_quest_progress(self, enemy_name):
         """
@@ -393,12 +399,7 @@ class Game:
         Args:
             chapter (dict): 章节数据
         """
-        npcs = chapter.get("npcs", [])
-        village_elder = None
-        for npc in npcs:
-            if npc.get("id") == "village_elder":
-                village_elder = npc
-                break
+        village_elder = self.config_manager.get_npc(chapter.get("id"), "village_elder")
                 
         if not village_elder:
             print("未找到村长数据!")
@@ -423,12 +424,7 @@ class Game:
             if available_quests:
                 for i, quest_id in enumerate(available_quests, 1):
                     # 获取任务数据
-                    quest_data = None
-                    for q in chapter.get("quests", []):
-                        if q.get("id") == quest_id:
-                            quest_data = q
-                            break
-                            
+                    quest_data = self.config_manager.get_quest(chapter.get("id"), quest_id)
                     if quest_data:
                         print(f"{i}. {quest_data.get('name', quest_id)}")
                         print(f"   {quest_data.get('description', '')}")
@@ -439,11 +435,8 @@ class Game:
                 if quest_choice <= len(available_quests):
                     selected_quest_id = available_quests[quest_choice - 1]
                     if self.accept_quest(selected_quest_id):
-                        quest_name = None
-                        for q in chapter.get("quests", []):
-                            if q.get("id") == selected_quest_id:
-                                quest_name = q.get("name", selected_quest_id)
-                                break
+                        quest_data = self.config_manager.get_quest(chapter.get("id"), selected_quest_id)
+                        quest_name = quest_data.get("name", selected_quest_id)
                         print(f"\n已接受任务: {quest_name}")
             else:
                 print("当前没有可接任务")
@@ -592,25 +585,22 @@ class Game:
             save_name = "save"
         
         try:
-            # 创建保存目录
             save_dir = "saves"
-            if not os.path.exists(save_dir):
-                os.makedirs(save_dir)
             
             # 准备保存数据
             save_data = {
-                "player": self._serialize_player(),
+                "version": CODEC_VERSION,
+                "player": encode_player(self.player),
                 "current_chapter": self.current_chapter,
                 "difficulty": self.difficulty,
                 "game_state": self.game_state,
-                "quests": self._serialize_quests(),
+                "quests": encode_quests(self.quests),
                 "completed_quests": list(self.completed_quests)
             }
             
-            # 保存到文件
+            # 写入临时文件后原子替换，写入中途失败不会损坏原存档
             save_path = os.path.join(save_dir, f"{save_name}.json")
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(save_data, f, ensure_ascii=False, indent=2)
+            shared_save_writer.write_json(save_path, save_data)
             
             print(f"游戏已保存到: {save_path}")
         except Exception as e:
@@ -659,11 +649,11 @@ class Game:
                 save_data = json.load(f)
             
             # 恢复游戏状态
-            self._deserialize_player(save_data["player"])
+            self.player = decode_player(save_data["player"], self.config_manager)
             self.current_chapter = save_data["current_chapter"]
             self.difficulty = save_data["difficulty"]
             self.game_state = save_data["game_state"]
-            self._deserialize_quests(save_data["quests"])
+            self.quests = decode_quests(save_data["quests"], self.config_manager, save_version(save_data))
             self.completed_quests = set(save_data["completed_quests"])
             
             print(f"游戏 '{save_name}' 加载成功!")
@@ -674,122 +664,19 @@ class Game:
             input()
             return False
     
-    def _serialize_player(self):
-        """序列化玩家数据"""
-        if not self.player:
-            return None
-            
-        return {
-            "name": self.player.name,
-            "class_name": self.player.class_name,
-            "level": self.player.level,
-            "exp": self.player.exp,
-            "exp_to_next_level": getattr(self.player, 'exp_to_next_level', 100),
-            "hp": self.player.hp,
-            "max_hp": self.player.max_hp,
-            "mp": self.player.mp,
-            "max_mp": self.player.max_mp,
-            "atk": self.player.atk,
-            "matk": self.player.matk,
-            "defense": self.player.defense,
-            "mdef": self.player.mdef,
-            "agi": self.player.agi,
-            "gold": self.player.gold,
-            "skills": self.player.skills,
-            "items": self.player.items,
-            "stat_points": getattr(self.player, 'stat_points', 0),
-            "equipped_items": getattr(self.player, 'equipped_items', {})
-        }
-    
-    def _deserialize_player(self, player_data):
-        """反序列化玩家数据"""
-        if not player_data:
-            self.player = None
-            return
-            
-        # 获取职业配置
-        char_class = self.config_manager.get_class(player_data["class_name"])
-        if not char_class:
-            # 如果职业不存在，创建一个基础角色
-            self.player = Player(player_data["name"], {
-                "name": player_data["class_name"],
-                "base_stats": {
-                    "hp": player_data["max_hp"],
-                    "mp": player_data["max_mp"],
-                    "atk": player_data["atk"],
-                    "matk": player_data["matk"],
-                    "def": player_data["defense"],
-                    "mdef": player_data["mdef"],
-                    "agi": player_data["agi"]
-                },
-                "skills": player_data["skills"]
-            })
-        else:
-            self.player = Player(player_data["name"], char_class)
-            
-        # 恢复玩家状态
-        self.player.level = player_data["level"]
-        self.player.exp = player_data["exp"]
-        self.player.exp_to_next_level = player_data.get("exp_to_next_level", 100)
-        self.player.hp = player_data["hp"]
-        self.player.max_hp = player_data["max_hp"]
-        self.player.mp = player_data["mp"]
-        self.player.max_mp = player_data["max_mp"]
-        self.player.atk = player_data["atk"]
-        self.player.matk = player_data["matk"]
-        self.player.defense = player_data["defense"]
-        self.player.mdef = player_data["mdef"]
-        self.player.agi = player_data["agi"]
-        self.player.gold = player_data["gold"]
-        self.player.skills = player_data["skills"]
-        self.player.items = player_data["items"]
-        self.player.stat_points = player_data.get("stat_points", 0)
-        self.player.equipped_items = player_data.get("equipped_items", {})
-    
-    def _serialize_quests(self):
-        """序列化任务数据"""
-        serialized_quests = {}
-        for quest_id, quest in self.quests.items():
-            serialized_quests[quest_id] = {
-                "id": quest.id,
-                "name": quest.name,
-                "description": quest.description,
-                "target_enemy": getattr(quest, 'target_enemy', ''),
-                "required_count": getattr(quest, 'required_count', 0),
-                "current_count": getattr(quest, 'current_count', 0),
-                "reward": getattr(quest, 'reward', {}),
-                "completed": getattr(quest, 'completed', False)
-            }
-        return serialized_quests
-    
-    def _deserialize_quests(self, quests_data):
-        """反序列化任务数据"""
-        self.quests = {}
-        for quest_id, quest_data in quests_data.items():
-            quest = Quest({
-                "id": quest_data["id"],
-                "name": quest_data["name"],
-                "description": quest_data["description"],
-                "target": quest_data["target_enemy"],
-                "required_count": quest_data["required_count"],
-                "reward": quest_data["reward"]
-            })
-            quest.current_count = quest_data["current_count"]
-            quest.completed = quest_data["completed"]
-            self.quests[quest_id] = quest
-    
     def start_battle_example(self):
         """
         启动战斗示例
         """
-        # 创建一个哥布林敌人
-        goblin_config = self.config_manager.get_enemy("goblin")
-        if not goblin_config:
+        # 从原型池复制一个按当前难度调整好的哥布林
+        enemy = self.config_manager.spawn_enemy("goblin", self.difficulty)
+        if enemy is None:
             print("敌人配置错误!")
             return
             
-        enemy = Enemy(goblin_config)
-        battle = Battle(self.player, enemy, self.config_manager)
+        battle = Battle(
+            self.player, enemy, self.config_manager, self.difficulty, event_sink=self.battle_events
+        )
         
         # 开始战斗
         result = battle.start_battle()
@@ -819,7 +706,7 @@ class Game:
             
             # 显示战斗日志
             print("战斗日志:")
-            for log_entry in battle.battle_log[-5:]:  # 只显示最近5条日志
+            for log_entry in battle.battle_log.tail(5):  # 只显示最近5条日志
                 print(f"> {log_entry}")
             print("=" * 30)
             
@@ -857,8 +744,8 @@ class Game:
             if not battle.is_active or not battle.player.is_alive() or not battle.enemy.is_alive():
                 # 检查是否击败了敌人
                 if not battle.enemy.is_alive():
-                    # 更新任务进度
-                    self.update_quest_progress(battle.enemy.name)
+                    # 更新任务进度，任务目标使用敌人在配置中的ID
+                    self.update_quest_progress(battle.enemy.key or battle.enemy.name)
                     
                 # 显示最终结果
                 self.clear_screen()
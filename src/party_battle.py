@@ -0,0 +1,384 @@
+"""
+多人战斗：玩家队伍与敌人队伍之间的N对M战斗
+
+行动顺序由TurnScheduler按敏捷度决定，每次行动只需要 O(log n) 找到下一个行动者，
+选择目标和移除被击败的参战者都是 O(1)，数百人的战斗也不需要遍历所有参战者。
+一对一的Battle仍保持玩家、敌人交替行动，已保存的战斗记录可以按原顺序重放。
+
+Web接口 /api/party_battle 让当前玩家对战一组敌人，模拟器的 --party-size 与
+--enemy-count 参数用多人战斗统计胜率。
+"""
+
+import random
+import uuid
+
+from .battle_events import INFO
+from .battle_log import BattleLog
+from .battle_policy import attack_only
+from .battle_replay import ACTIVE, ESCAPE, LOSS, WIN
+from .damage import roll_damage
+from .turn_scheduler import TurnScheduler
+
+PLAYERS = "players"
+ENEMIES = "enemies"
+
+# 暴击率（百分比）与一对一战斗一致
+CRIT_CHANCE = {
+    (PLAYERS, "attack"): 10,
+    (PLAYERS, "skill"): 15,
+    (ENEMIES, "attack"): 5,
+    (ENEMIES, "skill"): 10
+}
+
+
+class _Side:
+    """
+    一方存活的参战者，移除和随机选择目标都是 O(1)
+    """
+    __slots__ = ("members", "_index")
+
+    def __init__(self, members):
+        self.members = [member for member in members if member.is_alive()]
+        self._index = {member: i for i, member in enumerate(self.members)}
+
+    def remove(self, member):
+        # 用最后一个参战者填补空位
+        i = self._index.pop(member, None)
+        if i is None:
+            return False
+        last = self.members.pop()
+        if last is not member:
+            self.members[i] = last
+            self._index[last] = i
+        return True
+
+    def choice(self, rng):
+        return rng.choice(self.members)
+
+    def __contains__(self, member):
+        return member in self._index
+
+    def __len__(self):
+        return len(self.members)
+
+
+class PartyBattle:
+    """
+    多人战斗类，玩家队伍的行动由策略函数决定，敌人使用与一对一战斗相同的简单AI
+    """
+    def __init__(self, players, enemies, config_manager, difficulty="normal", event_sink=None, rng=None,
+                 seed=None):
+        """
+        初始化多人战斗
+
+        Args:
+            players (list): 玩家队伍
+            enemies (list): 敌人队伍，通常由ConfigManager.spawn_enemy创建
+            config_manager (ConfigManager): 配置管理器
+            difficulty (str): 游戏难度
+            event_sink (EventSink): 战斗事件输出端，None表示不输出
+            rng (random.Random): 外部随机数生成器
+            seed (int): 战斗随机数种子，不传入rng时使用，None表示随机生成
+        """
+        self.players = list(players)
+        self.enemies = list(enemies)
+        self.config_manager = config_manager
+        self.difficulty = difficulty
+        self.battle_id = uuid.uuid4().hex
+        self.battle_log = BattleLog()
+        self.event_sink = event_sink
+        if rng is None:
+            self.seed = seed if seed is not None else random.getrandbits(53)
+            self.rng = random.Random(self.seed)
+        else:
+            self.seed = None
+            self.rng = rng
+        self.is_active = True
+        self.defeated = []  # 被击败的敌人，战斗胜利后结算奖励
+
+        self.apply_difficulty_modifiers()
+
+        self.labels = self._make_labels()
+        self.sides = {PLAYERS: _Side(self.players), ENEMIES: _Side(self.enemies)}
+        self._side_of = dict.fromkeys(self.players, PLAYERS)
+        self._side_of.update(dict.fromkeys(self.enemies, ENEMIES))
+        self.scheduler = TurnScheduler()
+        # 玩家队伍先排入，行动时间相同时玩家先行动
+        for member in self.sides[PLAYERS].members + self.sides[ENEMIES].members:
+            self.scheduler.add(member)
+
+    def _make_labels(self):
+        # 同名的参战者在日志中加上编号，例如 哥布林1、哥布林2
+        counts = {}
+        for member in self.players + self.enemies:
+            counts[member.name] = counts.get(member.name, 0) + 1
+        numbers = {}
+        labels = {}
+        for member in self.players + self.enemies:
+            if counts[member.name] > 1:
+                numbers[member.name] = numbers.get(member.name, 0) + 1
+                labels[member] = f"{member.name}{numbers[member.name]}"
+            else:
+                labels[member] = member.name
+        return labels
+
+    def apply_difficulty_modifiers(self):
+        """
+        根据难度调整尚未调整过的敌人属性
+        """
+        difficulty_config = self.config_manager.get_difficulty(self.difficulty)
+        if not difficulty_config:
+            return
+        multiplier = difficulty_config.get("enemy_strength_multiplier", 1.0)
+        for enemy in self.enemies:
+            if enemy.scaled_for is None:
+                enemy.apply_strength_multiplier(multiplier, self.difficulty)
+
+    def start_battle(self):
+        """
+        开始战斗
+        """
+        self.add_to_log(f"{len(self.sides[ENEMIES])}个敌人向你的队伍冲了过来!")
+        self.add_to_log("战斗开始!")
+        if not self.sides[PLAYERS] or not self.sides[ENEMIES]:
+            self.end_battle()
+
+    def next_actor(self):
+        """
+        获取下一个行动的参战者
+
+        Returns:
+            Character: 行动者，战斗已结束时返回None
+        """
+        if not self.is_active:
+            return None
+        return self.scheduler.next()
+
+    def is_player_side(self, combatant):
+        """
+        判断参战者是否属于玩家队伍
+        """
+        return self._side_of[combatant] == PLAYERS
+
+    def opponents(self, combatant):
+        """
+        获取参战者的对方存活成员
+        """
+        return self.sides[ENEMIES if self._side_of[combatant] == PLAYERS else PLAYERS]
+
+    def take_turn(self, policy=attack_only):
+        """
+        进行一次行动：玩家队伍成员按策略行动，敌人由AI行动
+
+        Args:
+            policy (callable): 玩家队伍的战斗策略，见battle_policy
+
+        Returns:
+            Character: 本次行动的参战者，战斗已结束时返回None
+        """
+        actor = self.next_actor()
+        if actor is None:
+            return None
+        if self.is_player_side(actor):
+            self.act(actor, *policy(self, actor))
+        else:
+            self.enemy_action(actor)
+        return actor
+
+    def run(self, policy=attack_only, max_turns=None):
+        """
+        自动进行战斗直到一方全部被击败或达到行动次数上限
+
+        Args:
+            policy (callable): 玩家队伍的战斗策略
+            max_turns (int): 最多行动次数，None表示不限制
+
+        Returns:
+            int: 本次进行的行动次数
+        """
+        turns = 0
+        while self.is_active and (max_turns is None or turns < max_turns):
+            if self.take_turn(policy) is None:
+                break
+            turns += 1
+        return turns
+
+    def act(self, actor, action, skill_name=None, item_name=None, target=None):
+        """
+        执行参战者的行动
+
+        Args:
+            actor (Character): 行动者
+            action (str): 行动类型 (attack, skill, item, defend, escape)
+            skill_name (str): 技能名称（如果使用技能）
+            item_name (str): 道具名称（如果使用道具），None表示使用第一个道具
+            target (Character): 目标，None或目标已被击败时随机选择对方存活成员
+        """
+        if not self.is_active:
+            return
+        opponents = self.opponents(actor)
+        if target is None or target not in opponents:
+            target = opponents.choice(self.rng)
+        if action == "skill" and skill_name:
+            self.use_skill(actor, skill_name, target)
+        elif action == "item":
+            self.use_item(actor, item_name)
+        elif action == "defend":
+            self.add_to_log(f"{self.labels[actor]}采取了防御姿态!")
+        elif action == "escape":
+            self.escape(actor)
+        else:
+            self.attack(actor, target)
+        if not self.sides[PLAYERS] or not self.sides[ENEMIES]:
+            self.end_battle()
+
+    def enemy_action(self, enemy):
+        """
+        敌人行动，与一对一战斗相同：30%概率随机使用技能，否则普通攻击
+        """
+        if enemy.skills and self.rng.randint(1, 100) <= 30:
+            self.act(enemy, "skill", self.rng.choice(enemy.skills))
+        else:
+            self.act(enemy, "attack")
+
+    def attack(self, actor, target):
+        """
+        普通攻击
+        """
+        crit_chance = CRIT_CHANCE[(self._side_of[actor], "attack")]
+        self._hit(actor, target, actor.atk, target.defense, crit_chance)
+
+    def use_skill(self, actor, skill_name, target):
+        """
+        使用技能，技能不存在时普通攻击
+
+        Args:
+            actor (Character): 行动者
+            skill_name (str): 技能名称
+            target (Character): 攻击技能的目标
+        """
+        skill = self.config_manager.get_skill_record(skill_name)
+        if not skill:
+            self.attack(actor, target)
+            return
+        # 与一对一战斗一致，敌人使用技能不消耗魔法值
+        if self.is_player_side(actor) and not actor.use_mp(skill.mp_cost):
+            self.add_to_log(f"{self.labels[actor]}的魔法值不足!")
+            return
+
+        self.add_to_log(f"{self.labels[actor]}使用了{skill.name}!")
+        crit_chance = CRIT_CHANCE[(self._side_of[actor], "skill")]
+        if skill.type == "physical":
+            self._hit(actor, target, actor.atk + skill.power, target.defense, crit_chance)
+        elif skill.type == "magical":
+            self._hit(actor, target, actor.matk + skill.power, target.mdef, crit_chance, "魔法")
+        elif skill.type == "support" and skill_name == "heal":
+            actual_heal = actor.heal(skill.power)
+            self.add_to_log(f"{self.labels[actor]}恢复了{actual_heal}点生命值!")
+
+    def use_item(self, actor, item_name=None):
+        """
+        玩家队伍成员使用道具
+
+        Args:
+            actor (Player): 行动者
+            item_name (str): 道具名称，None表示使用第一个道具
+        """
+        label = self.labels[actor]
+        if not actor.items:
+            self.add_to_log(f"{label}没有任何道具!")
+            return
+        if item_name is None:
+            item_name = actor.items[0]
+        elif item_name not in actor.items:
+            self.add_to_log(f"{label}没有{item_name}!")
+            return
+        item = self.config_manager.get_item_record(item_name)
+        display_name = item.name if item else item_name
+        if actor.use_item(item_name, self.config_manager):
+            if item.type == "consumable":
+                actor.items.remove(item_name)
+            self.add_to_log(f"{label}使用了{display_name}!")
+        else:
+            self.add_to_log(f"{label}无法使用{display_name}!")
+
+    def escape(self, actor):
+        """
+        整个队伍尝试逃跑，成功率与一对一战斗相同
+        """
+        escape_chance = {"easy": 80, "hard": 50}.get(self.difficulty, 70)
+        if self.rng.randint(1, 100) <= escape_chance:
+            self.add_to_log("你的队伍成功逃跑了!")
+            self.is_active = False
+        else:
+            self.add_to_log("逃跑失败!")
+
+    def _hit(self, actor, target, attack, defense, crit_chance, damage_kind=""):
+        damage, is_critical = roll_damage(self.rng, attack, defense, crit_chance)
+        if is_critical:
+            self.add_to_log(f"{self.labels[actor]}的攻击暴击了!")
+        actual_damage = target.take_damage(damage)
+        self.add_to_log(f"{self.labels[actor]}对{self.labels[target]}造成了{actual_damage}点{damage_kind}伤害!")
+        if not target.is_alive():
+            self._defeat(target)
+
+    def _defeat(self, combatant):
+        # 被击败的参战者离开行动队列
+        self.scheduler.remove(combatant)
+        side = self._side_of[combatant]
+        self.sides[side].remove(combatant)
+        self.add_to_log(f"{self.labels[combatant]}被击败了!")
+        if side == ENEMIES:
+            self.defeated.append(combatant)
+
+    def outcome(self):
+        """
+        获取战斗结果
+
+        Returns:
+            str: win、loss、escape 或 active（战斗尚未结束），与一对一战斗相同
+        """
+        if not self.sides[ENEMIES]:
+            return WIN
+        if not self.sides[PLAYERS]:
+            return LOSS
+        if not self.is_active:
+            return ESCAPE
+        return ACTIVE
+
+    def add_to_log(self, message, level=INFO):
+        """
+        添加战斗日志
+
+        Args:
+            message (str): 日志消息
+            level (int): 事件级别
+        """
+        self.battle_log.append(message)
+        if self.event_sink is not None:
+            self.event_sink.emit(level, self.battle_id, message)
+
+    def end_battle(self):
+        """
+        结束战斗，胜利时每个存活的队伍成员获得全部经验值和金币，掉落物品归第一个存活的成员
+        """
+        self.is_active = False
+        survivors = self.sides[PLAYERS].members
+        if not survivors:
+            self.add_to_log("你的队伍被击败了!")
+            return
+        if self.sides[ENEMIES]:
+            return
+        self.add_to_log("你的队伍击败了所有敌人!")
+        exp_reward = sum(enemy.exp_reward for enemy in self.defeated)
+        gold_reward = sum(enemy.gold_reward for enemy in self.defeated)
+        for player in survivors:
+            player.add_exp(exp_reward)
+            player.add_gold(gold_reward)
+        self.add_to_log(f"每位队员获得了{exp_reward}点经验值和{gold_reward}枚金币!")
+        looter = next(player for player in self.players if player in self.sides[PLAYERS])
+        for enemy in self.defeated:
+            for item_name in enemy.drop_items:
+                looter.items.append(item_name)
+                item = self.config_manager.get_item_record(item_name)
+                self.add_to_log(f"{self.labels[looter]}获得了{item.name if item else item_name}!")
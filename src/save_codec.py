@@ -0,0 +1,216 @@
+"""
+存档编解码：命令行游戏与Web应用共用的玩家与任务序列化
+
+编码与恢复函数在导入时按预先定义的字段元组生成。存档数据中的 version 字段记录编码版本：
+    1 旧版本，任务只保存了target_enemy/current_count，读取时从剧情配置恢复任务目标
+    2 当前版本，任务保存objective与progress
+"""
+
+from .character import Player
+from .quest import Quest
+
+CODEC_VERSION = 2
+
+# 玩家存档字段，顺序即存档中的键顺序
+PLAYER_FIELDS = (
+    "name",
+    "class_name",
+    "level",
+    "exp",
+    "exp_to_next_level",
+    "hp",
+    "max_hp",
+    "mp",
+    "max_mp",
+    "atk",
+    "matk",
+    "defense",
+    "mdef",
+    "agi",
+    "gold",
+    "skills",
+    "items",
+    "stat_points",
+    "equipped_items"
+)
+# 创建玩家对象后需要逐个恢复的字段
+_PLAYER_STATE_FIELDS = PLAYER_FIELDS[2:]
+# 旧存档可能缺少的字段及其默认值
+_PLAYER_DEFAULTS = {"exp_to_next_level": 100, "stat_points": 0, "equipped_items": {}}
+
+QUEST_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "objective",
+    "reward",
+    "completed",
+    "progress",
+    "required_count"
+)
+
+# 可变容器字段在编码和恢复时复制，存档数据与玩家对象互不影响
+_COPIED_FIELDS = {"skills": "list", "items": "list", "equipped_items": "dict"}
+
+
+def _compile_encoder(name, fields):
+    # 按字段元组生成与手写字典字面量等价的编码函数，避免逐字段循环的开销
+    items = ", ".join(
+        f"{field!r}: {_COPIED_FIELDS[field]}(obj.{field})" if field in _COPIED_FIELDS
+        else f"{field!r}: obj.{field}"
+        for field in fields
+    )
+    namespace = {}
+    exec(f"def {name}(obj):\n    return {{{items}}}\n", namespace)
+    return namespace[name]
+
+
+def _compile_restorer(name, fields):
+    # 按字段元组生成逐个赋值的恢复函数
+    lines = "".join(
+        f"    obj.{field} = {_COPIED_FIELDS[field]}(data[{field!r}])\n" if field in _COPIED_FIELDS
+        else f"    obj.{field} = data[{field!r}]\n"
+        for field in fields
+    )
+    namespace = {}
+    exec(f"def {name}(obj, data):\n{lines}", namespace)
+    return namespace[name]
+
+
+_encode_player = _compile_encoder("_encode_player", PLAYER_FIELDS)
+_restore_player = _compile_restorer("_restore_player", _PLAYER_STATE_FIELDS)
+_encode_quest = _compile_encoder("_encode_quest", QUEST_FIELDS)
+
+
+def encode_player(player):
+    """
+    序列化玩家
+
+    Args:
+        player (Player): 玩家对象
+
+    Returns:
+        dict: 玩家数据，没有玩家时返回None
+    """
+    if player is None:
+        return None
+    return _encode_player(player)
+
+
+def decode_player(player_data, config_manager):
+    """
+    反序列化玩家
+
+    Args:
+        player_data (dict): 玩家数据
+        config_manager (ConfigManager): 配置管理器
+
+    Returns:
+        Player: 玩家对象，没有玩家数据时返回None
+    """
+    if not player_data:
+        return None
+    if any(field not in player_data for field in _PLAYER_DEFAULTS):
+        player_data = {**_PLAYER_DEFAULTS, **player_data}
+
+    # 获取职业配置
+    char_class = config_manager.get_class(player_data["class_name"])
+    if not char_class:
+        # 如果职业不存在，创建一个基础角色
+        char_class = {
+            "name": player_data["class_name"],
+            "base_stats": {
+                "hp": player_data["max_hp"],
+                "mp": player_data["max_mp"],
+                "atk": player_data["atk"],
+                "matk": player_data["matk"],
+                "def": player_data["defense"],
+                "mdef": player_data["mdef"],
+                "agi": player_data["agi"]
+            },
+            "skills": player_data["skills"]
+        }
+    player = Player(player_data["name"], char_class)
+
+    # 恢复玩家状态
+    _restore_player(player, player_data)
+    return player
+
+
+def encode_quests(quests):
+    """
+    序列化进行中的任务
+
+    Args:
+        quests (dict): 任务ID -> Quest
+
+    Returns:
+        dict: 任务ID -> 任务数据
+    """
+    return {
+        quest_id: _encode_quest(quest)
+        for quest_id, quest in quests.items()
+    }
+
+
+def decode_quests(quests_data, config_manager, version=CODEC_VERSION):
+    """
+    反序列化进行中的任务
+
+    Args:
+        quests_data (dict): 任务ID -> 任务数据
+        config_manager (ConfigManager): 配置管理器，用于恢复旧存档的任务目标
+        version (int): 存档编码版本
+
+    Returns:
+        dict: 任务ID -> Quest
+    """
+    if version < 2:
+        return {
+            quest_id: _decode_quest_v1(quest_data, config_manager)
+            for quest_id, quest_data in quests_data.items()
+        }
+
+    quests = {}
+    for quest_id, quest_data in quests_data.items():
+        quest = Quest(quest_data)
+        quest.completed = quest_data["completed"]
+        quest.progress = quest_data["progress"]
+        quest.required_count = quest_data["required_count"]
+        quests[quest_id] = quest
+    return quests
+
+
+def _decode_quest_v1(quest_data, config_manager):
+    # 旧存档没有保存任务目标，优先使用剧情配置中的任务定义
+    config = config_manager.get_quest_by_id(quest_data["id"])
+    objective = config.get("objective")
+    if objective is None and quest_data.get("target_enemy"):
+        objective = {
+            "type": "defeat_enemies",
+            "enemy": quest_data["target_enemy"],
+            "count": quest_data["required_count"]
+        }
+    quest = Quest({
+        "id": quest_data["id"],
+        "name": quest_data["name"],
+        "description": quest_data["description"],
+        "objective": objective or {},
+        "reward": quest_data["reward"]
+    })
+    quest.completed = quest_data["completed"]
+    quest.progress = quest_data.get("current_count", 0)
+    return quest
+
+
+def save_version(save_data):
+    """
+    获取存档数据的编码版本
+
+    Args:
+        save_data (dict): 存档数据
+
+    Returns:
+        int: 编码版本，旧存档没有版本字段时为1
+    """
+    return save_data.get("version", 1)
@@ -0,0 +1,282 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from .save_journal import BASE_FILENAME, JOURNAL_FILENAME, load_state
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+INDEX_FILENAME = ".index.json"
+INDEX_JOURNAL_FILENAME = ".index.journal"
+INDEX_LOCK_FILENAME = ".index.lock"
+
+# 存档列表允许的排序字段
+SORT_FIELDS = ("modified_time", "name", "level", "chapter")
+
+
+def summarize_save(name, save_data, modified_time):
+    """
+    从存档数据中提取列表显示所需的信息
+
+    Args:
+        name (str): 存档槽位名称
+        save_data (dict): 存档数据
+        modified_time (float): 最后保存时间
+
+    Returns:
+        dict: 存档摘要
+    """
+    player = save_data.get("player") or {}
+    return {
+        "name": name,
+        "modified_time": modified_time,
+        "player_name": player.get("name"),
+        "level": player.get("level"),
+        "class_name": player.get("class_name"),
+        "chapter": save_data.get("current_chapter")
+    }
+
+
+class SaveIndex:
+    """
+    单个故事的存档索引，保存每个槽位的摘要，列出存档时不再逐个扫描存档目录
+
+    索引由存档目录下的完整快照.index.json和追加写入的日志.index.journal组成，
+    保存或删除存档时只向日志追加一行，日志积累到compact_every行后重新写入快照。
+    多个进程可能同时写入同一个故事的存档，所有读写都在文件锁内进行，并先读入其他
+    进程追加的日志或重写的快照，不会用自己的旧副本覆盖别人的槽位。
+    快照不存在时扫描一次存档目录重建。
+    """
+    def __init__(self, saves_dir, writer, compact_every=200):
+        """
+        初始化存档索引
+
+        Args:
+            saves_dir (str): 故事的存档目录
+            writer (SaveWriter): 写入索引文件使用的存档写入器
+            compact_every (int): 索引日志积累多少行后重新写入快照
+        """
+        self.saves_dir = saves_dir
+        self.writer = writer
+        self.compact_every = compact_every
+        self.path = os.path.join(saves_dir, INDEX_FILENAME)
+        self.journal_path = os.path.join(saves_dir, INDEX_JOURNAL_FILENAME)
+        self.lock_path = os.path.join(saves_dir, INDEX_LOCK_FILENAME)
+        self._entries = None  # 槽位名称 -> 摘要
+        self._base_signature = None  # 读入的快照文件 (inode, 修改时间)
+        self._journal_offset = 0  # 已读入的日志字节数
+        self._journal_lines = 0  # 快照之后的日志行数
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        # 进程间互斥，不支持fcntl的平台（如Windows）只有进程内的线程锁
+        if fcntl is None or not os.path.isdir(self.saves_dir):
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _refresh(self):
+        # 在文件锁内调用：读入快照（被重写过时重新读入）和之后新追加的日志
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            stat = None
+        signature = None if stat is None else (stat.st_ino, stat.st_mtime_ns)
+        if self._entries is None or signature != self._base_signature:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = {entry["name"]: entry for entry in json.load(f)}
+            except (OSError, ValueError, KeyError, TypeError):
+                self._entries = self._scan()
+                self._compact()
+                return
+            self._base_signature = signature
+            self._journal_offset = 0
+            self._journal_lines = 0
+
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._journal_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # 只处理完整的行，正在追加的半行留到下次读取
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+                name = record["name"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if record.get("entry") is None:
+                self._entries.pop(name, None)
+            else:
+                self._entries[name] = record["entry"]
+            self._journal_lines += 1
+        self._journal_offset += end
+
+    def _scan(self):
+        entries = {}
+        if not os.path.isdir(self.saves_dir):
+            return entries
+        for name in os.listdir(self.saves_dir):
+            slot_dir = os.path.join(self.saves_dir, name)
+            if not os.path.isdir(slot_dir):
+                continue
+            mtime = os.path.getmtime(slot_dir)
+            save_data = {}
+            for filename in (BASE_FILENAME, JOURNAL_FILENAME):
+                file_path = os.path.join(slot_dir, filename)
+                if os.path.exists(file_path):
+                    mtime = max(mtime, os.path.getmtime(file_path))
+            try:
+                save_data = load_state(slot_dir)[0] or {}
+            except (OSError, ValueError):
+                pass
+            entries[name] = summarize_save(name, save_data, mtime)
+        return entries
+
+    def _compact(self):
+        # 在文件锁内调用：写入完整快照并清空日志
+        if not self._entries and not os.path.isdir(self.saves_dir):
+            return
+        try:
+            self.writer.write_json(self.path, list(self._entries.values()))
+            stat = os.stat(self.path)
+        except OSError as e:
+            print(f"写入存档索引 {self.path} 失败: {e}")
+            return
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._base_signature = (stat.st_ino, stat.st_mtime_ns)
+        self._journal_offset = 0
+        self._journal_lines = 0
+
+    def _append(self, name, entry):
+        # 在文件锁内调用：向日志追加一行，entry为None表示删除槽位
+        if not os.path.isdir(self.saves_dir):
+            return
+        line = json.dumps({"name": name, "entry": entry}, ensure_ascii=False,
+                          separators=(",", ":")).encode("utf-8") + b"\n"
+        try:
+            with open(self.journal_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                if self.writer.durable:
+                    os.fsync(f.fileno())
+        except OSError as e:
+            print(f"写入存档索引日志 {self.journal_path} 失败: {e}")
+            return
+        self._journal_offset += len(line)
+        self._journal_lines += 1
+        if self._journal_lines >= self.compact_every:
+            self._compact()
+
+    def update(self, name, save_data, modified_time=None):
+        """
+        保存存档后更新索引
+
+        Args:
+            name (str): 存档槽位名称
+            save_data (dict): 存档数据
+            modified_time (float): 保存时间，默认为当前时间
+        """
+        entry = summarize_save(name, save_data, modified_time or time.time())
+        with self._lock, self._file_lock():
+            self._refresh()
+            self._entries[name] = entry
+            self._append(name, entry)
+
+    def remove(self, name):
+        """
+        删除存档后更新索引
+
+        Args:
+            name (str): 存档槽位名称
+        """
+        with self._lock, self._file_lock():
+            self._refresh()
+            if self._entries.pop(name, None) is not None:
+                self._append(name, None)
+
+    def rebuild(self):
+        """
+        重新扫描存档目录生成索引
+        """
+        with self._lock, self._file_lock():
+            self._entries = self._scan()
+            self._compact()
+
+    def list(self, sort="modified_time", descending=True, offset=0, limit=None, player_name=None):
+        """
+        分页列出存档摘要
+
+        Args:
+            sort (str): 排序字段，见SORT_FIELDS
+            descending (bool): 是否降序
+            offset (int): 跳过的条数
+            limit (int): 返回的最大条数，None表示全部
+            player_name (str): 只列出该玩家的存档
+
+        Returns:
+            tuple: (存档摘要列表, 存档总数)
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"不支持的排序字段: {sort}")
+        with self._lock, self._file_lock():
+            self._refresh()
+            entries = list(self._entries.values())
+        if player_name is not None:
+            entries = [entry for entry in entries if entry.get("player_name") == player_name]
+        # 缺少字段的旧存档排在最后
+        present = [entry for entry in entries if entry.get(sort) is not None]
+        missing = [entry for entry in entries if entry.get(sort) is None]
+        present.sort(key=lambda entry: entry[sort], reverse=descending)
+        ordered = present + missing
+        end = None if limit is None else offset + limit
+        return ordered[offset:end], len(ordered)
+
+
+class SaveIndexRegistry:
+    """
+    按存档目录缓存SaveIndex，同一进程中每个故事只有一个索引对象
+    """
+    def __init__(self, writer):
+        """
+        初始化存档索引注册表
+
+        Args:
+            writer (SaveWriter): 写入索引文件使用的存档写入器
+        """
+        self.writer = writer
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, saves_dir):
+        """
+        获取存档目录对应的索引
+
+        Args:
+            saves_dir (str): 故事的存档目录
+
+        Returns:
+            SaveIndex: 存档索引
+        """
+        key = os.path.abspath(saves_dir)
+        index = self._indexes.get(key)
+        if index is None:
+            with self._lock:
+                index = self._indexes.setdefault(key, SaveIndex(saves_dir, self.writer))
+        return index
@@ -0,0 +1,194 @@
+"""
+增量存档：存档目录中保存一份完整的基础快照(save.json)和一个追加写入的日志(save.journal)。
+
+每次保存只把与上次保存相比发生变化的字段追加到日志中，日志积累到一定条数后
+重新写入完整快照并清空日志。状态没有变化时不产生任何磁盘写入。
+
+日志每行是一个JSON对象：
+    {"gen": 快照代号, "set": [[路径, 值], ...], "unset": [路径, ...]}
+路径是由键组成的列表。快照中记录自己的代号(journal_generation)，加载时只回放
+代号一致的日志行，重写快照后残留的旧日志不会被误用。
+
+多个会话或进程可能写入同一个槽位。追加增量前先用slot_signature比较磁盘上的快照和
+日志与自己上次写入或读取时是否一致，不一致时改为写入完整快照，避免增量基于别人
+已经替换掉的快照而在加载时被丢弃。
+"""
+
+import json
+import os
+import uuid
+
+BASE_FILENAME = "save.json"
+JOURNAL_FILENAME = "save.journal"
+GENERATION_KEY = "journal_generation"
+
+
+def flatten_state(state, prefix=()):
+    """
+    将嵌套字典展开为 路径 -> 值，列表等非字典值作为整体
+
+    Args:
+        state (dict): 存档数据
+        prefix (tuple): 当前路径前缀
+
+    Returns:
+        dict: 路径元组 -> 值
+    """
+    flat = {}
+    for key, value in state.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and value:
+            flat.update(flatten_state(value, path))
+        else:
+            flat[path] = value
+    return flat
+
+
+def diff_states(old_flat, new_flat):
+    """
+    比较两份展开后的存档数据
+
+    Args:
+        old_flat (dict): 上次保存的数据
+        new_flat (dict): 当前数据
+
+    Returns:
+        tuple: (需要设置的[(路径, 值), ...], 需要删除的[路径, ...])
+    """
+    set_items = [(path, value) for path, value in new_flat.items()
+                 if path not in old_flat or old_flat[path] != value]
+    unset_paths = [path for path in old_flat if path not in new_flat]
+    return set_items, unset_paths
+
+
+def _apply_delta(state, set_items, unset_paths):
+    # 先删除再设置，字段由字典变为叶子值（或相反）时也能正确回放
+    for path in unset_paths:
+        node = state
+        for key in path[:-1]:
+            node = node.get(key)
+            if not isinstance(node, dict):
+                break
+        else:
+            node.pop(path[-1], None)
+    for path, value in set_items:
+        node = state
+        for key in path[:-1]:
+            if not isinstance(node.get(key), dict):
+                node[key] = {}
+            node = node[key]
+        node[path[-1]] = value
+
+
+def new_generation():
+    """
+    生成新的快照代号
+
+    Returns:
+        str: 快照代号
+    """
+    return uuid.uuid4().hex
+
+
+def slot_signature(save_dir):
+    """
+    获取槽位在磁盘上的状态：快照文件的inode与修改时间，以及日志的长度
+
+    快照总是写入临时文件后原子替换，被任何进程重写后inode都会变化；
+    日志长度变化说明有其他写入者追加了增量。
+
+    Args:
+        save_dir (str): 存档目录
+
+    Returns:
+        tuple: (快照inode, 快照修改时间, 日志字节数)，快照不存在时返回None
+    """
+    try:
+        base = os.stat(os.path.join(save_dir, BASE_FILENAME))
+    except FileNotFoundError:
+        return None
+    try:
+        journal_size = os.stat(os.path.join(save_dir, JOURNAL_FILENAME)).st_size
+    except FileNotFoundError:
+        journal_size = 0
+    return (base.st_ino, base.st_mtime_ns, journal_size)
+
+
+def write_base(save_dir, state, generation, writer):
+    """
+    写入完整快照并删除旧日志
+
+    Args:
+        save_dir (str): 存档目录
+        state (dict): 存档数据
+        generation (str): 快照代号
+        writer (SaveWriter): 存档写入器
+    """
+    data = dict(state)
+    data[GENERATION_KEY] = generation
+    writer.write_json(os.path.join(save_dir, BASE_FILENAME), data)
+    try:
+        os.remove(os.path.join(save_dir, JOURNAL_FILENAME))
+    except FileNotFoundError:
+        pass
+
+
+def append_delta(save_dir, generation, set_items, unset_paths, durable=True):
+    """
+    向日志追加一次增量
+
+    Args:
+        save_dir (str): 存档目录
+        generation (str): 当前快照代号
+        set_items (list): 需要设置的(路径, 值)
+        unset_paths (list): 需要删除的路径
+        durable (bool): 是否在返回前调用fsync
+    """
+    line = json.dumps({
+        "gen": generation,
+        "set": [[list(path), value] for path, value in set_items],
+        "unset": [list(path) for path in unset_paths]
+    }, ensure_ascii=False, separators=(",", ":"))
+    with open(os.path.join(save_dir, JOURNAL_FILENAME), "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+        f.flush()
+        if durable:
+            os.fsync(f.fileno())
+
+
+def load_state(save_dir):
+    """
+    读取快照并回放日志
+
+    Args:
+        save_dir (str): 存档目录
+
+    Returns:
+        tuple: (存档数据, 快照代号, 回放的日志条数)，存档不存在时返回(None, None, 0)
+    """
+    base_path = os.path.join(save_dir, BASE_FILENAME)
+    if not os.path.exists(base_path):
+        return None, None, 0
+    with open(base_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    generation = state.pop(GENERATION_KEY, None)
+
+    applied = 0
+    journal_path = os.path.join(save_dir, JOURNAL_FILENAME)
+    if generation is not None and os.path.exists(journal_path):
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 写入中途崩溃留下的不完整行，之后的内容都不可信
+                    break
+                if entry.get("gen") != generation:
+                    continue
+                _apply_delta(
+                    state,
+                    [(tuple(path), value) for path, value in entry.get("set", [])],
+                    [tuple(path) for path in entry.get("unset", [])]
+                )
+                applied += 1
+    return state, generation, applied
@@ -0,0 +1,251 @@
+import collections
+import itertools
+import threading
+import time
+
+# 存档票据的状态
+PENDING = "pending"  # 排队等待写入
+WRITING = "writing"  # 正在写入
+DURABLE = "durable"  # 已写入磁盘
+FAILED = "failed"  # 写入失败
+UNKNOWN = "unknown"  # 未知票据或记录已过期
+
+
+class _SlotJob:
+    """
+    某个存档槽位等待执行的写入，同一槽位的多次提交合并为一次
+    """
+    __slots__ = ("key", "job", "tickets")
+
+    def __init__(self, key, job, ticket):
+        self.key = key
+        self.job = job
+        self.tickets = [ticket]
+
+
+class SaveQueue:
+    """
+    后写式存档队列：请求线程提交写入任务后立即拿到票据返回，由后台线程成批执行
+
+    后台线程每次取出所有等待中的槽位，交给线程池同时写入，同一批写入可以由
+    存档写入器合并刷盘。同一槽位尚未开始写入的任务只保留最新的一个，之前的票据
+    随它一起完成。任务的返回值随票据保存，提交方在之后的请求中用result取回，
+    后台线程不修改提交方的对象。队列已满时提交方阻塞等待，直到后台线程腾出空间。
+    """
+    def __init__(self, max_pending=256, history_size=10000, workers=8):
+        """
+        初始化存档队列
+
+        Args:
+            max_pending (int): 最多有多少个槽位同时等待写入
+            history_size (int): 保留多少个已完成票据的状态
+            workers (int): 同时写入的槽位数
+        """
+        self.max_pending = max(1, int(max_pending))
+        self.history_size = history_size
+        self.workers = max(1, int(workers))
+        self._cond = threading.Condition()
+        self._pending = collections.OrderedDict()  # 槽位 -> _SlotJob
+        self._writing = {}  # 槽位 -> 正在写入的_SlotJob
+        self._tickets = {}  # 未完成的票据 -> 状态
+        self._history = collections.OrderedDict()  # 已完成的票据 -> (状态, 任务返回值)
+        self._counter = itertools.count(1)
+        self._worker = None
+        self.batches = 0
+        self.max_batch = 0
+        self.submitted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.failed = 0
+        self.blocked = 0
+        self.total_blocked_seconds = 0.0
+
+    def submit(self, key, job):
+        """
+        提交写入任务
+
+        Args:
+            key (str): 存档槽位，相同槽位的任务会合并
+            job (callable): 执行写入的函数，返回False或抛出异常表示失败，
+                其他返回值随票据保存，可用result取回
+
+        Returns:
+            int: 票据编号，用于查询写入状态
+        """
+        with self._cond:
+            ticket = next(self._counter)
+            self.submitted += 1
+            pending = self._pending.get(key)
+            if pending is not None:
+                # 尚未开始写入，用新的状态替换旧的状态
+                pending.job = job
+                pending.tickets.append(ticket)
+                self._tickets[ticket] = PENDING
+                self.coalesced += 1
+                return ticket
+
+            if len(self._pending) >= self.max_pending:
+                self.blocked += 1
+                start = time.perf_counter()
+                while len(self._pending) >= self.max_pending:
+                    self._cond.wait()
+                self.total_blocked_seconds += time.perf_counter() - start
+                # 等待期间同一槽位可能已被其他线程提交
+                pending = self._pending.get(key)
+                if pending is not None:
+                    pending.job = job
+                    pending.tickets.append(ticket)
+                    self._tickets[ticket] = PENDING
+                    self.coalesced += 1
+                    return ticket
+
+            self._pending[key] = _SlotJob(key, job, ticket)
+            self._tickets[ticket] = PENDING
+            self._ensure_worker()
+            self._cond.notify_all()
+            return ticket
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="save-queue", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # 取出所有等待中的槽位作为一批，槽位各不相同，可以同时写入
+                batch = list(self._pending.values())
+                self._pending.clear()
+                for slot_job in batch:
+                    self._writing[slot_job.key] = slot_job
+                    for ticket in slot_job.tickets:
+                        self._tickets[ticket] = WRITING
+                self.batches += 1
+                self.max_batch = max(self.max_batch, len(batch))
+                # 腾出了队列空间，唤醒被阻塞的提交方
+                self._cond.notify_all()
+
+            # 批次分给若干线程同时写入，当前线程负责第一份。不使用ThreadPoolExecutor：
+            # 它在解释器退出时先于atexit关闭，退出前写回会话存档时无法再提交任务
+            threads = min(self.workers, len(batch))
+            helpers = [
+                threading.Thread(target=self._execute_all, args=(batch[i::threads],),
+                                 name="save-writer", daemon=True)
+                for i in range(1, threads)
+            ]
+            for helper in helpers:
+                helper.start()
+            self._execute_all(batch[0::threads])
+            for helper in helpers:
+                helper.join()
+
+    def _execute_all(self, slot_jobs):
+        for slot_job in slot_jobs:
+            self._execute(slot_job)
+
+    def _execute(self, slot_job):
+        try:
+            result = slot_job.job()
+            ok = result is not False
+        except Exception as e:
+            print(f"存档 {slot_job.key} 写入失败: {e}")
+            result = None
+            ok = False
+
+        with self._cond:
+            del self._writing[slot_job.key]
+            state = DURABLE if ok else FAILED
+            if ok:
+                self.written += 1
+            else:
+                self.failed += 1
+            for ticket in slot_job.tickets:
+                self._tickets.pop(ticket, None)
+                self._history[ticket] = (state, result if ok else None)
+            while len(self._history) > self.history_size:
+                self._history.popitem(last=False)
+            self._cond.notify_all()
+
+    def status(self, ticket):
+        """
+        查询票据的写入状态
+
+        Args:
+            ticket (int): 票据编号
+
+        Returns:
+            str: pending、writing、durable、failed 或 unknown
+        """
+        return self.result(ticket)[0]
+
+    def result(self, ticket):
+        """
+        查询票据的写入状态和任务的返回值
+
+        Args:
+            ticket (int): 票据编号
+
+        Returns:
+            tuple: (状态, 返回值)，写入尚未成功完成时返回值为None
+        """
+        with self._cond:
+            if ticket in self._tickets:
+                return self._tickets[ticket], None
+            return self._history.get(ticket, (UNKNOWN, None))
+
+    def wait(self, key, timeout=None):
+        """
+        等待某个槽位已提交的写入全部完成
+
+        Args:
+            key (str): 存档槽位
+            timeout (float): 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            bool: 写入已完成返回True，超时返回False
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: key not in self._pending and key not in self._writing,
+                timeout
+            )
+
+    def flush(self, timeout=None):
+        """
+        等待队列中的所有写入完成，进程退出前调用
+
+        Args:
+            timeout (float): 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            bool: 队列已清空返回True，超时返回False
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._writing, timeout
+            )
+
+    def stats(self):
+        """
+        获取队列统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "writing": len(self._writing),
+                "max_pending": self.max_pending,
+                "workers": self.workers,
+                "batches": self.batches,
+                "max_batch": self.max_batch,
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "written": self.written,
+                "failed": self.failed,
+                "blocked": self.blocked,
+                "total_blocked_seconds": self.total_blocked_seconds
+            }
@@ -0,0 +1,463 @@
+"""
+存档存储引擎：GameManager通过统一的接口保存、读取、列出和删除存档
+
+json   每个槽位一个目录(story-list/<游戏ID>/saves/<槽位>/)，保存快照与增量日志
+sqlite 所有存档保存在一个WAL模式的SQLite数据库中，按游戏和玩家建立索引
+
+在项目根目录下运行 python -m src.save_storage migrate [--db 数据库路径] [游戏ID...]
+可以把已有的JSON存档导入SQLite数据库。
+"""
+
+import abc
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from .save_writer import shared_save_writer
+from .save_index import SaveIndexRegistry, summarize_save, SORT_FIELDS
+from .save_journal import (
+    flatten_state, diff_states, new_generation, write_base, append_delta, load_state, slot_signature
+)
+
+
+class SaveStorage(abc.ABC):
+    """
+    存档存储引擎接口
+
+    write与read之间传递的slot_state是引擎私有的槽位状态，记录上次写入或读取时
+    磁盘上的内容，引擎据此跳过没有变化的写入或只写入增量。调用方只负责保存并在
+    下次写入同一槽位时原样传回。
+    """
+    def slot_key(self, game_id, save_name):
+        """
+        获取存档槽位的唯一标识，用于存档队列合并同一槽位的写入
+
+        Args:
+            game_id (str): 游戏ID
+            save_name (str): 存档槽位名称
+
+        Returns:
+            str: 槽位标识
+        """
+        return f"{game_id}/{save_name}"
+
+    @abc.abstractmethod
+    def write(self, game_id, save_name, save_data, slot_state=None):
+        """
+        写入存档
+
+        Args:
+            game_id (str): 游戏ID
+            save_name (str): 存档槽位名称
+            save_data (dict): 存档数据
+            slot_state (object): 上次写入或读取该槽位时返回的槽位状态
+
+        Returns:
+            object: 新的槽位状态
+        """
+
+    @abc.abstractmethod
+    def read(self, game_id, save_name):
+        """
+        读取存档
+
+        Args:
+            game_id (str): 游戏ID
+            save_name (str): 存档槽位名称
+
+        Returns:
+            tuple: (存档数据, 槽位状态)，存档不存在时返回(None, None)
+        """
+
+    @abc.abstractmethod
+    def list(self, game_id, sort="modified_time", descending=True, offset=0, limit=None,
+             player_name=None):
+        """
+        分页列出存档摘要
+
+        Args:
+            game_id (str): 游戏ID
+            sort (str): 排序字段，见SORT_FIELDS
+            descending (bool): 是否降序
+            offset (int): 跳过的条数
+            limit (int): 返回的最大条数，None表示全部
+            player_name (str): 只列出该玩家的存档
+
+        Returns:
+            tuple: (存档摘要列表, 存档总数)
+        """
+
+    @abc.abstractmethod
+    def delete(self, game_id, save_name):
+        """
+        删除存档
+
+        Args:
+            game_id (str): 游戏ID
+            save_name (str): 存档槽位名称
+
+        Returns:
+            bool: 存档存在并已删除返回True
+        """
+
+    def write_many(self, saves):
+        """
+        批量写入存档
+
+        Args:
+            saves (list): [(游戏ID, 槽位名称, 存档数据, 保存时间或None), ...]
+        """
+        for game_id, save_name, save_data, _ in saves:
+            self.write(game_id, save_name, save_data)
+
+
+class _JournalState:
+    """
+    JSON存储的槽位状态：上次写入的展开数据、快照代号、日志条数与当时磁盘上的槽位签名
+    """
+    __slots__ = ("slot_dir", "flat", "generation", "entries", "signature")
+
+    def __init__(self, slot_dir, flat, generation, entries, signature):
+        self.slot_dir = slot_dir
+        self.flat = flat
+        self.generation = generation
+        self.entries = entries
+        self.signature = signature
+
+
+class JsonSaveStorage(SaveStorage):
+    """
+    目录存储：每个槽位一个目录，保存完整快照与增量日志，列表由每个故事的存档索引提供
+    """
+    def __init__(self, writer, root="story-list", compact_every=20):
+        """
+        初始化目录存储
+
+        Args:
+            writer (SaveWriter): 存档写入器
+            root (str): 故事根目录
+            compact_every (int): 存档日志积累多少条后重新写入完整快照
+        """
+        self.writer = writer
+        self.root = root
+        self.compact_every = compact_every
+        self.indexes = SaveIndexRegistry(writer)
+
+    def saves_dir(self, game_id):
+        """
+        获取游戏的存档目录
+
+        Args:
+            game_id (str): 游戏ID
+
+        Returns:
+            str: 存档目录
+        """
+        return os.path.join(self.root, game_id, "saves")
+
+    def slot_key(self, game_id, save_name):
+        return os.path.join(self.saves_dir(game_id), save_name)
+
+    def write(self, game_id, save_name, save_data, slot_state=None):
+        slot_dir = self.slot_key(game_id, save_name)
+        flat = flatten_state(save_data)
+
+        # 磁盘上的槽位被其他会话或进程改写过时，增量的基础已经失效，改为写入完整快照
+        if (slot_state is not None and slot_state.slot_dir == slot_dir
+                and getattr(slot_state, "signature", None) == slot_signature(slot_dir)):
+            set_items, unset_paths = diff_states(slot_state.flat, flat)
+            if not set_items and not unset_paths:
+                return slot_state
+            if slot_state.entries < self.compact_every:
+                try:
+                    append_delta(slot_dir, slot_state.generation, set_items, unset_paths,
+                                 durable=self.writer.durable)
+                    self.indexes.get(self.saves_dir(game_id)).update(save_name, save_data)
+                    return _JournalState(slot_dir, flat, slot_state.generation, slot_state.entries + 1,
+                                         slot_signature(slot_dir))
+                except OSError as e:
+                    # 日志写入失败时改为写入完整快照
+                    print(f"追加存档日志失败: {e}")
+
+        # 写入临时文件后原子替换，写入中途失败不会损坏原存档
+        generation = new_generation()
+        write_base(slot_dir, save_data, generation, self.writer)
+        self.indexes.get(self.saves_dir(game_id)).update(save_name, save_data)
+        return _JournalState(slot_dir, flat, generation, 0, slot_signature(slot_dir))
+
+    def read(self, game_id, save_name):
+        slot_dir = self.slot_key(game_id, save_name)
+        # 先取签名再读取，读取期间被改写时签名不一致，下次保存写入完整快照
+        signature = slot_signature(slot_dir)
+        save_data, generation, entries = load_state(slot_dir)
+        if save_data is None:
+            return None, None
+        # 旧格式的存档没有快照代号，下次保存时写入完整快照
+        if generation is None:
+            return save_data, None
+        return save_data, _JournalState(slot_dir, flatten_state(save_data), generation, entries, signature)
+
+    def list(self, game_id, sort="modified_time", descending=True, offset=0, limit=None,
+             player_name=None):
+        return self.indexes.get(self.saves_dir(game_id)).list(
+            sort, descending, offset, limit, player_name=player_name
+        )
+
+    def delete(self, game_id, save_name):
+        slot_dir = self.slot_key(game_id, save_name)
+        existed = os.path.isdir(slot_dir)
+        if existed:
+            shutil.rmtree(slot_dir)
+        self.indexes.get(self.saves_dir(game_id)).remove(save_name)
+        return existed
+
+    def game_ids(self):
+        """
+        列出存在存档目录的游戏ID
+
+        Returns:
+            list: 游戏ID列表
+        """
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.isdir(self.saves_dir(name))
+        )
+
+    def slot_names(self, game_id):
+        """
+        列出游戏的所有存档槽位名称
+
+        Args:
+            game_id (str): 游戏ID
+
+        Returns:
+            list: 槽位名称列表
+        """
+        saves_dir = self.saves_dir(game_id)
+        if not os.path.isdir(saves_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(saves_dir)
+            if os.path.isdir(os.path.join(saves_dir, name))
+        )
+
+
+class SQLiteSaveStorage(SaveStorage):
+    """
+    SQLite存储：所有存档保存在同一个WAL模式的数据库中，列表查询走索引
+    """
+    def __init__(self, db_path):
+        """
+        初始化SQLite存储
+
+        Args:
+            db_path (str): 数据库文件路径
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS saves ("
+            "game_id TEXT NOT NULL, "
+            "save_name TEXT NOT NULL, "
+            "player_name TEXT, "
+            "level INTEGER, "
+            "class_name TEXT, "
+            "chapter INTEGER, "
+            "modified_time REAL NOT NULL, "
+            "data TEXT NOT NULL, "
+            "PRIMARY KEY (game_id, save_name))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_saves_game_time ON saves (game_id, modified_time)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_saves_game_player ON saves (game_id, player_name)")
+        conn.commit()
+
+    def _connect(self):
+        # 连接不能跨线程或跨fork共享，按(线程, 进程)缓存
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _encode(save_data):
+        data = json.dumps(save_data, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        return data, hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _row(game_id, save_name, save_data, data, modified_time):
+        summary = summarize_save(save_name, save_data, modified_time)
+        return (game_id, save_name, summary["player_name"], summary["level"],
+                summary["class_name"], summary["chapter"], modified_time, data)
+
+    def write(self, game_id, save_name, save_data, slot_state=None):
+        data, digest = self._encode(save_data)
+        # 槽位状态为上次写入内容的哈希，内容没有变化时不访问数据库
+        if slot_state == (game_id, save_name, digest):
+            return slot_state
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._row(game_id, save_name, save_data, data, time.time())
+            )
+        return (game_id, save_name, digest)
+
+    def write_many(self, saves):
+        now = time.time()
+        rows = []
+        for game_id, save_name, save_data, modified_time in saves:
+            data, _ = self._encode(save_data)
+            rows.append(self._row(game_id, save_name, save_data, data, modified_time or now))
+        conn = self._connect()
+        # 一个事务写入全部存档
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def read(self, game_id, save_name):
+        row = self._connect().execute(
+            "SELECT data FROM saves WHERE game_id = ? AND save_name = ?", (game_id, save_name)
+        ).fetchone()
+        if row is None:
+            return None, None
+        save_data = json.loads(row[0])
+        return save_data, (game_id, save_name, hashlib.sha1(row[0].encode("utf-8")).hexdigest())
+
+    def list(self, game_id, sort="modified_time", descending=True, offset=0, limit=None,
+             player_name=None):
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"不支持的排序字段: {sort}")
+        column = "save_name" if sort == "name" else sort
+        where = "game_id = ?"
+        params = [game_id]
+        if player_name is not None:
+            where += " AND player_name = ?"
+            params.append(player_name)
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM saves WHERE {where}", params).fetchone()[0]
+        # 缺少字段的存档排在最后
+        order = "DESC" if descending else "ASC"
+        rows = conn.execute(
+            "SELECT save_name, modified_time, player_name, level, class_name, chapter "
+            f"FROM saves WHERE {where} ORDER BY {column} IS NULL, {column} {order} "
+            "LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset]
+        ).fetchall()
+        saves = [
+            {
+                "name": name,
+                "modified_time": modified_time,
+                "player_name": player,
+                "level": level,
+                "class_name": class_name,
+                "chapter": chapter
+            }
+            for name, modified_time, player, level, class_name, chapter in rows
+        ]
+        return saves, total
+
+    def delete(self, game_id, save_name):
+        conn = self._connect()
+        with conn:
+            deleted = conn.execute(
+                "DELETE FROM saves WHERE game_id = ? AND save_name = ?", (game_id, save_name)
+            ).rowcount
+        return deleted > 0
+
+
+def create_save_storage(kind, writer=None, root="story-list", db_path=None, compact_every=20):
+    """
+    根据名称创建存档存储引擎
+
+    Args:
+        kind (str): 引擎类型，json 或 sqlite
+        writer (SaveWriter): json引擎使用的存档写入器
+        root (str): json引擎的故事根目录
+        db_path (str): sqlite引擎的数据库文件路径
+        compact_every (int): json引擎重新写入完整快照的日志条数
+
+    Returns:
+        SaveStorage: 存档存储引擎
+    """
+    if kind == "json":
+        return JsonSaveStorage(writer, root=root, compact_every=compact_every)
+    if kind == "sqlite":
+        return SQLiteSaveStorage(db_path)
+    raise ValueError(f"未知的存档存储引擎: {kind}")
+
+
+def migrate(source, target, game_ids=None, batch_size=500):
+    """
+    把目录存储中的存档导入另一个存储引擎
+
+    Args:
+        source (JsonSaveStorage): 源存储
+        target (SaveStorage): 目标存储
+        game_ids (list): 需要导入的游戏ID，None表示全部
+        batch_size (int): 每批写入的存档数量
+
+    Returns:
+        int: 导入的存档数量
+    """
+    imported = 0
+    batch = []
+    for game_id in game_ids or source.game_ids():
+        # 保留原存档的保存时间
+        modified_times = {entry["name"]: entry["modified_time"] for entry in source.list(game_id)[0]}
+        for save_name in source.slot_names(game_id):
+            try:
+                save_data, _ = source.read(game_id, save_name)
+            except (OSError, ValueError) as e:
+                print(f"跳过无法读取的存档 {game_id}/{save_name}: {e}")
+                continue
+            if save_data is None:
+                continue
+            batch.append((game_id, save_name, save_data, modified_times.get(save_name)))
+            if len(batch) >= batch_size:
+                target.write_many(batch)
+                imported += len(batch)
+                batch = []
+    if batch:
+        target.write_many(batch)
+        imported += len(batch)
+    return imported
+
+
+def main(argv=None):
+    """
+    命令行入口：migrate 子命令把JSON存档导入SQLite数据库
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.save_storage")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="把JSON存档导入SQLite数据库")
+    migrate_parser.add_argument("game_ids", nargs="*", help="需要导入的游戏ID，默认全部")
+    migrate_parser.add_argument("--root", default="story-list", help="故事根目录")
+    migrate_parser.add_argument("--db", default=os.path.join("story-list", "saves.db"),
+                                help="SQLite数据库文件路径")
+    args = parser.parse_args(argv)
+
+    # 源目录缺少存档索引时会顺带生成
+    source = JsonSaveStorage(shared_save_writer, root=args.root)
+    target = SQLiteSaveStorage(args.db)
+    imported = migrate(source, target, args.game_ids or None)
+    print(f"已导入 {imported} 个存档到 {args.db}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,169 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# 临时文件只需要数据和文件长度落盘，fdatasync不等待修改时间等元数据，不支持时用fsync
+_fsync_data = getattr(os, "fdatasync", os.fsync)
+
+
+class _DirSync:
+    """
+    一个目录的组提交状态：按序号记录已替换、等待刷新目录项的写入
+    """
+    __slots__ = ("cond", "requested", "synced", "syncing")
+
+    def __init__(self, lock):
+        self.cond = threading.Condition(lock)  # 只唤醒等待同一目录的线程
+        self.requested = 0  # 已替换文件的写入序号
+        self.synced = 0  # 该序号及之前的替换已随目录刷新落盘
+        self.syncing = False
+
+
+class SaveWriter:
+    """
+    存档写入器：先写临时文件，刷盘后原子替换正式文件，写入中途崩溃不会损坏已有存档
+
+    每个写入线程fsync并替换自己的临时文件，多个线程同时fsync时文件系统会把它们合并到
+    同一次日志提交中。替换后的目录项刷新按目录组提交：第一个到达的线程成为组长并
+    fsync目录，期间同一目录中替换完成的写入只需等待组长的下一次刷新，一次fsync覆盖
+    所有这些写入。组长只做一次系统调用，不替别的线程逐个替换或刷盘：在GIL下组长
+    每次系统调用返回后都要和其余上千个线程重新争抢GIL，逐个处理整批写入会让所有
+    线程排队等它。不使用os.sync，它会刷新整台机器上所有文件系统的脏数据。
+    """
+    def __init__(self, durable=True, latency_window=1000):
+        """
+        初始化存档写入器
+
+        Args:
+            durable (bool): 是否在替换前调用fsync保证数据落盘
+            latency_window (int): 保留最近多少次写入的耗时用于计算分位数
+        """
+        self.durable = durable
+        self._lock = threading.Lock()
+        self._dirs = {}
+        self._latencies = collections.deque(maxlen=latency_window)
+        self.saves = 0
+        self.failures = 0
+        self.batches = 0
+        self.max_batch = 0
+        self._batched_saves = 0
+
+    def write_json(self, path, data):
+        """
+        以紧凑格式写入JSON文件，返回时数据已落盘并替换了原文件
+
+        Args:
+            path (str): 目标文件路径
+            data (object): 可JSON序列化的数据
+        """
+        start = time.perf_counter()
+        save_dir = os.path.dirname(path)
+        if save_dir:
+            os.makedirs(save_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                if self.durable:
+                    _fsync_data(f.fileno())
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        error = None
+        try:
+            os.replace(tmp_path, path)
+        except Exception as e:
+            error = e
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        else:
+            if self.durable:
+                self._group_commit(os.path.dirname(os.path.abspath(path)))
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._latencies.append(elapsed)
+            if error is None:
+                self.saves += 1
+            else:
+                self.failures += 1
+        if error is not None:
+            raise error
+
+    def _group_commit(self, save_dir):
+        # 等待一次在本次替换之后开始的目录刷新，没有进行中的刷新时自己成为组长
+        with self._lock:
+            state = self._dirs.get(save_dir)
+            if state is None:
+                state = self._dirs[save_dir] = _DirSync(self._lock)
+            state.requested += 1
+            ticket = state.requested
+            while state.synced < ticket:
+                if state.syncing:
+                    state.cond.wait()
+                    continue
+                state.syncing = True
+                target = state.requested
+                batch = target - state.synced
+                self._lock.release()
+                try:
+                    self._sync_dir(save_dir)
+                finally:
+                    self._lock.acquire()
+                    state.syncing = False
+                    state.synced = target
+                    self.batches += 1
+                    self.max_batch = max(self.max_batch, batch)
+                    self._batched_saves += batch
+                    if state.synced == state.requested:
+                        # 没有等待中的写入，不再保留该目录的状态
+                        del self._dirs[save_dir]
+                    state.cond.notify_all()
+
+    def _sync_dir(self, save_dir):
+        # 刷新目录项，使替换操作本身也落盘
+        try:
+            fd = os.open(save_dir, os.O_RDONLY)
+        except OSError:
+            # 部分平台（如Windows）不支持打开目录
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def stats(self):
+        """
+        获取写入次数、批量大小与耗时分位数
+
+        Returns:
+            dict: 统计信息，耗时单位为毫秒
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats = {
+                "saves": self.saves,
+                "failures": self.failures,
+                "batches": self.batches,
+                "max_batch": self.max_batch,
+                "avg_batch": self._batched_saves / self.batches if self.batches else 0.0,
+                "durable": self.durable
+            }
+        for name, q in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+            stats[f"{name}_ms"] = latencies[int(q * (len(latencies) - 1))] * 1000 if latencies else 0.0
+        stats["max_ms"] = latencies[-1] * 1000 if latencies else 0.0
+        return stats
+
+
+# 进程内共享的存档写入器，命令行游戏与Web应用共用
+shared_save_writer = SaveWriter()
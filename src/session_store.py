@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+
+class SessionStore:
+    """
+    会话存储，按LRU顺序和空闲超时淘汰会话对象
+
+    存储本身只负责容量与过期策略，被淘汰的对象通过on_evict回调交给调用方处理
+    （例如写入存档），缺失时由调用方自行创建或从存档恢复。
+    """
+    def __init__(self, max_size=1000, idle_ttl=1800, on_evict=None, clock=time.monotonic):
+        """
+        初始化会话存储
+
+        Args:
+            max_size (int): 最多保留的会话数量
+            idle_ttl (float): 会话空闲多少秒后过期，None或0表示不过期
+            on_evict (callable): 会话被淘汰时的回调，参数为(key, value, reason)
+            clock (callable): 时间函数，默认使用time.monotonic
+        """
+        self.max_size = max(1, int(max_size))
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> [value, last_access]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """
+        获取会话对象，命中时刷新其访问时间
+
+        Args:
+            key (str): 会话ID
+
+        Returns:
+            object: 会话对象，不存在或已过期时返回None
+        """
+        now = self.clock()
+        expired = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry, now):
+                del self._entries[key]
+                self.expirations += 1
+                expired.append((key, entry[0], "expired"))
+                entry = None
+            if entry is None:
+                self.misses += 1
+                value = None
+            else:
+                self.hits += 1
+                entry[1] = now
+                self._entries.move_to_end(key)
+                value = entry[0]
+        self._notify(expired)
+        return value
+
+    def put(self, key, value):
+        """
+        放入会话对象，超出容量时淘汰最久未使用的会话
+
+        Args:
+            key (str): 会话ID
+            value (object): 会话对象
+        """
+        now = self.clock()
+        with self._lock:
+            self._entries[key] = [value, now]
+            self._entries.move_to_end(key)
+            evicted = self._collect_expired(now)
+            while len(self._entries) > self.max_size:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self.evictions += 1
+                evicted.append((old_key, old_entry[0], "evicted"))
+        self._notify(evicted)
+
+    def pop(self, key):
+        """
+        移除会话对象，不触发淘汰回调
+
+        Args:
+            key (str): 会话ID
+
+        Returns:
+            object: 被移除的会话对象，不存在时返回None
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[0] if entry else None
+
+    def purge_expired(self):
+        """
+        清理所有已过期的会话
+
+        Returns:
+            int: 清理的会话数量
+        """
+        with self._lock:
+            expired = self._collect_expired(self.clock())
+        self._notify(expired)
+        return len(expired)
+
+    def flush(self):
+        """
+        淘汰全部会话（用于进程退出前写回存档）
+        """
+        with self._lock:
+            evicted = [(key, entry[0], "shutdown") for key, entry in self._entries.items()]
+            self._entries.clear()
+        self._notify(evicted)
+
+    def stats(self):
+        """
+        获取命中、未命中与淘汰计数
+
+        Returns:
+            dict: 统计信息
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "idle_ttl": self.idle_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _is_expired(self, entry, now):
+        return bool(self.idle_ttl) and now - entry[1] > self.idle_ttl
+
+    def _collect_expired(self, now):
+        # OrderedDict按访问顺序排列，从最旧的一端扫描即可
+        expired = []
+        if not self.idle_ttl:
+            return expired
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if not self._is_expired(entry, now):
+                break
+            del self._entries[key]
+            self.expirations += 1
+            expired.append((key, entry[0], "expired"))
+        return expired
+
+    def _notify(self, evicted):
+        # 回调可能涉及磁盘IO，放在锁外执行
+        if not self.on_evict:
+            return
+        for key, value, reason in evicted:
+            try:
+                self.on_evict(key, value, reason)
+            except Exception as e:
+                print(f"会话 {key} 淘汰处理失败: {e}")
@@ -0,0 +1,508 @@
+"""
+无界面的蒙特卡洛战斗模拟器，用于数值平衡与性能测试
+
+模拟直接调用Battle的伤害、暴击与逃跑规则，不经过Web接口，也不输出战斗事件。
+每个 职业×敌人×难度 组合的战斗切分为若干批次，每个批次使用由种子、组合和批次序号
+确定的独立随机数生成器，因此相同种子的结果与进程数无关。
+
+    python -m src.simulator --fights 100000 --workers 4 --seed 1
+
+安装了NumPy时可以加上 --vectorized，同一批次的战斗按回合同步推进，每回合用一次
+数组运算结算全部战斗，结果与逐场模拟的分布一致。
+
+--party-size 与 --enemy-count 大于1时改用PartyBattle模拟多人战斗，行动顺序按敏捷度决定：
+
+    python -m src.simulator --party-size 3 --enemy-count 5 --fights 1000
+"""
+
+import argparse
+import collections
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from .battle import Battle
+from .battle_policy import get_policy
+from .character import Player
+from .config_manager import ConfigManager
+from .damage import HAS_NUMPY, np, roll_damage_batch
+from .party_battle import PartyBattle
+
+# 战斗结果
+WIN = "win"
+LOSS = "loss"
+ESCAPE = "escape"
+TIMEOUT = "timeout"
+
+
+class MatchupStats:
+    """
+    某个 职业×敌人×难度 组合的模拟统计
+    """
+    def __init__(self):
+        self.fights = 0
+        self.outcomes = collections.Counter()  # 战斗结果 -> 次数
+        self.turns_to_kill = collections.Counter()  # 获胜所用回合数 -> 次数
+        self.hp_remaining = collections.Counter()  # 获胜时剩余生命值百分比（取整到10%） -> 次数
+
+    def record(self, outcome, turns, hp_percent):
+        """
+        记录一场战斗
+
+        Args:
+            outcome (str): 战斗结果
+            turns (int): 回合数
+            hp_percent (int): 剩余生命值百分比
+        """
+        self.fights += 1
+        self.outcomes[outcome] += 1
+        if outcome == WIN:
+            self.turns_to_kill[turns] += 1
+            self.hp_remaining[hp_percent // 10 * 10] += 1
+
+    def record_batch(self, outcomes, turns, hp_percent):
+        """
+        记录一组战斗
+
+        Args:
+            outcomes (numpy.ndarray): 每场战斗的结果
+            turns (numpy.ndarray): 每场战斗的回合数
+            hp_percent (numpy.ndarray): 每场战斗的剩余生命值百分比
+        """
+        self.fights += len(outcomes)
+        for outcome, count in zip(*np.unique(outcomes, return_counts=True)):
+            self.outcomes[str(outcome)] += int(count)
+        won = outcomes == WIN
+        for value, count in zip(*np.unique(turns[won], return_counts=True)):
+            self.turns_to_kill[int(value)] += int(count)
+        for value, count in zip(*np.unique(hp_percent[won] // 10 * 10, return_counts=True)):
+            self.hp_remaining[int(value)] += int(count)
+
+    def merge(self, other):
+        """
+        合并另一批次的统计
+        """
+        self.fights += other.fights
+        self.outcomes.update(other.outcomes)
+        self.turns_to_kill.update(other.turns_to_kill)
+        self.hp_remaining.update(other.hp_remaining)
+
+    def summary(self):
+        """
+        生成统计摘要
+
+        Returns:
+            dict: 胜率、回合数与剩余生命值分布
+        """
+        wins = self.outcomes[WIN]
+        return {
+            "fights": self.fights,
+            "win_rate": wins / self.fights if self.fights else 0.0,
+            "outcomes": dict(self.outcomes),
+            "turns_to_kill": {
+                "mean": _mean(self.turns_to_kill),
+                "p50": _percentile(self.turns_to_kill, 0.5),
+                "p90": _percentile(self.turns_to_kill, 0.9),
+                "histogram": dict(sorted(self.turns_to_kill.items()))
+            },
+            "hp_remaining": {
+                "mean": _mean(self.hp_remaining),
+                "p10": _percentile(self.hp_remaining, 0.1),
+                "p50": _percentile(self.hp_remaining, 0.5),
+                "histogram": dict(sorted(self.hp_remaining.items()))
+            }
+        }
+
+
+def _mean(counter):
+    total = sum(counter.values())
+    return sum(value * count for value, count in counter.items()) / total if total else None
+
+
+def _percentile(counter, fraction):
+    total = sum(counter.values())
+    if not total:
+        return None
+    threshold = fraction * total
+    seen = 0
+    for value in sorted(counter):
+        seen += counter[value]
+        if seen >= threshold:
+            return value
+    return value
+
+
+def simulate_fight(config_manager, class_name, enemy_name, difficulty, policy, rng, max_turns=100):
+    """
+    模拟一场战斗
+
+    Args:
+        config_manager (ConfigManager): 配置管理器
+        class_name (str): 玩家职业
+        enemy_name (str): 敌人名称
+        difficulty (str): 游戏难度
+        policy (callable): 玩家战斗策略
+        rng (random.Random): 随机数生成器
+        max_turns (int): 最多进行的回合数
+
+    Returns:
+        tuple: (战斗结果, 回合数, 玩家剩余生命值百分比)
+    """
+    player = Player("模拟玩家", config_manager.get_class(class_name))
+    enemy = config_manager.spawn_enemy(enemy_name, difficulty)
+    battle = Battle(player, enemy, config_manager, difficulty, rng=rng)
+
+    turns = 0
+    while battle.is_active and player.hp > 0 and enemy.hp > 0 and turns < max_turns:
+        battle.player_action(*policy(battle))
+        turns += 1
+
+    if enemy.hp <= 0:
+        outcome = WIN
+    elif player.hp <= 0:
+        outcome = LOSS
+    elif not battle.is_active:
+        outcome = ESCAPE
+    else:
+        outcome = TIMEOUT
+    return outcome, turns, player.hp * 100 // player.max_hp
+
+
+def simulate_party_fight(config_manager, class_name, enemy_name, difficulty, policy, rng, max_turns=100,
+                         party_size=1, enemy_count=1):
+    """
+    模拟一场多人战斗：party_size个同职业玩家对战enemy_count个同种敌人
+
+    Args:
+        config_manager (ConfigManager): 配置管理器
+        class_name (str): 玩家职业
+        enemy_name (str): 敌人名称
+        difficulty (str): 游戏难度
+        policy (callable): 玩家战斗策略
+        rng (random.Random): 随机数生成器
+        max_turns (int): 玩家队伍最多进行的行动次数
+        party_size (int): 玩家人数
+        enemy_count (int): 敌人数量
+
+    Returns:
+        tuple: (战斗结果, 玩家队伍的行动次数, 玩家队伍剩余生命值百分比)
+    """
+    char_class = config_manager.get_class(class_name)
+    players = [Player(f"模拟玩家{i + 1}", char_class) for i in range(party_size)]
+    enemies = [config_manager.spawn_enemy(enemy_name, difficulty) for _ in range(enemy_count)]
+    battle = PartyBattle(players, enemies, config_manager, difficulty, rng=rng)
+    battle.start_battle()
+
+    turns = 0
+    while battle.is_active and turns < max_turns:
+        actor = battle.take_turn(policy)
+        if actor is None:
+            break
+        if battle.is_player_side(actor):
+            turns += 1
+
+    outcome = battle.outcome()
+    if outcome == "active":
+        outcome = TIMEOUT
+    hp = sum(player.hp for player in players)
+    max_hp = sum(player.max_hp for player in players)
+    return outcome, turns, hp * 100 // max_hp
+
+
+def simulate_batch(config_manager, class_name, enemy_name, difficulty, policy_name, fights, rng,
+                   max_turns=100):
+    """
+    用数组运算同时模拟一组战斗，规则与Battle一致
+
+    Args:
+        config_manager (ConfigManager): 配置管理器
+        class_name (str): 玩家职业
+        enemy_name (str): 敌人名称
+        difficulty (str): 游戏难度
+        policy_name (str): 玩家战斗策略名称，见battle_policy.POLICIES
+        fights (int): 战斗场数
+        rng (numpy.random.Generator): NumPy随机数生成器
+        max_turns (int): 每场战斗最多进行的回合数
+
+    Returns:
+        MatchupStats: 这组战斗的统计
+    """
+    get_policy(policy_name)
+    player = Player("模拟玩家", config_manager.get_class(class_name))
+    enemy = config_manager.spawn_enemy(enemy_name, difficulty)
+
+    # 策略可选的技能：攻击技能按威力从高到低排列，威力相同时保持原顺序，与max()的选择一致
+    attack_skills = []
+    heal_skill = None
+    if policy_name != "attack":
+        for skill_name in player.skills:
+            skill = config_manager.get_skill_record(skill_name)
+            if skill and skill.type in ("physical", "magical"):
+                attack_skills.append(skill)
+            elif skill and skill.type == "support" and skill_name == "heal":
+                heal_skill = skill
+        attack_skills.sort(key=lambda skill: -skill.power)
+    if policy_name != "cautious":
+        heal_skill = None
+    # cautious策略没有可用的治疗技能时按背包顺序使用恢复生命值的道具，这里是各道具的恢复量
+    potions = []
+    if policy_name == "cautious":
+        for item_name in player.items:
+            item = config_manager.get_item_record(item_name)
+            if item and item.type == "consumable" and item.effect == "restore_hp":
+                potions.append(item.value)
+    potion_values = np.array(potions + [0], dtype=np.int64)
+    enemy_skills = [config_manager.get_skill_record(skill_name) for skill_name in enemy.skills]
+
+    player_hp = np.full(fights, player.hp, dtype=np.int64)
+    player_mp = np.full(fights, player.mp, dtype=np.int64)
+    enemy_hp = np.full(fights, enemy.hp, dtype=np.int64)
+    turns = np.zeros(fights, dtype=np.int64)
+    potions_used = np.zeros(fights, dtype=np.int64)
+
+    def hit_enemy(index, attack, defense, crit_chance):
+        damage, _ = roll_damage_batch(rng, attack, np.full(len(index), defense), crit_chance)
+        enemy_hp[index] = np.maximum(0, enemy_hp[index] - np.maximum(1, damage))
+
+    def hit_player(index, attack, defense, crit_chance):
+        damage, _ = roll_damage_batch(rng, np.full(len(index), attack), defense, crit_chance)
+        player_hp[index] = np.maximum(0, player_hp[index] - np.maximum(1, damage))
+
+    for _ in range(max_turns):
+        active = np.flatnonzero((player_hp > 0) & (enemy_hp > 0))
+        if not len(active):
+            break
+        turns[active] += 1
+
+        # 玩家行动：-1为普通攻击，-2为治疗，-3为使用道具，其余为attack_skills中的序号
+        choice = np.full(len(active), -1)
+        if heal_skill is not None:
+            low = (player_hp[active] * 10 < player.max_hp * 3) & (player_mp[active] >= heal_skill.mp_cost)
+            choice[low] = -2
+        if potions:
+            low = (player_hp[active] * 10 < player.max_hp * 3) & (choice == -1)
+            choice[low & (potions_used[active] < len(potions))] = -3
+        for skill_index, skill in enumerate(attack_skills):
+            choice[(choice == -1) & (player_mp[active] >= skill.mp_cost)] = skill_index
+
+        attacking = active[choice == -1]
+        if len(attacking):
+            hit_enemy(attacking, player.atk, enemy.defense, 10)
+        if heal_skill is not None:
+            healing = active[choice == -2]
+            player_mp[healing] -= heal_skill.mp_cost
+            player_hp[healing] = np.minimum(player.max_hp, player_hp[healing] + heal_skill.power)
+        if potions:
+            drinking = active[choice == -3]
+            restored = potion_values[potions_used[drinking]]
+            player_hp[drinking] = np.minimum(player.max_hp, player_hp[drinking] + restored)
+            potions_used[drinking] += 1
+        for skill_index, skill in enumerate(attack_skills):
+            using = active[choice == skill_index]
+            if not len(using):
+                continue
+            player_mp[using] -= skill.mp_cost
+            if skill.type == "physical":
+                hit_enemy(using, player.atk + skill.power, enemy.defense, 15)
+            else:
+                hit_enemy(using, player.matk + skill.power, enemy.mdef, 15)
+
+        # 敌人行动：30%概率随机使用一个技能，否则普通攻击
+        acting = active[enemy_hp[active] > 0]
+        if not len(acting):
+            continue
+        skill_choice = np.full(len(acting), -1)
+        if enemy_skills:
+            use_skill = rng.integers(1, 101, size=len(acting)) <= 30
+            skill_choice[use_skill] = rng.integers(0, len(enemy_skills), size=int(use_skill.sum()))
+        for skill_index, skill in enumerate(enemy_skills):
+            using = acting[skill_choice == skill_index]
+            if not len(using):
+                continue
+            if skill is None:
+                # 技能不存在时执行普通攻击
+                hit_player(using, enemy.atk, player.defense, 5)
+            elif skill.type == "physical":
+                hit_player(using, enemy.atk + skill.power, player.defense, 10)
+            elif skill.type == "magical":
+                hit_player(using, enemy.matk + skill.power, player.mdef, 10)
+            elif skill.type == "support" and skill.key == "heal":
+                enemy_hp[using] = np.minimum(enemy.max_hp, enemy_hp[using] + skill.power)
+        attacking = acting[skill_choice == -1]
+        if len(attacking):
+            hit_player(attacking, enemy.atk, player.defense, 5)
+
+    outcomes = np.where(enemy_hp <= 0, WIN, np.where(player_hp <= 0, LOSS, TIMEOUT))
+    stats = MatchupStats()
+    stats.record_batch(outcomes, turns, player_hp * 100 // player.max_hp)
+    return stats
+
+
+def chunk_seed(seed, matchup, chunk_index):
+    """
+    计算批次的随机数种子
+
+    Args:
+        seed (int): 模拟的总种子
+        matchup (tuple): (职业, 敌人, 难度)
+        chunk_index (int): 批次序号
+
+    Returns:
+        str: 批次种子，字符串种子在不同进程和运行之间保持一致
+    """
+    return f"{seed}:{':'.join(matchup)}:{chunk_index}"
+
+
+def run_chunk(config_manager, matchup, fights, seed, chunk_index, policy_name, max_turns,
+              vectorized=False, party_size=1, enemy_count=1):
+    """
+    模拟一个批次的战斗，party_size或enemy_count大于1时模拟多人战斗
+
+    Returns:
+        tuple: (组合, 批次序号, MatchupStats)
+    """
+    class_name, enemy_name, difficulty = matchup
+    rng = random.Random(chunk_seed(seed, matchup, chunk_index))
+    if vectorized:
+        batch_rng = np.random.default_rng(rng.getrandbits(64))
+        stats = simulate_batch(
+            config_manager, class_name, enemy_name, difficulty, policy_name, fights, batch_rng, max_turns
+        )
+        return matchup, chunk_index, stats
+    policy = get_policy(policy_name)
+    stats = MatchupStats()
+    if party_size > 1 or enemy_count > 1:
+        for _ in range(fights):
+            stats.record(*simulate_party_fight(
+                config_manager, class_name, enemy_name, difficulty, policy, rng, max_turns, party_size, enemy_count
+            ))
+        return matchup, chunk_index, stats
+    for _ in range(fights):
+        stats.record(*simulate_fight(
+            config_manager, class_name, enemy_name, difficulty, policy, rng, max_turns
+        ))
+    return matchup, chunk_index, stats
+
+
+# 工作进程中的配置管理器，由进程池初始化函数创建
+_worker_config = None
+
+
+def _init_worker(config_dir):
+    global _worker_config
+    _worker_config = ConfigManager(config_dir)
+    _worker_config.load_all_configs()
+
+
+def _run_worker_chunk(args):
+    return run_chunk(_worker_config, *args)
+
+
+def run_simulation(config_dir, classes=None, enemies=None, difficulties=None, fights=1000,
+                   policy="strongest_skill", seed=0, workers=1, chunk_size=None, max_turns=100,
+                   vectorized=False, party_size=1, enemy_count=1):
+    """
+    模拟所有 职业×敌人×难度 组合的战斗
+
+    Args:
+        config_dir (str): 配置文件目录
+        classes (list): 职业列表，None表示全部
+        enemies (list): 敌人列表，None表示全部
+        difficulties (list): 难度列表，None表示全部
+        fights (int): 每个组合的战斗次数
+        policy (str): 玩家战斗策略名称
+        seed (int): 随机数种子
+        workers (int): 进程数，1表示在当前进程中运行
+        chunk_size (int): 每个批次的战斗次数，None表示逐场模拟1000场、向量化模拟100000场
+        max_turns (int): 每场战斗最多进行的回合数
+        vectorized (bool): 是否使用NumPy同时模拟一批战斗
+        party_size (int): 玩家队伍人数，大于1时模拟多人战斗
+        enemy_count (int): 每场战斗的敌人数量，大于1时模拟多人战斗
+
+    Returns:
+        dict: (职业, 敌人, 难度) -> MatchupStats
+    """
+    get_policy(policy)  # 提前检查策略名称
+    if vectorized and not HAS_NUMPY:
+        raise RuntimeError("向量化模拟需要安装NumPy")
+    if party_size < 1 or enemy_count < 1:
+        raise ValueError("玩家人数和敌人数量至少为1")
+    if vectorized and (party_size > 1 or enemy_count > 1):
+        raise ValueError("向量化模拟只支持一对一战斗")
+    if chunk_size is None:
+        chunk_size = 100000 if vectorized else 1000
+    config_manager = ConfigManager(config_dir)
+    config_manager.load_all_configs()
+    matchups = [
+        (class_name, enemy_name, difficulty)
+        for class_name in classes or list(config_manager.classes)
+        for enemy_name in enemies or list(config_manager.enemies)
+        for difficulty in difficulties or list(config_manager.difficulty)
+    ]
+    tasks = []
+    for matchup in matchups:
+        for chunk_index, start in enumerate(range(0, fights, chunk_size)):
+            tasks.append((
+                matchup, min(chunk_size, fights - start), seed, chunk_index, policy, max_turns, vectorized,
+                party_size, enemy_count
+            ))
+
+    if workers <= 1:
+        results = [run_chunk(config_manager, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(config_dir,)) as executor:
+            results = list(executor.map(_run_worker_chunk, tasks))
+
+    stats = {matchup: MatchupStats() for matchup in matchups}
+    for matchup, _, chunk_stats in sorted(results, key=lambda result: (result[0], result[1])):
+        stats[matchup].merge(chunk_stats)
+    return stats
+
+
+def main(argv=None):
+    """
+    命令行入口：模拟战斗并打印各组合的胜率与回合数
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.simulator")
+    parser.add_argument("--config", default=os.path.join("story-list", "default", "config"),
+                        help="配置文件目录")
+    parser.add_argument("--class", dest="classes", action="append", help="职业，可重复，默认全部")
+    parser.add_argument("--enemy", dest="enemies", action="append", help="敌人，可重复，默认全部")
+    parser.add_argument("--difficulty", dest="difficulties", action="append",
+                        help="难度，可重复，默认全部")
+    parser.add_argument("--fights", type=int, default=1000, help="每个组合的战斗次数")
+    parser.add_argument("--policy", default="strongest_skill", help="玩家战斗策略")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="进程数")
+    parser.add_argument("--chunk-size", type=int, help="每个批次的战斗次数")
+    parser.add_argument("--max-turns", type=int, default=100, help="每场战斗最多进行的回合数")
+    parser.add_argument("--vectorized", action="store_true", help="使用NumPy同时模拟一批战斗")
+    parser.add_argument("--party-size", type=int, default=1, help="玩家队伍人数，大于1时模拟多人战斗")
+    parser.add_argument("--enemy-count", type=int, default=1, help="每场战斗的敌人数量，大于1时模拟多人战斗")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = run_simulation(
+        args.config, args.classes, args.enemies, args.difficulties, args.fights,
+        args.policy, args.seed, args.workers, args.chunk_size, args.max_turns, args.vectorized,
+        args.party_size, args.enemy_count
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{'职业':<8}{'敌人':<14}{'难度':<8}{'胜率':>8}{'回合p50':>8}{'回合p90':>8}{'剩余HP p50':>12}")
+    for (class_name, enemy_name, difficulty), matchup_stats in stats.items():
+        summary = matchup_stats.summary()
+        turns = summary["turns_to_kill"]
+        hp = summary["hp_remaining"]
+        print(f"{class_name:<8}{enemy_name:<14}{difficulty:<8}{summary['win_rate']:>8.1%}"
+              f"{turns['p50'] if turns['p50'] is not None else '-':>8}"
+              f"{turns['p90'] if turns['p90'] is not None else '-':>8}"
+              f"{str(hp['p50']) + '%' if hp['p50'] is not None else '-':>12}")
+    total = sum(matchup_stats.fights for matchup_stats in stats.values())
+    print(f"共模拟 {total} 场战斗，用时 {elapsed:.2f} 秒（{total / elapsed:.0f} 场/秒）")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
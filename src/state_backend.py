@@ -0,0 +1,250 @@
+import abc
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+class StateBackend(abc.ABC):
+    """
+    游戏状态后端接口，负责在请求之间保存每个会话的GameManager
+
+    load在请求开始时取出会话状态，store在请求结束后写回。进程内实现直接持有对象，
+    共享实现则序列化后存放在所有工作进程都能访问的位置。
+    """
+    @abc.abstractmethod
+    def load(self, key):
+        """
+        读取会话状态
+
+        Args:
+            key (str): 会话ID
+
+        Returns:
+            object: 会话状态，不存在时返回None
+        """
+
+    @abc.abstractmethod
+    def store(self, key, value):
+        """
+        写回会话状态
+
+        Args:
+            key (str): 会话ID
+            value (object): 会话状态
+        """
+
+    @abc.abstractmethod
+    def delete(self, key):
+        """
+        删除会话状态
+
+        Args:
+            key (str): 会话ID
+        """
+
+    def stats(self):
+        """
+        获取后端统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        return {}
+
+    def flush(self):
+        """
+        进程退出前的收尾工作
+        """
+        pass
+
+
+class InProcessStateBackend(StateBackend):
+    """
+    进程内状态后端，会话对象保存在当前进程的SessionStore中
+    """
+    def __init__(self, session_store):
+        """
+        初始化进程内状态后端
+
+        Args:
+            session_store (SessionStore): 会话存储
+        """
+        self.sessions = session_store
+
+    def load(self, key):
+        return self.sessions.get(key)
+
+    def store(self, key, value):
+        # 对象本身就在内存中，只有新会话需要放入
+        if key not in self.sessions:
+            self.sessions.put(key, value)
+
+    def delete(self, key):
+        self.sessions.pop(key)
+
+    def stats(self):
+        stats = self.sessions.stats()
+        stats["backend"] = "memory"
+        return stats
+
+    def flush(self):
+        self.sessions.flush()
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    基于SQLite文件的共享状态后端，多个工作进程通过同一个数据库文件共享会话状态
+    """
+    def __init__(self, db_path, idle_ttl=1800, on_evict=None, purge_interval=500):
+        """
+        初始化SQLite状态后端
+
+        Args:
+            db_path (str): 数据库文件路径
+            idle_ttl (float): 会话空闲多少秒后过期，None或0表示不过期
+            on_evict (callable): 过期会话被删除前的回调，参数为(key, value, reason)
+            purge_interval (int): 每写入多少次检查一次过期会话
+        """
+        self.db_path = db_path
+        self.idle_ttl = idle_ttl
+        self.on_evict = on_evict
+        self.purge_interval = max(1, int(purge_interval))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expirations = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS game_state ("
+            "session_id TEXT PRIMARY KEY, "
+            "data BLOB NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_game_state_updated ON game_state (updated_at)")
+        conn.commit()
+
+    def _connect(self):
+        # 连接不能跨线程或跨fork共享，按(线程, 进程)缓存
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def load(self, key):
+        row = self._connect().execute(
+            "SELECT data FROM game_state WHERE session_id = ?", (key,)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            # 类的内存布局变化后，旧版本写入的状态无法恢复，丢弃后按新会话处理
+            print(f"恢复会话 {key} 的游戏状态失败: {e}")
+            self.delete(key)
+            return None
+
+    def store(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO game_state (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(data), time.time())
+            )
+        with self._lock:
+            self.stores += 1
+            should_purge = self.stores % self.purge_interval == 0
+        if should_purge:
+            self.purge_expired()
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM game_state WHERE session_id = ?", (key,))
+
+    def purge_expired(self):
+        """
+        删除空闲超时的会话，删除前交给on_evict回调写回存档
+
+        Returns:
+            int: 删除的会话数量
+        """
+        if not self.idle_ttl:
+            return 0
+        conn = self._connect()
+        cutoff = time.time() - self.idle_ttl
+        rows = conn.execute(
+            "SELECT session_id, data FROM game_state WHERE updated_at < ?", (cutoff,)
+        ).fetchall()
+        purged = 0
+        for key, data in rows:
+            with conn:
+                # 仅在期间没有被其他进程刷新时才删除
+                deleted = conn.execute(
+                    "DELETE FROM game_state WHERE session_id = ? AND updated_at < ?", (key, cutoff)
+                ).rowcount
+            if not deleted:
+                continue
+            purged += 1
+            if self.on_evict:
+                try:
+                    self.on_evict(key, pickle.loads(data), "expired")
+                except Exception as e:
+                    print(f"会话 {key} 淘汰处理失败: {e}")
+        with self._lock:
+            self.expirations += purged
+        return purged
+
+    def stats(self):
+        size = self._connect().execute("SELECT COUNT(*) FROM game_state").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "size": size,
+                "idle_ttl": self.idle_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "stores": self.stores,
+                "expirations": self.expirations
+            }
+
+
+def create_state_backend(kind, session_store=None, db_path=None, idle_ttl=1800, on_evict=None):
+    """
+    根据名称创建状态后端
+
+    Args:
+        kind (str): 后端类型，memory 或 sqlite
+        session_store (SessionStore): memory后端使用的会话存储
+        db_path (str): sqlite后端的数据库文件路径
+        idle_ttl (float): sqlite后端的会话过期时间（秒）
+        on_evict (callable): sqlite后端的过期回调
+
+    Returns:
+        StateBackend: 状态后端
+    """
+    if kind == "memory":
+        return InProcessStateBackend(session_store)
+    if kind == "sqlite":
+        return SQLiteStateBackend(db_path, idle_ttl=idle_ttl, on_evict=on_evict)
+    raise ValueError(f"未知的状态后端: {kind}")
@@ -0,0 +1,186 @@
+"""
+故事配置包：把一个配置目录中的所有JSON文件预先解析并编译为单个二进制文件，
+加载时无需再解析格式化的JSON。
+
+文件格式：
+    魔数(8字节) | 格式版本(uint16) | marshal版本(uint16) | 源文件哈希(40字节ASCII)
+    | 文件签名摘要(40字节ASCII) | marshal数据
+
+marshal数据为字典 {文件名: 该文件解析后数据的marshal字节串或None}。各配置段分别编码，
+每次加载配置段都反序列化出一份新的数据，修改加载结果（例如把剧情文本替换为TextRef）
+不会影响之后的加载，也不需要先深拷贝。
+
+文件签名（修改时间和大小）与构建时一致时，只需读取文件头就能确认配置包可用并得到源文件
+哈希，不必读取和哈希JSON源文件；ConfigCache首次加载目录时据此跳过读取JSON快照。
+签名变化（例如检出代码后修改时间改变）时才读取源文件比较内容哈希。
+
+在项目根目录下运行 python -m src.story_bundle [配置目录...] 生成配置包。
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+
+from .config_files import CONFIG_FILES, config_signature, config_content_hash
+
+BUNDLE_FILENAME = "config.bundle"
+BUNDLE_MAGIC = b"TXADVBDL"
+BUNDLE_VERSION = 2
+_HEADER = struct.Struct("<8sHH40s40s")
+
+
+def bundle_path(config_dir):
+    """
+    获取配置目录对应的配置包路径
+
+    Args:
+        config_dir (str): 配置文件目录路径
+
+    Returns:
+        str: 配置包路径
+    """
+    return os.path.join(config_dir, BUNDLE_FILENAME)
+
+
+def signature_digest(signature):
+    """
+    计算文件签名的摘要，写入配置包文件头
+
+    Args:
+        signature (tuple): config_signature返回的文件签名
+
+    Returns:
+        str: 十六进制摘要
+    """
+    return hashlib.sha1(repr(signature).encode("utf-8")).hexdigest()
+
+
+def build_bundle(config_dir):
+    """
+    将配置目录编译为配置包
+
+    Args:
+        config_dir (str): 配置文件目录路径
+
+    Returns:
+        str: 生成的配置包路径
+    """
+    # 先取签名和哈希再读取内容，构建期间文件被修改时配置包会被判定为过期
+    signature = config_signature(config_dir)
+    source_hash = config_content_hash(config_dir)
+    sections = {}
+    for filename in CONFIG_FILES:
+        file_path = os.path.join(config_dir, filename)
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                sections[filename] = marshal.dumps(json.load(f))
+        else:
+            sections[filename] = None
+
+    payload = marshal.dumps(sections)
+    header = _HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, marshal.version, source_hash.encode("ascii"),
+                          signature_digest(signature).encode("ascii"))
+
+    path = bundle_path(config_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_bundle(config_dir, source_hash=None):
+    """
+    读取配置包，配置包不存在、版本不符或与源文件不一致时返回None
+
+    Args:
+        config_dir (str): 配置文件目录路径
+        source_hash (str): 期望的源文件内容哈希，传入时只与它比较，不再检查磁盘上的源文件
+
+    Returns:
+        dict: 文件名 -> 解析后数据的marshal字节串（文件不存在时为None），不可用时返回None
+    """
+    try:
+        with open(bundle_path(config_dir), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    header = _unpack_header(data)
+    if header is None:
+        return None
+    bundle_hash, bundle_signature = header
+    if source_hash is not None and bundle_hash != source_hash:
+        return None
+
+    try:
+        sections = marshal.loads(data[_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    # 文件签名一致时直接使用；签名变化时再比较内容哈希
+    if source_hash is None and bundle_signature != signature_digest(config_signature(config_dir)):
+        if bundle_hash != config_content_hash(config_dir):
+            return None
+    return sections
+
+
+def bundle_source_hash(config_dir, signature=None):
+    """
+    只读取配置包文件头，文件签名与构建时一致时返回源文件内容哈希
+
+    Args:
+        config_dir (str): 配置文件目录路径
+        signature (tuple): 当前的文件签名，None表示重新计算
+
+    Returns:
+        str: 源文件内容哈希，配置包不存在、版本不符或签名已变化时返回None
+    """
+    try:
+        with open(bundle_path(config_dir), "rb") as f:
+            data = f.read(_HEADER.size)
+    except OSError:
+        return None
+    header = _unpack_header(data)
+    if header is None:
+        return None
+    bundle_hash, bundle_signature = header
+    if signature is None:
+        signature = config_signature(config_dir)
+    if bundle_signature != signature_digest(signature):
+        return None
+    return bundle_hash
+
+
+def _unpack_header(data):
+    # 返回 (源文件哈希, 文件签名摘要)，文件头无效时返回None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, marshal_version, bundle_hash, bundle_signature = _HEADER.unpack_from(data)
+    if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION or marshal_version != marshal.version:
+        return None
+    return bundle_hash.decode("ascii"), bundle_signature.decode("ascii")
+
+
+def main(argv=None):
+    """
+    命令行入口：编译指定的配置目录，未指定时编译story-list.json中的所有故事
+    """
+    config_dirs = list(argv if argv is not None else sys.argv[1:])
+    if not config_dirs:
+        with open("story-list.json", "r", encoding="utf-8") as f:
+            story_list = json.load(f)
+        config_dirs = [
+            os.path.join("story-list", game["id"], game.get("path", "config"))
+            for game in story_list
+        ]
+    for config_dir in config_dirs:
+        path = build_bundle(config_dir)
+        print(f"已生成配置包: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+class _Snapshot:
+    """
+    某一时刻的游戏列表，整体替换，读取方不会看到更新了一半的数据
+    """
+    def __init__(self, signature, stories, etag):
+        self.signature = signature
+        self.stories = stories
+        self.by_id = {}
+        # 与原先的线性查找保持一致：ID重复时以先出现的为准
+        for game in stories:
+            self.by_id.setdefault(game.get("id"), game)
+        self.etag = etag
+
+
+class StoryRegistry:
+    """
+    游戏列表注册表，缓存解析后的story-list.json，按文件修改时间检测变化
+    """
+    def __init__(self, path="story-list.json", check_interval=1.0, clock=time.monotonic):
+        """
+        初始化游戏列表注册表
+
+        Args:
+            path (str): 游戏列表文件路径
+            check_interval (float): 两次检查文件修改时间的最小间隔（秒）
+            clock (callable): 时间函数，默认使用time.monotonic
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.clock = clock
+        self._snapshot = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def snapshot(self):
+        """
+        获取当前的游戏列表快照，必要时重新读取文件
+
+        Returns:
+            _Snapshot: 包含stories、by_id与etag的快照
+        """
+        snapshot = self._snapshot
+        now = self.clock()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and now - self._checked_at < self.check_interval:
+                return snapshot
+            try:
+                signature = self._signature()
+                if snapshot is None or signature != snapshot.signature:
+                    with open(self.path, "rb") as f:
+                        data = f.read()
+                    stories = json.loads(data.decode("utf-8"))
+                    etag = hashlib.sha1(data).hexdigest()
+                    snapshot = _Snapshot(signature, stories, etag)
+            except (OSError, ValueError) as e:
+                # 首次加载失败时向调用方报告，之后的失败保留上一次成功读取的列表
+                if snapshot is None:
+                    raise
+                print(f"重新加载游戏列表 {self.path} 失败: {e}")
+            self._checked_at = now
+            self._snapshot = snapshot
+            return snapshot
+
+    def list(self):
+        """
+        获取游戏列表
+
+        Returns:
+            list: 游戏信息列表，调用方不得修改
+        """
+        return self.snapshot().stories
+
+    def get(self, game_id):
+        """
+        按ID获取游戏信息
+
+        Args:
+            game_id (str): 游戏ID
+
+        Returns:
+            dict: 游戏信息，不存在时返回None
+        """
+        return self.snapshot().by_id.get(game_id)
+
+    @property
+    def etag(self):
+        """
+        当前游戏列表的ETag，由文件内容计算
+        """
+        return self.snapshot().etag
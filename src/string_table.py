@@ -0,0 +1,211 @@
+"""
+剧情文本字符串表：把章节描述、NPC对话等长文本写入一个UTF-8文件并以只读方式内存映射，
+配置中只保留指向文件中位置的TextRef，使用时再按需切片解码。
+
+字符串表保存在配置目录下的 .strings 目录中，文件名包含文本内容的哈希，
+加载相同剧情的所有工作进程映射的是同一个文件，文本通过操作系统的页缓存共享，
+而不是在每个进程的堆上各保存一份。
+
+文件格式：
+    魔数(8字节) | 格式版本(uint16) | 文本SHA-1(20字节) | 文本长度(uint64) | UTF-8文本
+
+复用已有文件前会检查文件头并逐字节比较文本，内容不一致的文件被重新写入；
+写入新的字符串表后删除同一目录中其他旧版本的文件。
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+TABLE_DIRNAME = ".strings"
+TABLE_MAGIC = b"TXADVSTR"
+TABLE_VERSION = 1
+_HEADER = struct.Struct("<8sH20sQ")
+
+
+def table_dir_for(config_dir):
+    """
+    获取配置目录对应的字符串表存放目录
+
+    Args:
+        config_dir (str): 配置文件目录路径
+
+    Returns:
+        str: 字符串表存放目录
+    """
+    return os.path.join(config_dir, TABLE_DIRNAME)
+
+
+class StringTable:
+    """
+    只读内存映射的字符串表
+    """
+    def __init__(self, path, file=None):
+        """
+        打开并映射字符串表文件
+
+        Args:
+            path (str): 字符串表文件路径
+            file (file): 已打开的文件，传入时映射该文件而不是重新按路径打开
+        """
+        self.path = path
+        if file is None:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def matches(self, header, data):
+        """
+        检查映射的文件是否正好是给定的文件头和文本
+
+        Args:
+            header (bytes): 期望的文件头
+            data (bytes): 期望的文本
+
+        Returns:
+            bool: 内容是否一致
+        """
+        if len(self._map) != len(header) + len(data):
+            return False
+        with memoryview(self._map) as view:
+            return view[:len(header)] == header and view[len(header):] == data
+
+    def close(self):
+        """
+        解除映射，之后不能再读取文本
+        """
+        self._map.close()
+
+    def text(self, offset, length):
+        """
+        读取一段文本
+
+        Args:
+            offset (int): 起始字节偏移
+            length (int): 字节长度
+
+        Returns:
+            str: 解码后的文本
+        """
+        return self._map[offset:offset + length].decode("utf-8")
+
+    def __len__(self):
+        return len(self._map)
+
+
+class TextRef:
+    """
+    指向字符串表中一段文本的引用，str()时才从映射中解码
+    """
+    __slots__ = ("table", "offset", "length")
+
+    def __init__(self, table, offset, length):
+        self.table = table
+        self.offset = offset
+        self.length = length
+
+    def __str__(self):
+        return self.table.text(self.offset, self.length)
+
+    def __repr__(self):
+        return f"TextRef({self.offset}, {self.length})"
+
+    def __reduce__(self):
+        # 映射不能跨进程传递，序列化时退化为普通字符串
+        return (str, (str(self),))
+
+
+def build_string_table(strings, table_dir):
+    """
+    将文本写入字符串表文件并映射，内容相同的文件已存在且校验通过时直接复用
+
+    Args:
+        strings (list): 文本列表
+        table_dir (str): 字符串表文件存放目录
+
+    Returns:
+        tuple: (StringTable, [(偏移, 长度), ...])，文本为空时返回(None, [])
+    """
+    encoded = [s.encode("utf-8") for s in strings]
+    data = b"".join(encoded)
+    if not data:
+        return None, []
+
+    # 偏移从文件头之后开始
+    spans = []
+    offset = _HEADER.size
+    for chunk in encoded:
+        spans.append((offset, len(chunk)))
+        offset += len(chunk)
+
+    digest = hashlib.sha1(data)
+    header = _HEADER.pack(TABLE_MAGIC, TABLE_VERSION, digest.digest(), len(data))
+    filename = f"{digest.hexdigest()}.strtab"
+    path = os.path.join(table_dir, filename)
+
+    table = _open_table(path)
+    if table is not None and not table.matches(header, data):
+        table.close()
+        table = None
+    if table is None:
+        os.makedirs(table_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        # 先映射临时文件再改名，其他进程清理旧文件时不会影响这次映射
+        with open(tmp_path, "w+b") as f:
+            f.write(header)
+            f.write(data)
+            f.flush()
+            table = StringTable(path, f)
+        os.replace(tmp_path, path)
+        _remove_stale_tables(table_dir, filename)
+    return table, spans
+
+
+def _open_table(path):
+    try:
+        return StringTable(path)
+    except (OSError, ValueError):
+        # 文件不存在或为空文件（空文件无法映射）
+        return None
+
+
+def _remove_stale_tables(table_dir, keep):
+    # 已映射旧文件的进程在删除后仍可继续读取，直到解除映射
+    for name in os.listdir(table_dir):
+        if name.endswith(".strtab") and name != keep:
+            try:
+                os.remove(os.path.join(table_dir, name))
+            except OSError:
+                pass
+
+
+def externalize_story_text(story, table_dir):
+    """
+    将剧情配置中的开场、结局、章节描述与NPC对话移入字符串表，原地替换为TextRef
+
+    Args:
+        story (dict): 剧情配置数据
+        table_dir (str): 字符串表文件存放目录
+
+    Returns:
+        StringTable: 字符串表，没有可移出的文本时返回None
+    """
+    # (所在字典, 字段名)
+    fields = []
+    for section in ("intro", "ending"):
+        if isinstance(story.get(section), dict):
+            fields.append((story[section], "text"))
+    for chapter in story.get("chapters", []):
+        fields.append((chapter, "description"))
+        for npc in chapter.get("npcs", []):
+            fields.append((npc, "dialogue"))
+    fields = [(owner, key) for owner, key in fields if isinstance(owner.get(key), str)]
+
+    table, spans = build_string_table([owner[key] for owner, key in fields], table_dir)
+    if table is None:
+        return None
+    for (owner, key), (offset, length) in zip(fields, spans):
+        owner[key] = TextRef(table, offset, length)
+    return table
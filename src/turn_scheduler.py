@@ -0,0 +1,125 @@
+"""
+按敏捷度排列行动顺序的回合调度器
+
+每个参战者有一个下次行动时间，行动间隔为 TURN_GAUGE // 敏捷度，敏捷度越高行动越频繁。
+行动时间保存在最小堆中，取出下一个行动者和重新排入都是 O(log n)，不需要遍历所有参战者。
+行动时间相同时按排入顺序行动，敏捷度相同的参战者轮流行动。
+
+移出的参战者不立即从堆中删除，只把对应的条目标记为无效，取出时跳过。
+"""
+
+import heapq
+import itertools
+
+# 一个行动周期的长度，敏捷度为1的参战者每个周期行动一次
+TURN_GAUGE = 10000
+
+
+class TurnScheduler:
+    """
+    回合调度器
+    """
+    def __init__(self, gauge=TURN_GAUGE):
+        """
+        初始化回合调度器
+
+        Args:
+            gauge (int): 行动周期长度，越大则不同敏捷度之间的行动间隔区分越精确
+        """
+        self.gauge = gauge
+        self.time = 0  # 当前行动的时间
+        self.turns = 0  # 已经调度的行动次数
+        # 条目为 [行动时间, 排入序号, 参战者]，参战者为None表示已移出
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self.skipped = 0  # 取出时跳过的无效条目数
+
+    def interval(self, combatant):
+        """
+        获取参战者的行动间隔
+
+        Args:
+            combatant (Character): 参战者
+
+        Returns:
+            int: 行动间隔
+        """
+        return self.gauge // max(1, combatant.agi)
+
+    def add(self, combatant, delay=None):
+        """
+        排入参战者
+
+        Args:
+            combatant (Character): 参战者
+            delay (int): 距离首次行动的时间，None表示一个行动间隔
+        """
+        if combatant in self._entries:
+            raise ValueError(f"{combatant.name}已经在行动队列中")
+        if delay is None:
+            delay = self.interval(combatant)
+        entry = [self.time + delay, next(self._counter), combatant]
+        self._entries[combatant] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, combatant):
+        """
+        移出参战者，例如参战者被击败时
+
+        Args:
+            combatant (Character): 参战者
+
+        Returns:
+            bool: 参战者是否在行动队列中
+        """
+        entry = self._entries.pop(combatant, None)
+        if entry is None:
+            return False
+        entry[2] = None
+        return True
+
+    def next(self):
+        """
+        取出下一个行动者，并按其行动间隔重新排入
+
+        Returns:
+            Character: 下一个行动者，队列为空时返回None
+        """
+        heap = self._heap
+        while heap:
+            entry = heap[0]
+            combatant = entry[2]
+            if combatant is None:
+                heapq.heappop(heap)
+                self.skipped += 1
+                continue
+            self.time = entry[0]
+            self.turns += 1
+            # 直接修改堆顶条目后下沉，只需要一次 O(log n) 的调整
+            entry[0] += self.interval(combatant)
+            entry[1] = next(self._counter)
+            heapq.heapreplace(heap, entry)
+            return combatant
+        return None
+
+    def __contains__(self, combatant):
+        return combatant in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        获取调度统计信息
+
+        Returns:
+            dict: 统计信息
+        """
+        return {
+            "combatants": len(self._entries),
+            "heap_size": len(self._heap),
+            "time": self.time,
+            "turns": self.turns,
+            "skipped": self.skipped
+        }
@@ -3,6 +3,7 @@ let gameState = {
     player: null,
     currentScreen: 'game-selection', // 默认显示游戏选择界面
     battle: null,
+    battleLogCursor: null,  // 已收到的最后一条战斗日志序号
     quests: {},  // 存储激活的任务
     completedQuests: [],  // 存储已完成的任务
     currentGame: null,  // 当前选择的游戏
@@ -47,7 +48,8 @@ function initGameSelection() {
 
 // 加载游戏列表
 function loadGameList() {
-    fetch('/api/get_story_list')
+    // 始终向服务器确认，列表未变化时服务器返回304，浏览器直接使用缓存的内容
+    fetch('/api/get_story_list', { cache: 'no-cache' })
         .then(response => response.json())
         .then(data => {
             if (data.status === 'success') {
@@ -699,6 +701,10 @@ function handleWorldAction(action) {
             // 进入森林，可能触发战斗
             startBattle('goblin'); // 示例敌人
             break;
+        case 'auto-battle':
+            // 在服务器上连续进行多场战斗，只返回结果汇总
+            autoBattle(5);
+            break;
         case 'talk-to-elder':
             // 与村长交谈
             talkToNpc('village_elder');
@@ -781,6 +787,9 @@ function startBattle() {
     });
 }
 
+// 战斗日志最多显示的行数，与服务器保留的日志条数一致
+const MAX_BATTLE_LOG_LINES = 200;
+
 // 更新战斗界面
 function updateBattleUI() {
     if (!gameState.battle) return;
@@ -811,14 +820,20 @@ function updateBattleUI() {
     const enemyHpPercent = (gameState.battle.enemy.hp / gameState.battle.enemy.max_hp) * 100;
     document.getElementById('enemy-hp-bar').style.width = enemyHpPercent + '%';
     
-    // 更新战斗日志
+    // 更新战斗日志，服务器只返回新的日志条目，追加到已有日志之后
     const battleLog = document.getElementById('battle-log');
-    battleLog.innerHTML = '';
+    if (gameState.battle.log_reset) {
+        battleLog.innerHTML = '';
+    }
     gameState.battle.log.forEach(logEntry => {
         const logLine = document.createElement('div');
         logLine.textContent = '> ' + logEntry;
         battleLog.appendChild(logLine);
     });
+    while (battleLog.childElementCount > MAX_BATTLE_LOG_LINES) {
+        battleLog.removeChild(battleLog.firstChild);
+    }
+    gameState.battleLogCursor = gameState.battle.log_cursor;
     
     // 滚动到底部
     battleLog.scrollTop = battleLog.scrollHeight;
@@ -847,6 +862,10 @@ document.addEventListener('click', function(e) {
         case 'escape':
             performBattleAction('escape');
             break;
+        case 'auto':
+            // 自动完成当前战斗
+            autoBattle(1);
+            break;
     }
 });
 
@@ -858,7 +877,8 @@ function performBattleAction(action) {
             'Content-Type': 'application/json'
         },
         body: JSON.stringify({
-            action: action
+            action: action,
+            since: gameState.battleLogCursor
         })
     })
     .then(response => {
@@ -899,6 +919,53 @@ function performBattleAction(action) {
     });
 }
 
+// 自动战斗：一次请求完成若干场战斗
+function autoBattle(fights) {
+    fetch('/api/auto_battle', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            policy: 'cautious',
+            fights: fights
+        })
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        if (data.status === 'success') {
+            const outcomes = { win: '胜利', loss: '失败', escape: '逃跑', active: '未结束' };
+            const lines = data.fights.map((fight, index) =>
+                `第${index + 1}场 ${fight.enemy}: ${outcomes[fight.outcome]}，${fight.turns}回合` +
+                (fight.exp ? `，经验+${fight.exp}，金币+${fight.gold}` : ''));
+            lines.push(`生命值 ${data.player.hp}/${data.player.max_hp}，等级 ${data.player.level}，金币 ${data.player.gold}`);
+            if (data.completed_quests.length > 0) {
+                lines.push(`完成任务: ${data.completed_quests.join(', ')}`);
+            }
+            if (data.player_dead) {
+                lines.push('你被击败了!');
+            }
+            alert(lines.join('\n'));
+            gameState.battle = null;
+            if (gameState.syncMode === 'auto') {
+                saveGame();
+            }
+            showWorld();
+        } else {
+            alert('自动战斗失败: ' + data.message);
+        }
+    })
+    .catch(error => {
+        console.error('自动战斗失败:', error);
+        alert('自动战斗失败: ' + error.message);
+    });
+}
+
 // 启动自动保存
 function startAutoSave() {
     // 清除现有的自动保存定时器（如果有的话）
@@ -0,0 +1,79 @@
+"""
+配置缓存测试：重新加载失败后热重载仍然可用；配置包与源文件一致时首次加载不读取JSON源文件
+
+在项目根目录下运行 python -m unittest discover tests
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src import config_cache  # noqa: E402
+from src.config_cache import ConfigCache  # noqa: E402
+from src.config_files import config_content_hash  # noqa: E402
+from src.story_bundle import build_bundle  # noqa: E402
+
+
+class ConfigCacheReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_dir = os.path.join(self.tmp_dir, "config")
+        shutil.copytree(os.path.join(ROOT, "config"), self.config_dir)
+        self.now = 0.0
+        self.cache = ConfigCache(check_interval=1.0, background=False, prefetch=False, clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def edit_potion(self, value):
+        path = os.path.join(self.config_dir, "items.json")
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f)
+        items["health_potion"]["value"] = value
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False)
+        # 保证签名变化，不依赖文件系统的时间精度
+        os.utime(path, ns=(0, int(self.now * 1e9) + 1))
+
+    def test_reload_after_failure(self):
+        manager = self.cache.get(self.config_dir)
+        self.edit_potion(7)
+        self.now += 2
+
+        with mock.patch.object(config_cache, "read_config_snapshot", side_effect=PermissionError("denied")):
+            with self.assertRaises(PermissionError):
+                self.cache.get(self.config_dir)
+        entry = next(iter(self.cache._entries.values()))
+        self.assertFalse(entry.reloading)
+
+        # 目录恢复可读后，下一次检查正常重新加载
+        self.now += 2
+        reloaded = self.cache.get(self.config_dir)
+        self.assertIsNot(reloaded, manager)
+        self.assertEqual(reloaded.items["health_potion"]["value"], 7)
+
+    def test_initial_load_uses_bundle_header(self):
+        build_bundle(self.config_dir)
+        with mock.patch.object(config_cache, "read_config_snapshot", side_effect=AssertionError("read JSON")):
+            manager = self.cache.get(self.config_dir)
+            self.assertEqual(manager.items["health_potion"]["value"], 50)
+        entry = next(iter(self.cache._entries.values()))
+        self.assertEqual(entry.content_hash, config_content_hash(self.config_dir))
+
+    def test_stale_bundle_falls_back_to_json(self):
+        build_bundle(self.config_dir)
+        self.edit_potion(7)
+        manager = self.cache.get(self.config_dir)
+        self.assertEqual(manager.items["health_potion"]["value"], 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
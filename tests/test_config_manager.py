@@ -0,0 +1,57 @@
+"""
+配置管理器测试：存在配置包时重复加载剧情，长文本仍能从字符串表读取
+
+在项目根目录下运行 python -m unittest discover tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.config_manager import ConfigManager  # noqa: E402
+from src.story_bundle import build_bundle  # noqa: E402
+from src.string_table import TextRef  # noqa: E402
+
+
+class LoadStoryWithBundleTest(unittest.TestCase):
+    def setUp(self):
+        # 在临时目录中生成配置包和字符串表，不修改仓库中的配置目录
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_dir = os.path.join(self.tmp_dir, "config")
+        shutil.copytree(os.path.join(ROOT, "story-list", "default", "config"), self.config_dir)
+        build_bundle(self.config_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_load_story_twice(self):
+        config_manager = ConfigManager(self.config_dir)
+        self.assertTrue(config_manager._get_bundle())
+        bundle_story = config_manager.load_config_file("story.json")
+        description = bundle_story["chapters"][0]["description"]
+
+        config_manager.load_story()
+        self.assertIsNotNone(config_manager.string_table)
+        first_ref = config_manager.story["chapters"][0]["description"]
+        # 每次从配置包加载都得到新的数据，之前的加载结果被修改不影响之后的加载
+        self.assertIsNot(config_manager.story, bundle_story)
+        self.assertIsInstance(config_manager.load_config_file("story.json")["chapters"][0]["description"], str)
+
+        # 例如延迟加载之后再调用load_all_configs
+        config_manager.load_all_configs()
+        self.assertIsNotNone(config_manager.string_table)
+        chapter = config_manager.story["chapters"][0]
+        self.assertIsInstance(chapter["description"], TextRef)
+        self.assertEqual(str(chapter["description"]), description)
+        # 第一次加载得到的TextRef仍然可以读取
+        self.assertEqual(str(first_ref), description)
+        self.assertEqual(config_manager.get_chapter(chapter["id"]), chapter)
+
+if __name__ == "__main__":
+    unittest.main()
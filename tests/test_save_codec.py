@@ -0,0 +1,168 @@
+"""
+存档编解码测试：玩家与任务的往返、旧版本（v1）存档的兼容读取，以及编解码吞吐量
+
+在项目根目录下运行 python -m unittest discover tests
+"""
+
+import copy
+import os
+import sys
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.character import Player  # noqa: E402
+from src.config_manager import ConfigManager  # noqa: E402
+from src.quest import Quest  # noqa: E402
+from src.save_codec import (  # noqa: E402
+    CODEC_VERSION, PLAYER_FIELDS, QUEST_FIELDS, decode_player, decode_quests, encode_player, encode_quests,
+    save_version
+)
+
+# 每秒至少完成的玩家往返次数，远低于实际速度，只用于发现数量级的退化
+MIN_ROUND_TRIPS_PER_SECOND = 5000
+
+
+class SaveCodecTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # 测试不生成配置包和字符串表文件
+        cls.config_manager = ConfigManager(os.path.join(ROOT, "config"), use_bundle=False, use_string_table=False)
+
+    def make_player(self):
+        player = Player("测试", self.config_manager.get_class("warrior"))
+        player.level = 3
+        player.exp = 42
+        player.gold = 120
+        player.hp = 57
+        player.stat_points = 2
+        player.items = ["health_potion", "health_potion", "mana_potion"]
+        player.equipped_items = {"weapon": "iron_sword"}
+        return player
+
+    def make_quests(self):
+        quest = Quest(self.config_manager.get_quest_by_id("q1"))
+        quest.progress = 3
+        return {quest.id: quest}
+
+    def test_player_round_trip(self):
+        player = self.make_player()
+        data = encode_player(player)
+        self.assertEqual(tuple(data), PLAYER_FIELDS)
+
+        decoded = decode_player(data, self.config_manager)
+        self.assertEqual(encode_player(decoded), data)
+        for field in PLAYER_FIELDS:
+            self.assertEqual(getattr(decoded, field), getattr(player, field), field)
+
+    def test_round_trip_shares_no_containers(self):
+        player = self.make_player()
+        data = encode_player(player)
+        decoded = decode_player(data, self.config_manager)
+
+        for field in ("skills", "items", "equipped_items"):
+            self.assertIsNot(data[field], getattr(player, field), field)
+            self.assertIsNot(getattr(decoded, field), data[field], field)
+
+        # 修改解码得到的玩家不影响存档数据，反之亦然
+        decoded.items.append("magic_scroll")
+        decoded.equipped_items["armor"] = "leather_armor"
+        data["skills"].append("fireball")
+        self.assertEqual(data["items"], player.items)
+        self.assertEqual(data["equipped_items"], player.equipped_items)
+        self.assertNotIn("fireball", decoded.skills)
+
+    def test_quest_round_trip(self):
+        quests = self.make_quests()
+        data = encode_quests(quests)
+        self.assertEqual(tuple(data["q1"]), QUEST_FIELDS)
+
+        decoded = decode_quests(copy.deepcopy(data), self.config_manager)
+        self.assertEqual(encode_quests(decoded), data)
+        self.assertEqual(decoded["q1"].get_progress_text(), "3/5")
+
+    def test_missing_player(self):
+        self.assertIsNone(encode_player(None))
+        self.assertIsNone(decode_player(None, self.config_manager))
+
+    def test_v1_save_is_readable(self):
+        # 旧版本存档：没有version字段，玩家缺少后来加入的字段，任务只保存target_enemy/current_count
+        player_data = encode_player(self.make_player())
+        for field in ("exp_to_next_level", "stat_points", "equipped_items"):
+            del player_data[field]
+        save_data = {
+            "player": player_data,
+            "quests": {
+                "q1": {
+                    "id": "q1",
+                    "name": "保卫村庄",
+                    "description": "击败5只哥布林",
+                    "target_enemy": "goblin",
+                    "required_count": 5,
+                    "current_count": 2,
+                    "reward": {"exp": 50, "gold": 20, "items": ["health_potion"]},
+                    "completed": False
+                }
+            }
+        }
+        version = save_version(save_data)
+        self.assertEqual(version, 1)
+
+        player = decode_player(save_data["player"], self.config_manager)
+        self.assertEqual(player.exp_to_next_level, 100)
+        self.assertEqual(player.stat_points, 0)
+        self.assertEqual(player.equipped_items, {})
+        self.assertEqual(player.items, player_data["items"])
+
+        quests = decode_quests(save_data["quests"], self.config_manager, version)
+        quest = quests["q1"]
+        self.assertEqual(quest.objective, {"type": "defeat_enemies", "enemy": "goblin", "count": 5})
+        self.assertEqual(quest.progress, 2)
+        self.assertFalse(quest.update_progress("goblin", 2))
+        self.assertTrue(quest.update_progress("goblin"))
+
+        # 重新保存后按当前版本读取，结果相同
+        upgraded = {
+            "version": CODEC_VERSION,
+            "player": encode_player(player),
+            "quests": encode_quests(quests)
+        }
+        self.assertEqual(save_version(upgraded), CODEC_VERSION)
+        reloaded = decode_quests(upgraded["quests"], self.config_manager, save_version(upgraded))
+        self.assertEqual(encode_quests(reloaded), upgraded["quests"])
+        self.assertEqual(encode_player(decode_player(upgraded["player"], self.config_manager)), upgraded["player"])
+
+    def test_v1_quest_without_objective_in_config(self):
+        # 剧情配置中已没有该任务时，按旧存档的target_enemy重建任务目标
+        quest_data = {
+            "id": "removed_quest",
+            "name": "旧任务",
+            "description": "击败3只史莱姆",
+            "target_enemy": "slime",
+            "required_count": 3,
+            "current_count": 1,
+            "reward": {},
+            "completed": False
+        }
+        quest = decode_quests({"removed_quest": quest_data}, self.config_manager, 1)["removed_quest"]
+        self.assertEqual(quest.objective, {"type": "defeat_enemies", "enemy": "slime", "count": 3})
+        self.assertEqual(quest.get_progress_text(), "1/3")
+
+    def test_round_trip_throughput(self):
+        player = self.make_player()
+        quests = self.make_quests()
+        rounds = 2000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            decode_player(encode_player(player), self.config_manager)
+            decode_quests(encode_quests(quests), self.config_manager)
+        elapsed = time.perf_counter() - start
+        self.assertGreater(rounds / elapsed, MIN_ROUND_TRIPS_PER_SECOND,
+                           f"{rounds}次往返用时{elapsed:.3f}秒")
+
+
+if __name__ == "__main__":
+    unittest.main()
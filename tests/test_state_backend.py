@@ -0,0 +1,140 @@
+"""
+SQLite状态后端的多进程测试：两个独立的工作进程共享同一个数据库文件时，
+一个进程写回的会话状态在另一个进程中可以继续使用。
+
+在项目根目录下运行 python -m unittest discover tests
+"""
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.state_backend import SQLiteStateBackend  # noqa: E402
+
+# 工作进程中的后端和测试客户端，由进程池的初始化函数创建
+_backend = None
+_client = None
+
+
+def _init_backend_worker(db_path):
+    global _backend
+    _backend = SQLiteStateBackend(db_path)
+
+
+def _store(key, value):
+    _backend.store(key, value)
+    return os.getpid()
+
+
+def _load(key):
+    return os.getpid(), _backend.load(key)
+
+
+def _init_app_worker(db_path, tmp_dir):
+    global _client
+    # 必须在导入app之前设置，app在导入时按环境变量创建后端
+    os.environ["STATE_BACKEND"] = "sqlite"
+    os.environ["STATE_DB_PATH"] = db_path
+    os.environ["SAVE_DB_PATH"] = os.path.join(tmp_dir, "saves.db")
+    os.environ["BATTLE_EVENT_SINK"] = "null"
+    os.chdir(ROOT)
+    import app
+    _client = app.app.test_client()
+
+
+def _request(cookie, method, url, data=None):
+    # 会话cookie在两个进程的测试客户端之间传递，模拟同一个浏览器的请求被分配到不同进程
+    if cookie is None:
+        _client.delete_cookie("session")
+    else:
+        _client.set_cookie("session", cookie)
+    response = _client.open(url, method=method, json=data)
+    cookie = _client.get_cookie("session")
+    return os.getpid(), cookie and cookie.value, response.status_code, response.get_json()
+
+
+class SQLiteStateBackendProcessTest(unittest.TestCase):
+    """
+    两个进程交替读写同一个SQLite数据库文件
+    """
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "state.db")
+        # spawn启动的进程不继承父进程的连接和模块状态，与独立的工作进程相同
+        context = multiprocessing.get_context("spawn")
+        self.pools = []
+
+        def make_pool(initializer, *args):
+            pool = context.Pool(1, initializer=initializer, initargs=args)
+            self.pools.append(pool)
+            return pool
+
+        self.make_pool = make_pool
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.terminate()
+            pool.join()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_state_is_shared_between_processes(self):
+        first = self.make_pool(_init_backend_worker, self.db_path)
+        second = self.make_pool(_init_backend_worker, self.db_path)
+
+        state = {"name": "勇者", "items": ["health_potion"], "gold": 10}
+        first_pid = first.apply(_store, ("session-1", state))
+        second_pid, loaded = second.apply(_load, ("session-1",))
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(loaded, state)
+
+        # 第二个进程修改后写回，第一个进程读到的是修改后的状态
+        loaded["items"].append("mana_potion")
+        loaded["gold"] = 25
+        second.apply(_store, ("session-1", loaded))
+        _, reloaded = first.apply(_load, ("session-1",))
+        self.assertEqual(reloaded, loaded)
+
+        _, missing = first.apply(_load, ("session-2",))
+        self.assertIsNone(missing)
+
+    def test_session_is_kept_between_app_processes(self):
+        first = self.make_pool(_init_app_worker, self.db_path, self.tmp_dir)
+        second = self.make_pool(_init_app_worker, self.db_path, self.tmp_dir)
+
+        cookie = None
+        steps = [
+            ("POST", "/api/select_story", {"game_id": "default"}),
+            ("POST", "/api/start_game", {"name": "测试", "save_name": "multiprocess-test"}),
+            ("POST", "/api/select_class", {"class_name": "warrior"}),
+            ("POST", "/api/start_battle", {}),
+        ]
+        for method, url, data in steps:
+            first_pid, cookie, status, body = first.apply(_request, (cookie, method, url, data))
+            self.assertEqual(status, 200)
+            self.assertEqual(body["status"], "success", url)
+
+        # 战斗状态不写入存档，另一个进程只能从状态后端取得它
+        second_pid, cookie, status, body = second.apply(
+            _request, (cookie, "POST", "/api/battle_action", {"action": "attack"})
+        )
+        self.assertNotEqual(first_pid, second_pid)
+        self.assertEqual(status, 200)
+        self.assertEqual(body["status"], "success")
+        player_hp = body["battle_state"]["player"]["hp"]
+
+        _, cookie, status, body = first.apply(_request, (cookie, "GET", "/api/get_player_stats"))
+        self.assertEqual(status, 200)
+        self.assertEqual(body["status"], "success")
+        self.assertEqual(body["player_stats"]["name"], "测试")
+        self.assertEqual(body["player_stats"]["hp"], player_hp)
+
+
+if __name__ == "__main__":
+    unittest.main()